@@ -1,3 +1,4 @@
+from core.admin import LargeTableAdminMixin
 from django.contrib.admin import (
     ModelAdmin,
     TabularInline,
@@ -26,33 +27,35 @@ EMPTY_VALUE_DISPLAY = "Значение не указано"
 class IngredientInline(TabularInline):
     model = AmountIngredient
     extra = 2
+    autocomplete_fields = ("ingredients",)
 
 
 @register(AmountIngredient)
-class LinksAdmin(ModelAdmin):
-    pass
+class LinksAdmin(LargeTableAdminMixin, ModelAdmin):
+    list_select_related = ("ingredients",)
+    autocomplete_fields = ("recipe", "ingredients")
 
 
 @register(Ingredient)
-class IngredientAdmin(ModelAdmin):
+class IngredientAdmin(LargeTableAdminMixin, ModelAdmin):
     list_display = (
         "name",
         "measurement_unit",
     )
     search_fields = ("name",)
-    list_filter = ("name",)
 
     save_on_top = True
     empty_value_display = EMPTY_VALUE_DISPLAY
 
 
 @register(Recipe)
-class RecipeAdmin(ModelAdmin):
+class RecipeAdmin(LargeTableAdminMixin, ModelAdmin):
     list_display = (
         "name",
         "author",
         "get_image",
-        "count_favorites",
+        "favorites_count",
+        "carts_count",
     )
     fields = (
         (
@@ -66,13 +69,13 @@ class RecipeAdmin(ModelAdmin):
         ("text",),
         ("image",),
     )
-    raw_id_fields = ("author",)
+    list_select_related = ("author",)
+    autocomplete_fields = ("author",)
     search_fields = (
         "name",
         "author__username",
-        "tags__name",
     )
-    list_filter = ("name", "author__username", "tags__name")
+    list_filter = ("tags",)
 
     inlines = (IngredientInline,)
     save_on_top = True
@@ -83,11 +86,6 @@ class RecipeAdmin(ModelAdmin):
 
     get_image.short_description = "Изображение"
 
-    def count_favorites(self, obj: Recipe) -> int:
-        return obj.in_favorites.count()
-
-    count_favorites.short_description = "В избранном"
-
 
 @register(Tag)
 class TagAdmin(ModelAdmin):
@@ -112,8 +110,10 @@ class TagAdmin(ModelAdmin):
 
 
 @register(Favorites)
-class FavoriteAdmin(ModelAdmin):
+class FavoriteAdmin(LargeTableAdminMixin, ModelAdmin):
     list_display = ("user", "recipe", "date_added")
+    list_select_related = ("user", "recipe__author")
+    autocomplete_fields = ("user", "recipe")
     search_fields = ("user__username", "recipe__name")
 
     def has_change_permission(
@@ -128,8 +128,10 @@ class FavoriteAdmin(ModelAdmin):
 
 
 @register(Carts)
-class CardAdmin(ModelAdmin):
+class CardAdmin(LargeTableAdminMixin, ModelAdmin):
     list_display = ("user", "recipe", "date_added")
+    list_select_related = ("user", "recipe__author")
+    autocomplete_fields = ("user", "recipe")
     search_fields = ("user__username", "recipe__name")
 
     def has_change_permission(
@@ -0,0 +1,211 @@
+import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+from os import cpu_count
+from pathlib import Path
+from time import monotonic
+
+import django
+from core.images import rendition_names
+from core.recipe_images import (
+    Status,
+    fail_image,
+    render_renditions,
+    save_renditions,
+)
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from recipes.models import Recipe, RecipeImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт заново копии изображений всех рецептов в несколько "
+        "процессов. Прерванный запуск продолжается с сохранённой позиции."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=cpu_count(),
+            help="Количество процессов обработки изображений.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Количество рецептов между сохранениями позиции.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=Path,
+            default=Path("backfill_renditions.json"),
+            help="Файл с позицией прерванного запуска.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Начать с первого рецепта, не читая сохранённую позицию.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Обработать и изображения с актуальным набором копий.",
+        )
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=10,
+            help=(
+                "Через сколько минут изображение в состоянии `running` "
+                "считается брошенным прерванным запуском и обрабатывается "
+                "заново."
+            ),
+        )
+
+    def handle(
+        self,
+        *args,
+        workers: int,
+        batch_size: int,
+        checkpoint: Path,
+        restart: bool,
+        force: bool,
+        stale_minutes: int,
+        **options,
+    ) -> None:
+        last_pk = 0
+        if not restart and checkpoint.exists():
+            last_pk = json.loads(checkpoint.read_text())["last_pk"]
+            self.stdout.write(f"Продолжение после рецепта {last_pk}")
+
+        total = Recipe.objects.filter(pk__gt=last_pk).count()
+        names = rendition_names()
+        self.started = monotonic()
+        self.stats = dict.fromkeys(("done", "skipped", "failed"), 0)
+
+        # Дочерние процессы запускаются заново, а не копируют текущий,
+        # чтобы не унаследовать его соединения с базой данных.
+        with ProcessPoolExecutor(
+            workers, mp_context=get_context("spawn"), initializer=django.setup
+        ) as pool:
+            while True:
+                pks = list(
+                    Recipe.objects.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)[:batch_size]
+                )
+                if not pks:
+                    break
+
+                stale = timezone.now() - timedelta(minutes=stale_minutes)
+                images = self.claim(pks, names, force, stale)
+                self.stats["skipped"] += len(pks) - len(images)
+                self.process(pool, images)
+
+                last_pk = pks[-1]
+                checkpoint.write_text(json.dumps({"last_pk": last_pk}))
+                self.report(total)
+
+        checkpoint.unlink(missing_ok=True)
+        self.stdout.write("Готово.")
+
+    def claim(
+        self, pks: list[int], names: set[str], force: bool, stale: datetime
+    ) -> list[RecipeImage]:
+        """Забирает изображения рецептов для обработки.
+
+        Пропускаются изображения, которые обрабатывает `process_images`
+        или другой запуск команды, и, без `force`, изображения с полным
+        набором копий. Изображения, оставшиеся в состоянии `running`
+        с момента `stale` и раньше, оставлены прерванным запуском
+        и забираются заново.
+
+        Args:
+            pks (list[int]): `id` рецептов.
+            names (set[str]): Названия копий.
+            force (bool): Обработать и актуальные изображения.
+            stale (datetime): Время, до которого забранные изображения
+                считаются брошенными.
+
+        Returns:
+            list[RecipeImage]: Изображения в состоянии `running`.
+        """
+        RecipeImage.objects.bulk_create(
+            (
+                RecipeImage(recipe_id=pk, source=image)
+                for pk, image in Recipe.objects.filter(
+                    pk__in=pks, renditions__isnull=True
+                ).values_list("pk", "image")
+            ),
+            ignore_conflicts=True,
+        )
+
+        images = []
+        for image in RecipeImage.objects.filter(pk__in=pks).order_by("pk"):
+            if (image.status == Status.RUNNING and image.updated > stale) or (
+                not force
+                and image.status == Status.DONE
+                and set(image.files) == names
+            ):
+                continue
+
+            if RecipeImage.objects.filter(
+                pk=image.pk,
+                source=image.source,
+                status=image.status,
+                updated=image.updated,
+            ).update(status=Status.RUNNING, updated=timezone.now()):
+                images.append(image)
+
+        return images
+
+    def process(
+        self, pool: ProcessPoolExecutor, images: list[RecipeImage]
+    ) -> None:
+        """Обрабатывает изображения в дочерних процессах.
+
+        Файлы создаются дочерними процессами, результат записывается
+        в базу данных текущим.
+
+        Args:
+            pool (ProcessPoolExecutor): Процессы обработки.
+            images (list[RecipeImage]): Изображения в состоянии `running`.
+        """
+        futures = {
+            pool.submit(render_renditions, image.pk, image.source): image
+            for image in images
+        }
+        for future in as_completed(futures):
+            image = futures[future]
+            try:
+                files, placeholder = future.result()
+            except Exception as error:
+                self.stderr.write(f"Рецепт {image.pk}: {error}")
+                fail_image(image)
+                self.stats["failed"] += 1
+                continue
+
+            if save_renditions(image, files, placeholder):
+                self.stats["done"] += 1
+            else:
+                self.stats["skipped"] += 1
+
+    def report(self, total: int) -> None:
+        """Выводит ход обработки.
+
+        Args:
+            total (int): Количество рецептов в запуске.
+        """
+        passed = sum(self.stats.values())
+        elapsed = monotonic() - self.started
+        rate = self.stats["done"] / elapsed if elapsed else 0
+        remaining = (total - passed) * elapsed / passed if passed else 0
+        self.stdout.write(
+            f"{passed}/{total}: обработано {self.stats['done']}, "
+            f"пропущено {self.stats['skipped']}, "
+            f"ошибок {self.stats['failed']}; "
+            f"{rate:.1f} изобр./с, осталось ~{remaining:.0f} с"
+        )
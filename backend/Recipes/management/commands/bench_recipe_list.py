@@ -0,0 +1,69 @@
+from time import perf_counter
+from typing import Callable
+
+from api.fragments import assemble, get_fragments
+from api.renderers import ORJSONRenderer
+from api.serializers import RecipeSerializer
+from api.views import RecipeViewSet
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает время формирования страницы рецептов сериализатором "
+        "и сборкой из JSON-фрагментов."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=6,
+            help="Количество рецептов на странице.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=200,
+            help="Количество повторов каждого способа.",
+        )
+
+    def handle(self, *args, limit: int, repeat: int, **options) -> None:
+        request = Request(APIRequestFactory().get("/api/recipes/"))
+        queryset = RecipeViewSet.queryset
+        renderer = ORJSONRenderer()
+
+        def serializer_path() -> None:
+            recipes = list(queryset[:limit])
+            data = RecipeSerializer(
+                recipes, many=True, context={"request": request}
+            ).data
+            renderer.render(data)
+
+        def fragments_path() -> None:
+            ids = list(queryset.values_list("pk", flat=True)[:limit])
+            renderer.render(assemble(ids, queryset, request))
+
+        # Прогрев фрагментов, чтобы измерять сборку из кэша.
+        get_fragments(queryset.values_list("pk", flat=True)[:limit], queryset)
+
+        results = {
+            "serializer": self.measure(serializer_path, repeat),
+            "fragments": self.measure(fragments_path, repeat),
+        }
+        for name, elapsed in results.items():
+            self.stdout.write(f"{name}: {elapsed * 1000:.2f} мс на страницу")
+
+        if results["fragments"]:
+            speedup = results["serializer"] / results["fragments"]
+            self.stdout.write(f"Ускорение: {speedup:.1f}x")
+
+    @staticmethod
+    def measure(func: Callable, repeat: int) -> float:
+        """Среднее время выполнения функции в секундах."""
+        start = perf_counter()
+        for _ in range(repeat):
+            func()
+        return (perf_counter() - start) / repeat
@@ -0,0 +1,63 @@
+from time import perf_counter
+
+from api.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+from api.serializers import RecipeSerializer
+from api.views import RecipeViewSet
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает скорость рендереров ответов на страницах рецептов: "
+        "стандартного JSON, orjson и MessagePack."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--limits",
+            type=int,
+            nargs="+",
+            default=[6, 100, 1000],
+            help="Размеры страниц рецептов.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=100,
+            help="Количество повторов рендеринга страницы.",
+        )
+
+    def handle(self, *args, limits: list[int], repeat: int, **options):
+        request = Request(APIRequestFactory().get("/api/recipes/"))
+        renderers = {
+            "json": JSONRenderer(),
+            "orjson": ORJSONRenderer(),
+        }
+        if msgpack is not None:
+            renderers["msgpack"] = MessagePackRenderer()
+
+        for limit in limits:
+            recipes = list(RecipeViewSet.queryset[:limit])
+            data = {
+                "count": len(recipes),
+                "next": None,
+                "previous": None,
+                "results": RecipeSerializer(
+                    recipes, many=True, context={"request": request}
+                ).data,
+            }
+            self.stdout.write(f"Страница из {len(recipes)} рецептов:")
+
+            for name, renderer in renderers.items():
+                start = perf_counter()
+                for _ in range(repeat):
+                    body = renderer.render(data)
+                elapsed = (perf_counter() - start) / repeat
+                self.stdout.write(
+                    f"  {name}: {elapsed * 1000:.3f} мс, "
+                    f"{len(body) / 1024:.1f} КБ, "
+                    f"{len(body) / elapsed / 2**20:.1f} МБ/с"
+                )
@@ -0,0 +1,24 @@
+from core.cache import get_stats
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Выводит счётчики попаданий и промахов кэша ответов."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "names",
+            nargs="*",
+            default=["responses"],
+            help="Названия кэшей.",
+        )
+
+    def handle(self, *args, names: list[str], **options) -> None:
+        for name in names:
+            stats = get_stats(name)
+            total = stats["hit"] + stats["miss"]
+            ratio = stats["hit"] / total if total else 0
+            self.stdout.write(
+                f"{name}: hit={stats['hit']} miss={stats['miss']} "
+                f"hit_ratio={ratio:.1%}"
+            )
@@ -0,0 +1,49 @@
+from time import sleep
+
+from core.recipe_images import claim_image, requeue_images, run_image
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+
+class Command(BaseCommand):
+    help = "Создаёт уменьшенные копии изображений рецептов."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Обработать изображения из очереди и завершить работу.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Пауза при пустой очереди, в секундах.",
+        )
+        parser.add_argument(
+            "--requeue",
+            action="store_true",
+            help=(
+                "Перед запуском вернуть в очередь незавершённые "
+                "и необработанные изображения."
+            ),
+        )
+
+    def handle(
+        self, *args, once: bool, interval: float, requeue: bool, **options
+    ) -> None:
+        if requeue:
+            self.stdout.write(f"Возвращено в очередь: {requeue_images()}")
+
+        while True:
+            close_old_connections()
+
+            image = claim_image()
+            if image is not None:
+                run_image(image)
+                self.stdout.write(f"Изображение рецепта {image.pk}")
+                continue
+
+            if once:
+                return
+            sleep(interval)
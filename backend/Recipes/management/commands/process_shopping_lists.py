@@ -0,0 +1,61 @@
+from time import monotonic, sleep
+
+from core.shopping_lists import (
+    claim_job,
+    purge_jobs,
+    requeue_jobs,
+    run_job,
+)
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+# Интервал удаления старых заданий, в секундах
+PURGE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = "Выполняет задания на формирование списков покупок."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить задания из очереди и завершить работу.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Пауза при пустой очереди, в секундах.",
+        )
+        parser.add_argument(
+            "--requeue",
+            action="store_true",
+            help="Перед запуском вернуть в очередь незавершённые задания.",
+        )
+
+    def handle(
+        self, *args, once: bool, interval: float, requeue: bool, **options
+    ) -> None:
+        if requeue:
+            self.stdout.write(f"Возвращено в очередь: {requeue_jobs()}")
+
+        purged_at = None
+
+        while True:
+            close_old_connections()
+
+            if purged_at is None or monotonic() - purged_at > PURGE_INTERVAL:
+                purge_jobs(settings.SHOPPING_LIST_KEEP_HOURS)
+                purged_at = monotonic()
+
+            job = claim_job()
+            if job is not None:
+                run_job(job)
+                self.stdout.write(f"Задание {job.pk}: {job.status}")
+                continue
+
+            if once:
+                return
+            sleep(interval)
@@ -0,0 +1,26 @@
+from api.fragments import rebuild_fragments
+from api.views import RecipeViewSet
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Заново отрисовывает JSON-фрагменты всех рецептов в общем кэше "
+        "процессов приложения."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Количество рецептов в одной выборке.",
+        )
+
+    def handle(self, *args, batch_size: int, **options) -> None:
+        try:
+            count = rebuild_fragments(RecipeViewSet.queryset, batch_size)
+        except ImproperlyConfigured as error:
+            raise CommandError(error)
+        self.stdout.write(f"Отрисовано фрагментов: {count}")
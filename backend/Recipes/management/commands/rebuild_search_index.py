@@ -0,0 +1,23 @@
+from core.search import update_search_index
+from django.core.management.base import BaseCommand
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Заново строит поисковый индекс всех рецептов."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество рецептов в одном обновлении индекса.",
+        )
+
+    def handle(self, *args, batch_size: int, **options) -> None:
+        ids = list(Recipe.objects.order_by("pk").values_list("pk", flat=True))
+
+        for start in range(0, len(ids), batch_size):
+            update_search_index(ids[start : start + batch_size])
+
+        self.stdout.write(f"Проиндексировано рецептов: {len(ids)}")
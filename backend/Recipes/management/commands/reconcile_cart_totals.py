@@ -0,0 +1,67 @@
+from core.cart_totals import (
+    Totals,
+    compute_cart_totals,
+    get_cart_totals,
+    rebuild_cart_totals,
+)
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет суммы ингредиентов в корзинах покупок с подсчётом "
+        "по рецептам в корзинах и записывает их заново."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только сверить суммы, ничего не записывая.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество записей в одном запросе вставки.",
+        )
+
+    def handle(
+        self, *args, check: bool, batch_size: int, verbosity: int, **options
+    ) -> None:
+        self.verbosity = verbosity
+        drift = self.compare(get_cart_totals(), compute_cart_totals())
+        self.stdout.write(f"Расхождений в суммах: {drift}")
+
+        if check:
+            if drift:
+                raise CommandError("Суммы в корзинах не совпадают.")
+            return
+
+        count = rebuild_cart_totals(batch_size=batch_size)
+        self.stdout.write(f"Записано сумм: {count}")
+
+        if self.compare(get_cart_totals(), compute_cart_totals()):
+            raise CommandError("Суммы после пересчёта не совпадают.")
+        self.stdout.write("Суммы совпадают.")
+
+    def compare(self, stored: Totals, expected: Totals) -> int:
+        """Выводит расхождения хранимых сумм с подсчитанными.
+
+        Args:
+            stored (Totals): Хранимые суммы.
+            expected (Totals): Подсчитанные суммы.
+
+        Returns:
+            int: Количество расхождений.
+        """
+        drift = 0
+        for key in sorted(stored.keys() | expected.keys()):
+            if stored.get(key) != expected.get(key):
+                drift += 1
+                if self.verbosity > 1:
+                    self.stdout.write(
+                        f"Пользователь {key[0]}, ингредиент {key[1]}: "
+                        f"{stored.get(key, 0)} вместо {expected.get(key, 0)}"
+                    )
+        return drift
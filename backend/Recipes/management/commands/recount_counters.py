@@ -0,0 +1,52 @@
+from core.counters import counted_models, recount_counters, wrong_counters
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет счётчики рецептов и пользователей с количеством "
+        "связанных объектов и исправляет неверные."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только сверить счётчики, ничего не записывая.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество объектов в одном запросе обновления.",
+        )
+
+    def handle(
+        self, *args, check: bool, batch_size: int, verbosity: int, **options
+    ) -> None:
+        drift = 0
+        for model in counted_models():
+            name = model._meta.verbose_name_plural
+            wrong = wrong_counters(model)
+
+            if verbosity > 1:
+                for obj in wrong:
+                    for field in model.COUNTERS:
+                        expected = getattr(obj, f"expected_{field}")
+                        if getattr(obj, field) != expected:
+                            self.stdout.write(
+                                f"{model._meta.verbose_name} {obj.pk}, "
+                                f"{field}: "
+                                f"{getattr(obj, field)} вместо {expected}"
+                            )
+
+            count = wrong.count()
+            drift += count
+            self.stdout.write(f"{name}: неверных счётчиков {count}")
+
+            if not check and count:
+                fixed = recount_counters(model, batch_size)
+                self.stdout.write(f"{name}: исправлено {fixed}")
+
+        if check and drift:
+            raise CommandError("Счётчики не совпадают.")
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:16
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from core.operations import PostgresAddIndex
+from django.db import migrations, models
+
+FTS_TABLE = "recipes_recipe_fts"
+
+INGREDIENT_NAMES = """
+    SELECT {agg}(i.name, ' ')
+    FROM recipes_amountingredient a
+    JOIN recipes_ingredient i ON i.id = a.ingredients_id
+    WHERE a.recipe_id = r.id
+"""
+
+
+def create_search_index(apps, schema_editor) -> None:
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "postgresql":
+        names = INGREDIENT_NAMES.format(agg="string_agg")
+        schema_editor.execute(
+            "INSERT INTO recipes_recipesearch (recipe_id, vector) "
+            "SELECT r.id, "
+            "setweight(to_tsvector('russian', r.name), 'A') || "
+            f"setweight(to_tsvector('russian', COALESCE(({names}), '')), 'B')"
+            " || setweight(to_tsvector('russian', r.text), 'C') "
+            "FROM recipes_recipe r"
+        )
+    elif vendor == "sqlite":
+        names = INGREDIENT_NAMES.format(agg="group_concat")
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "name, ingredients, text, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text) "
+            f"SELECT r.id, r.name, COALESCE(({names}), ''), r.text "
+            "FROM recipes_recipe r"
+        )
+
+
+def drop_search_index(apps, schema_editor) -> None:
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0003_recipe_pub_date_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeSearch",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search",
+                        serialize=False,
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "vector",
+                    django.contrib.postgres.search.SearchVectorField(
+                        null=True, verbose_name="Поисковый вектор"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Поисковый вектор рецепта",
+                "verbose_name_plural": "Поисковые векторы рецептов",
+            },
+        ),
+        PostgresAddIndex(
+            model_name="recipesearch",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["vector"], name="recipe_search_vector_idx"
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:18
+
+import django.contrib.postgres.indexes
+from core.operations import PostgresAddIndex
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0004_recipesearch"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(
+                fields=["name"],
+                name="ingredient_name_prefix_idx",
+                opclasses=("varchar_pattern_ops",),
+            ),
+        ),
+        TrigramExtension(),
+        PostgresAddIndex(
+            model_name="ingredient",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"],
+                name="ingredient_name_trgm_idx",
+                opclasses=("gin_trgm_ops",),
+            ),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_cart_totals(apps, schema_editor):
+    AmountIngredient = apps.get_model("recipes", "AmountIngredient")
+    CartIngredient = apps.get_model("recipes", "CartIngredient")
+    totals = (
+        AmountIngredient.objects.filter(recipe__in_carts__isnull=False)
+        .values("recipe__in_carts__user", "ingredients")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    CartIngredient.objects.bulk_create(
+        (
+            CartIngredient(
+                user_id=row["recipe__in_carts__user"],
+                ingredient_id=row["ingredients"],
+                amount=row["total"],
+            )
+            for row in totals.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0005_ingredient_name_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CartIngredient",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.IntegerField(default=0, verbose_name="Количество"),
+                ),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="in_cart_totals",
+                        to="recipes.ingredient",
+                        verbose_name="Ингредиент",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cart_ingredients",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Владелец списка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ингредиент в списке покупок",
+                "verbose_name_plural": "Ингредиенты в списке покупок",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "ingredient"),
+                        name="unique_cart_ingredient_for_user",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_cart_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:29
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0006_cartingredient"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShoppingListJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("done", "Готово"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                        verbose_name="Состояние",
+                    ),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        blank=True,
+                        upload_to="shopping_lists/",
+                        verbose_name="Файл списка покупок",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+                (
+                    "finished",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Дата завершения"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shopping_list_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Владелец списка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Задание на список покупок",
+                "verbose_name_plural": "Задания на списки покупок",
+                "ordering": ("created",),
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created"],
+                        name="shopping_list_job_queue_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0007_shoppinglistjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shoppinglistjob",
+            name="file_format",
+            field=models.CharField(
+                default="txt", max_length=8, verbose_name="Формат файла"
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:39
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field):
+    counted = (
+        model.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counted), 0, output_field=IntegerField())
+
+
+def fill_recipe_counters(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Recipe.objects.update(
+        favorites_count=count_of(
+            apps.get_model("recipes", "Favorites"), "recipe"
+        ),
+        carts_count=count_of(apps.get_model("recipes", "Carts"), "recipe"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0008_shoppinglistjob_file_format"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="carts_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В списках покупок"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В избранном"
+            ),
+        ),
+        migrations.RunPython(fill_recipe_counters, migrations.RunPython.noop),
+    ]
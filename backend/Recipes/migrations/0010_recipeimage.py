@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def queue_recipe_images(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeImage = apps.get_model("recipes", "RecipeImage")
+    RecipeImage.objects.bulk_create(
+        (
+            RecipeImage(recipe_id=pk, source=image)
+            for pk, image in Recipe.objects.values_list(
+                "pk", "image"
+            ).iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0009_recipe_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeImage",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="renditions",
+                        serialize=False,
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        max_length=255, verbose_name="Исходное изображение"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("done", "Готово"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                        verbose_name="Состояние",
+                    ),
+                ),
+                (
+                    "files",
+                    models.JSONField(default=dict, verbose_name="Файлы копий"),
+                ),
+                (
+                    "placeholder",
+                    models.TextField(blank=True, verbose_name="Заглушка"),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Дата изменения"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Копии изображения рецепта",
+                "verbose_name_plural": "Копии изображений рецептов",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "updated"],
+                        name="recipe_image_queue_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(queue_recipe_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:05
+
+from core.operations import PostgresRemoveIndex
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0010_recipeimage"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="ingredient",
+            name="ingredient_name_prefix_idx",
+        ),
+        PostgresRemoveIndex(
+            model_name="ingredient",
+            name="ingredient_name_trgm_idx",
+        ),
+    ]
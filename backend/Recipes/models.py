@@ -16,10 +16,23 @@ Models:
         Указывает избранные пользователем рецепты.
     Cart:
         Рецепты в корзине покупок пользователя.
+    RecipeSearch:
+        Поисковый вектор рецепта для полнотекстового поиска.
+    CartIngredient:
+        Суммарное количество ингредиента в корзине покупок пользователя.
+    ShoppingListJob:
+        Задание на формирование файла со списком покупок.
+    RecipeImage:
+        Уменьшенные копии изображения рецепта.
 """
-from core.enums import Limits, Tuples
+from uuid import uuid4
+
+from core.counters import CounterFieldsMixin
+from core.enums import Limits
 from core.validators import OneOfTwoValidator, hex_color_validator
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db.models import (
     CASCADE,
@@ -27,17 +40,24 @@ from django.db.models import (
     CharField,
     CheckConstraint,
     DateTimeField,
+    FileField,
     ForeignKey,
     ImageField,
+    Index,
+    IntegerField,
+    JSONField,
     ManyToManyField,
     Model,
+    OneToOneField,
+    PositiveIntegerField,
     PositiveSmallIntegerField,
     Q,
+    TextChoices,
     TextField,
     UniqueConstraint,
+    UUIDField,
 )
 from django.db.models.functions import Length
-from PIL import Image
 
 CharField.register_lookup(Length)
 
@@ -149,7 +169,7 @@ class Ingredient(Model):
         super().clean()
 
 
-class Recipe(Model):
+class Recipe(CounterFieldsMixin, Model):
     """Модель для рецептов.
 
     Основная модель приложения описывающая рецепты.
@@ -179,8 +199,17 @@ class Recipe(Model):
         cooking_time(int):
             Время приготовления рецепта.
             Установлены ограничения по максимальным и минимальным значениям.
+        favorites_count(int):
+            Количество добавлений рецепта в `избранное`.
+        carts_count(int):
+            Количество добавлений рецепта в `покупки`.
     """
 
+    COUNTERS = {
+        "favorites_count": "in_favorites",
+        "carts_count": "in_carts",
+    }
+
     name = CharField(
         verbose_name="Название блюда",
         max_length=Limits.MAX_LEN_RECIPES_CHARFIELD.value,
@@ -230,11 +259,27 @@ class Recipe(Model):
             ),
         ),
     )
+    favorites_count = PositiveIntegerField(
+        verbose_name="В избранном",
+        default=0,
+        editable=False,
+    )
+    carts_count = PositiveIntegerField(
+        verbose_name="В списках покупок",
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
-        ordering = ("-pub_date",)
+        ordering = ("-pub_date", "-id")
+        indexes = (
+            Index(
+                fields=("-pub_date", "-id"),
+                name="recipe_pub_date_id_idx",
+            ),
+        )
         constraints = (
             UniqueConstraint(
                 fields=("name", "author"),
@@ -253,12 +298,6 @@ class Recipe(Model):
         self.name = self.name.capitalize()
         return super().clean()
 
-    def save(self, *args, **kwargs) -> None:
-        super().save(*args, **kwargs)
-        image = Image.open(self.image.path)
-        image.thumbnail(Tuples.RECIPE_IMAGE_SIZE)
-        image.save(self.image.path)
-
 
 class AmountIngredient(Model):
     """Количество ингридиентов в блюде.
@@ -412,3 +451,240 @@ class Carts(Model):
 
     def __str__(self) -> str:
         return f"{self.user} -> {self.recipe}"
+
+
+class RecipeSearch(Model):
+    """Поисковый вектор рецепта.
+
+    Вектор строится по названию рецепта, названиям его ингредиентов
+    и описанию (в порядке убывания веса) со стеммингом русского языка.
+    Используется в PostgreSQL, заполняется функциями `core.search`.
+    Вынесен в отдельную таблицу, чтобы не увеличивать строки рецептов,
+    читаемые при выводе списков.
+
+    Attributes:
+        recipe(int):
+            Рецепт. Связь через OneToOneField.
+        vector(str):
+            Поисковый вектор (`tsvector`).
+    """
+
+    recipe = OneToOneField(
+        verbose_name="Рецепт",
+        related_name="search",
+        to=Recipe,
+        on_delete=CASCADE,
+        primary_key=True,
+    )
+    vector = SearchVectorField(
+        verbose_name="Поисковый вектор",
+        null=True,
+    )
+
+    class Meta:
+        verbose_name = "Поисковый вектор рецепта"
+        verbose_name_plural = "Поисковые векторы рецептов"
+        indexes = (
+            GinIndex(
+                fields=("vector",),
+                name="recipe_search_vector_idx",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"Поиск: {self.recipe_id}"
+
+
+class CartIngredient(Model):
+    """Суммарное количество ингредиента в корзине покупок.
+
+    Сумма по всем рецептам в корзине пользователя. Поддерживается
+    функциями `core.cart_totals` при изменении корзины и ингредиентов
+    рецептов, поэтому список покупок читается без агрегации.
+
+    Attributes:
+        user(int):
+            Владелец корзины. Связь через ForeignKey.
+        ingredient(int):
+            Ингредиент. Связь через ForeignKey.
+        amount(int):
+            Суммарное количество ингредиента.
+    """
+
+    user = ForeignKey(
+        verbose_name="Владелец списка",
+        related_name="cart_ingredients",
+        to=User,
+        on_delete=CASCADE,
+    )
+    ingredient = ForeignKey(
+        verbose_name="Ингредиент",
+        related_name="in_cart_totals",
+        to=Ingredient,
+        on_delete=CASCADE,
+    )
+    amount = IntegerField(
+        verbose_name="Количество",
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = "Ингредиент в списке покупок"
+        verbose_name_plural = "Ингредиенты в списке покупок"
+        constraints = (
+            UniqueConstraint(
+                fields=("user", "ingredient"),
+                name="unique_cart_ingredient_for_user",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.user} -> {self.amount} {self.ingredient}"
+
+
+class ShoppingListJob(Model):
+    """Задание на формирование файла со списком покупок.
+
+    Для больших корзин список покупок формируется не в запросе,
+    а обработчиком заданий (команда `process_shopping_lists`).
+    Готовый файл сохраняется в каталог `shopping_lists/` медиа-файлов.
+
+    Attributes:
+        id(UUID):
+            Идентификатор задания, по которому пользователь его получает.
+        user(int):
+            Владелец списка. Связь через ForeignKey.
+        status(str):
+            Состояние задания.
+        file_format(str):
+            Формат файла: txt, csv, json или pdf.
+        file(str):
+            Готовый файл со списком покупок.
+        created(datetime):
+            Дата создания задания.
+        finished(datetime):
+            Дата завершения задания.
+    """
+
+    class Status(TextChoices):
+        PENDING = "pending", "В очереди"
+        RUNNING = "running", "Выполняется"
+        DONE = "done", "Готово"
+        FAILED = "failed", "Ошибка"
+
+    id = UUIDField(primary_key=True, default=uuid4, editable=False)
+    user = ForeignKey(
+        verbose_name="Владелец списка",
+        related_name="shopping_list_jobs",
+        to=User,
+        on_delete=CASCADE,
+    )
+    status = CharField(
+        verbose_name="Состояние",
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    file_format = CharField(
+        verbose_name="Формат файла",
+        max_length=8,
+        default="txt",
+    )
+    file = FileField(
+        verbose_name="Файл списка покупок",
+        upload_to="shopping_lists/",
+        blank=True,
+    )
+    created = DateTimeField(
+        verbose_name="Дата создания", auto_now_add=True, editable=False
+    )
+    finished = DateTimeField(
+        verbose_name="Дата завершения", null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = "Задание на список покупок"
+        verbose_name_plural = "Задания на списки покупок"
+        ordering = ("created",)
+        indexes = (
+            Index(
+                fields=("status", "created"),
+                name="shopping_list_job_queue_idx",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.user}: {self.get_status_display()}"
+
+
+class RecipeImage(Model):
+    """Уменьшенные копии изображения рецепта.
+
+    Копии создаются не в запросе, а обработчиком изображений (команда
+    `process_images`), и только при замене изображения рецепта.
+    Вынесены в отдельную таблицу, чтобы сохранение рецепта
+    не перезаписывало результат работы обработчика.
+
+    Attributes:
+        recipe(int):
+            Рецепт. Связь через OneToOneField.
+        source(str):
+            Путь к изображению рецепта, для которого созданы копии.
+        status(str):
+            Состояние обработки.
+        files(dict):
+            Пути к файлам копий по их названиям.
+        placeholder(str):
+            Крошечная копия изображения в виде `data:` URL.
+        updated(datetime):
+            Дата последнего изменения.
+    """
+
+    class Status(TextChoices):
+        PENDING = "pending", "В очереди"
+        RUNNING = "running", "Выполняется"
+        DONE = "done", "Готово"
+        FAILED = "failed", "Ошибка"
+
+    recipe = OneToOneField(
+        verbose_name="Рецепт",
+        related_name="renditions",
+        to=Recipe,
+        on_delete=CASCADE,
+        primary_key=True,
+    )
+    source = CharField(
+        verbose_name="Исходное изображение",
+        max_length=255,
+    )
+    status = CharField(
+        verbose_name="Состояние",
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    files = JSONField(
+        verbose_name="Файлы копий",
+        default=dict,
+    )
+    placeholder = TextField(
+        verbose_name="Заглушка",
+        blank=True,
+    )
+    updated = DateTimeField(
+        verbose_name="Дата изменения",
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = "Копии изображения рецепта"
+        verbose_name_plural = "Копии изображений рецептов"
+        indexes = (
+            Index(
+                fields=("status", "updated"),
+                name="recipe_image_queue_idx",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.source}: {self.get_status_display()}"
@@ -1,16 +1,19 @@
+from core.admin import LargeTableAdminMixin
 from django.contrib.admin import register
 from django.contrib.auth.admin import UserAdmin
 from users.models import MyUser
 
 
 @register(MyUser)
-class MyUserAdmin(UserAdmin):
+class MyUserAdmin(LargeTableAdminMixin, UserAdmin):
     list_display = (
         "is_active",
         "username",
         "first_name",
         "last_name",
         "email",
+        "recipes_count",
+        "subscribers_count",
     )
     fields = (
         ("is_active",),
@@ -29,9 +32,5 @@ class MyUserAdmin(UserAdmin):
         "username",
         "email",
     )
-    list_filter = (
-        "is_active",
-        "first_name",
-        "email",
-    )
+    list_filter = ("is_active",)
     save_on_top = True
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:39
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field):
+    counted = (
+        model.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counted), 0, output_field=IntegerField())
+
+
+def fill_user_counters(apps, schema_editor):
+    MyUser = apps.get_model("users", "MyUser")
+    MyUser.objects.update(
+        recipes_count=count_of(apps.get_model("recipes", "Recipe"), "author"),
+        subscribers_count=count_of(
+            apps.get_model("users", "Subscriptions"), "author"
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+        ("recipes", "0009_recipe_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="myuser",
+            name="recipes_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Рецептов"
+            ),
+        ),
+        migrations.AddField(
+            model_name="myuser",
+            name="subscribers_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Подписчиков"
+            ),
+        ),
+        migrations.RunPython(fill_user_counters, migrations.RunPython.noop),
+    ]
@@ -7,6 +7,7 @@ AbstractUser из Django для переопределения полей обя
 import unicodedata
 
 from core import texsts
+from core.counters import CounterFieldsMixin
 from core.enums import Limits
 from core.validators import MinLenValidator, OneOfTwoValidator
 from django.contrib.auth.models import AbstractUser
@@ -20,6 +21,7 @@ from django.db.models import (
     F,
     ForeignKey,
     Model,
+    PositiveIntegerField,
     Q,
     UniqueConstraint,
 )
@@ -29,7 +31,7 @@ from django.utils.translation import gettext_lazy as _
 CharField.register_lookup(Length)
 
 
-class MyUser(AbstractUser):
+class MyUser(CounterFieldsMixin, AbstractUser):
     """Настроенная под приложение `Foodgram` модель пользователя.
 
     При создании пользователя все поля обязательны для заполнения.
@@ -57,8 +59,17 @@ class MyUser(AbstractUser):
             Установлено ограничение по максимальной длине.
         is_active (bool):
             Активен или заблокирован пользователь.
+        recipes_count (int):
+            Количество рецептов пользователя.
+        subscribers_count (int):
+            Количество подписчиков пользователя.
     """
 
+    COUNTERS = {
+        "recipes_count": "recipes",
+        "subscribers_count": "subscribers",
+    }
+
     email = EmailField(
         verbose_name="Адрес электронной почты",
         max_length=Limits.MAX_LEN_EMAIL_FIELD.value,
@@ -111,6 +122,16 @@ class MyUser(AbstractUser):
         verbose_name="Активирован",
         default=True,
     )
+    recipes_count = PositiveIntegerField(
+        verbose_name="Рецептов",
+        default=0,
+        editable=False,
+    )
+    subscribers_count = PositiveIntegerField(
+        verbose_name="Подписчиков",
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Пользователь"
@@ -0,0 +1,295 @@
+"""Модуль заранее отрисованных JSON-фрагментов рецептов.
+
+Для каждого рецепта в кэше хранится его представление, не зависящее
+от пользователя: данные автора, тэги, ингредиенты и путь к картинке.
+Ключ фрагмента содержит только версию рецепта: при изменении автора,
+тэгов или ингредиентов рецепта сигналы увеличивают версии рецептов,
+в которые входят изменённые данные, поэтому фрагменты остальных рецептов
+остаются в кэше.
+Отметки пользователя (`is_favorited`, `is_in_shopping_cart`,
+`is_subscribed`) во фрагментах всегда `False` и проставляются при сборке
+ответа. Фрагменты вставляются в тело ответа без разбора JSON, адреса
+картинок и отметки дополняются заменой байтов.
+"""
+from typing import Iterable
+
+from api.renderers import RawJSON
+from api.serializers import RecipeSerializer
+from core.cache import get_versions
+from core.enums import CacheScopes
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import QuerySet
+from recipes.models import Recipe
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+FRAGMENT_KEY = "fragment:recipe:%s:%s"
+
+
+class RecipeFragment(RawJSON):
+    """JSON-фрагмент рецепта.
+
+    Attrs:
+        pk (int): `id` рецепта.
+        author_id (int): `id` автора рецепта.
+        raw (bytes): JSON рецепта.
+    """
+
+    __slots__ = ("pk", "author_id")
+
+    def __init__(self, pk: int, author_id: int, raw: bytes) -> None:
+        super().__init__(raw)
+        self.pk = pk
+        self.author_id = author_id
+
+    def mark(self, *fields: str) -> None:
+        """Проставляет отметкам пользователя значение `true`.
+
+        Args:
+            fields (str): Названия отметок.
+        """
+        for field in fields:
+            self.raw = self.raw.replace(
+                b'"%s":false' % field.encode(),
+                b'"%s":true' % field.encode(),
+                1,
+            )
+
+    def absolutize(self, host: bytes) -> None:
+        """Дополняет пути к картинке и её копиям адресом сервера.
+
+        Ключи JSON сравниваются вместе с кавычками, поэтому совпадения
+        внутри строковых значений (где кавычки экранированы) исключены.
+
+        Args:
+            host (bytes): Схема и адрес сервера без `/` в конце.
+        """
+        raw = self.raw.replace(b'"image":"/', b'"image":"%s/' % host, 1)
+        start = raw.find(b'"renditions":{')
+        if start != -1:
+            end = raw.index(b"}", start)
+            raw = b"".join(
+                (
+                    raw[:start],
+                    raw[start:end].replace(b'":"/', b'":"%s/' % host),
+                    raw[end:],
+                )
+            )
+        self.raw = raw
+
+
+class FragmentId(int):
+    """`id` рецепта, фрагмент которого заменён в кэше ответов."""
+
+
+def fragment_keys(ids: Iterable[int]) -> dict[int, str]:
+    """Ключи кэша фрагментов с текущими версиями рецептов.
+
+    Args:
+        ids (Iterable[int]): `id` рецептов.
+
+    Returns:
+        dict[int, str]: Ключи фрагментов по `id` рецептов.
+    """
+    ids = list(ids)
+    versions = get_versions(*(CacheScopes.RECIPE.value % pk for pk in ids))
+    return {
+        pk: FRAGMENT_KEY % (pk, version) for pk, version in zip(ids, versions)
+    }
+
+
+def render_fragments(recipes: Iterable[Recipe]) -> dict[int, tuple]:
+    """Отрисовывает фрагменты рецептов.
+
+    Сериализатор вызывается без запроса, поэтому картинка представлена
+    путём без адреса сервера, а отметки пользователя равны `False`.
+
+    Args:
+        recipes (Iterable[Recipe]): Рецепты с подгруженными связями.
+
+    Returns:
+        dict[int, tuple]:
+            `id` автора и JSON-фрагмент по `id` рецептов.
+    """
+    renderer = JSONRenderer()
+    return {
+        recipe.pk: (
+            recipe.author_id,
+            renderer.render(RecipeSerializer(recipe).data),
+        )
+        for recipe in recipes
+    }
+
+
+def get_fragments(
+    ids: Iterable[int], queryset: QuerySet[Recipe]
+) -> dict[int, RecipeFragment]:
+    """Получает фрагменты рецептов.
+
+    Найденные в кэше фрагменты берутся одним запросом к кэшу,
+    недостающие отрисовываются по одной выборке из базы данных
+    и сохраняются в кэш.
+
+    Args:
+        ids (Iterable[int]): `id` рецептов.
+        queryset (QuerySet[Recipe]):
+            Queryset для загрузки рецептов со связями.
+
+    Returns:
+        dict[int, RecipeFragment]: Фрагменты по `id` рецептов.
+    """
+    keys = fragment_keys(ids)
+    cached = cache.get_many(keys.values())
+    fragments = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    missing = [pk for pk in keys if pk not in fragments]
+
+    if missing:
+        rendered = render_fragments(queryset.filter(pk__in=missing))
+        cache.set_many({keys[pk]: value for pk, value in rendered.items()})
+        fragments.update(rendered)
+
+    return {
+        pk: RecipeFragment(pk, author_id, raw)
+        for pk, (author_id, raw) in fragments.items()
+    }
+
+
+def assemble(
+    ids: Iterable[int], queryset: QuerySet[Recipe], request: Request
+) -> list[RecipeFragment]:
+    """Собирает данные рецептов из фрагментов.
+
+    Порядок рецептов соответствует порядку `ids`, пути к картинке
+    и её копиям дополняются адресом сервера из запроса.
+
+    Args:
+        ids (Iterable[int]): `id` рецептов.
+        queryset (QuerySet[Recipe]):
+            Queryset для загрузки рецептов со связями.
+        request (Request): Объект запроса.
+
+    Returns:
+        list[RecipeFragment]: Фрагменты рецептов.
+    """
+    ids = list(ids)
+    fragments = get_fragments(ids, queryset)
+    host = request.build_absolute_uri("/")[:-1].encode()
+    recipes = []
+
+    for pk in ids:
+        if pk not in fragments:
+            continue
+        fragments[pk].absolutize(host)
+        recipes.append(fragments[pk])
+
+    return recipes
+
+
+def freeze(data: dict | list | RecipeFragment) -> dict | list | FragmentId:
+    """Заменяет фрагменты в данных ответа на `id` рецептов.
+
+    В кэш ответов попадают только `id`, поэтому ответ из кэша
+    собирается из актуальных фрагментов.
+
+    Args:
+        data (dict | list | RecipeFragment):
+            Рецепт, страница рецептов либо список рецептов.
+
+    Returns:
+        dict | list | FragmentId: Данные для кэша ответов.
+    """
+    if isinstance(data, RecipeFragment):
+        return FragmentId(data.pk)
+    if isinstance(data, list):
+        return [freeze(item) for item in data]
+    if isinstance(data, dict) and "results" in data:
+        return {**data, "results": freeze(data["results"])}
+    return data
+
+
+def thaw(
+    data: dict | list | FragmentId,
+    queryset: QuerySet[Recipe],
+    request: Request,
+) -> dict | list | RecipeFragment | None:
+    """Заменяет `id` рецептов в данных из кэша ответов фрагментами.
+
+    Args:
+        data (dict | list | FragmentId): Данные из кэша ответов.
+        queryset (QuerySet[Recipe]):
+            Queryset для загрузки рецептов со связями.
+        request (Request): Объект запроса.
+
+    Returns:
+        dict | list | RecipeFragment | None:
+            Данные ответа либо None, если рецепта уже нет.
+    """
+    if isinstance(data, dict) and "results" in data:
+        results = thaw(data["results"], queryset, request)
+        return None if results is None else {**data, "results": results}
+
+    items = [data] if isinstance(data, FragmentId) else data
+    if not isinstance(items, list):
+        return data
+
+    ids = [item for item in items if isinstance(item, FragmentId)]
+    if not ids:
+        return data
+
+    fragments = {
+        fragment.pk: fragment
+        for fragment in assemble(ids, queryset, request)
+    }
+    if len(fragments) < len(ids):
+        return None
+
+    items = [
+        fragments[item] if isinstance(item, FragmentId) else item
+        for item in items
+    ]
+    return items[0] if isinstance(data, FragmentId) else items
+
+
+def rebuild_fragments(
+    queryset: QuerySet[Recipe], batch_size: int = 500
+) -> int:
+    """Отрисовывает заново фрагменты всех рецептов.
+
+    Фрагменты имеет смысл отрисовывать заранее только в общем кэше
+    процессов приложения, вмещающем фрагменты всех рецептов.
+
+    Args:
+        queryset (QuerySet[Recipe]):
+            Queryset для загрузки рецептов со связями.
+        batch_size (int): Количество рецептов в одной выборке.
+
+    Raises:
+        ImproperlyConfigured:
+            Кэш не общий для процессов либо не вмещает все фрагменты.
+
+    Returns:
+        int: Количество отрисованных фрагментов.
+    """
+    ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend.endswith(("LocMemCache", "DummyCache")):
+        raise ImproperlyConfigured(
+            f"Кэш {backend} не общий для процессов приложения."
+        )
+    max_entries = getattr(cache, "_max_entries", None)
+    if max_entries is not None and max_entries < len(ids) * 2:
+        raise ImproperlyConfigured(
+            f"Кэш вмещает {max_entries} записей, а фрагментам и версиям "
+            f"рецептов нужно {len(ids) * 2}. Увеличьте CACHE_MAX_ENTRIES."
+        )
+
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start : start + batch_size]
+        keys = fragment_keys(batch)
+        rendered = render_fragments(queryset.filter(pk__in=batch))
+        cache.set_many({keys[pk]: value for pk, value in rendered.items()})
+
+    return len(ids)
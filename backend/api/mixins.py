@@ -1,18 +1,73 @@
 """Модуль содержит дополнительные классы
 для настройки основных классов приложения.
 """
-from django.db.models import Model, Q
+from hashlib import md5
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+from core.cache import count_request, get_versions
+from core.enums import CacheScopes
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model, Q, QuerySet
+from django.db.transaction import atomic
 from django.db.utils import IntegrityError
+from django.http.response import HttpResponseBase, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import (
+    get_conditional_response,
+    patch_vary_headers,
+    quote_etag,
+)
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import ModelSerializer
 from rest_framework.status import (
+    HTTP_200_OK,
     HTTP_201_CREATED,
     HTTP_204_NO_CONTENT,
     HTTP_400_BAD_REQUEST,
 )
 
 
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Разбивает последовательность на списки длиной не больше `size`.
+
+    Args:
+        iterable (Iterable): Исходная последовательность.
+        size (int): Длина списков.
+
+    Yields:
+        list: Очередная часть последовательности.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def request_digest(request: Request, *extra: object) -> str:
+    """Хэш адреса запроса с нормализованными параметрами.
+
+    Параметры запроса сортируются, поэтому `?a=1&b=2` и `?b=2&a=1`
+    получают один хэш.
+
+    Args:
+        request (Request): Объект запроса.
+        extra (object): Дополнительные значения для хэша.
+
+    Returns:
+        str: Хэш запроса.
+    """
+    params = request.query_params
+    query = sorted(
+        (key, value) for key in params for value in params.getlist(key)
+    )
+    raw = f"{request.get_host()}{request.path}{query}{extra}"
+    return md5(raw.encode()).hexdigest()
+
+
 class AddDelViewMixin:
     """
     Добавляет во Viewset дополнительные методы.
@@ -20,6 +75,7 @@ class AddDelViewMixin:
     Содержит методы для добавления или удаления объекта связи
     Many-to-Many между моделями.
     Требует определения атрибутов `add_serializer` и `link_model`.
+    Объект для ответа выбирается из `get_link_queryset`.
 
     Example:
         class ExampleViewSet(ModelViewSet, AddDelViewMixin)
@@ -31,6 +87,14 @@ class AddDelViewMixin:
     add_serializer: ModelSerializer | None = None
     link_model: Model | None = None
 
+    def get_link_queryset(self) -> QuerySet:
+        """Объекты, с которыми создаётся связь.
+
+        Returns:
+            QuerySet: По умолчанию - `queryset` представления.
+        """
+        return self.queryset
+
     def _create_relation(self, obj_id: int | str) -> Response:
         """Добавляет связь M2M между объектами.
 
@@ -41,7 +105,7 @@ class AddDelViewMixin:
         Returns:
             Responce: Статус подтверждающий/отклоняющий действие.
         """
-        obj = get_object_or_404(self.queryset, pk=obj_id)
+        obj = get_object_or_404(self.get_link_queryset(), pk=obj_id)
         try:
             self.link_model(None, obj.pk, self.request.user.pk).save()
         except IntegrityError:
@@ -50,12 +114,18 @@ class AddDelViewMixin:
                 status=HTTP_400_BAD_REQUEST,
             )
 
+        counters = getattr(obj, "COUNTERS", None)
+        if counters:
+            obj.refresh_from_db(fields=list(counters))
         serializer: ModelSerializer = self.add_serializer(obj)
         return Response(serializer.data, status=HTTP_201_CREATED)
 
     def _delete_relation(self, q: Q) -> Response:
         """Удаляет связь M2M между объектами.
 
+        Связь блокируется до удаления, поэтому при одновременных
+        запросах она удаляется и вычитается из счётчиков один раз.
+
         Args:
             q (Q):
                 Условие фильтрации объектов.
@@ -63,15 +133,368 @@ class AddDelViewMixin:
         Returns:
             Responce: Статус подтверждающий/отклоняющий действие.
         """
-        deleted, _ = (
-            self.link_model.objects.filter(q & Q(user=self.request.user))
-            .first()
-            .delete()
-        )
-        if not deleted:
-            return Response(
-                {"error": f"{self.link_model.__name__} не существует"},
-                status=HTTP_400_BAD_REQUEST,
+        with atomic():
+            link = (
+                self.link_model.objects.select_for_update()
+                .filter(q & Q(user=self.request.user))
+                .first()
             )
+            if link is None:
+                return Response(
+                    {"error": f"{self.link_model.__name__} не существует"},
+                    status=HTTP_400_BAD_REQUEST,
+                )
 
+            link.delete()
         return Response(status=HTTP_204_NO_CONTENT)
+
+
+class ResponseCacheMixin:
+    """
+    Кэширует ответы на GET-запросы.
+
+    Кэшируются данные ответов `list` и `retrieve`. Ключ кэша строится
+    из пути, нормализованных параметров запроса и версий разделов данных,
+    которые возвращает метод `get_cache_scopes`. При изменении данных
+    версии увеличиваются сигналами, и устаревшие ответы не используются.
+    Заголовок `X-Cache` показывает, получен ли ответ из кэша.
+
+    По умолчанию кэш используется только для анонимных пользователей.
+    Если ответ отличается для пользователей лишь отдельными отметками,
+    представление может разрешить общий кэш методом `can_use_cache`
+    и проставлять отметки методом `personalize`. Он применяется к каждому
+    ответу из кэша и должен перезаписывать все отметки, так как в кэш
+    попадает ответ, сформированный для любого пользователя.
+    Методы `to_cache` и `from_cache` позволяют хранить в кэше данные
+    ответа в другом виде, например, только `id` объектов. Если данные
+    из кэша уже не восстановить, `from_cache` возвращает None, и ответ
+    формируется заново.
+
+    Example:
+        class ExampleViewSet(ResponseCacheMixin, ModelViewSet)
+            ...
+            def get_cache_scopes(self) -> list[str]:
+                return [CacheScopes.RECIPES.value]
+    """
+
+    cache_name = "responses"
+
+    def get_cache_scopes(self) -> list[str]:
+        raise NotImplementedError("Определите метод `get_cache_scopes`.")
+
+    def can_use_cache(self) -> bool:
+        return self.request.user.is_anonymous
+
+    def personalize(self, data: dict | list) -> dict | list:
+        return data
+
+    def to_cache(self, data: object) -> object:
+        return data
+
+    def from_cache(self, data: object) -> object | None:
+        return data
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        return self._cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        return self._cached(super().retrieve, request, *args, **kwargs)
+
+    def get_response_cache_key(self) -> str:
+        """Строит ключ кэша для ответа на текущий запрос.
+
+        Returns:
+            str: Ключ кэша.
+        """
+        versions = get_versions(*self.get_cache_scopes())
+        digest = request_digest(self.request)
+        return ":".join(map(str, (self.cache_name, digest, *versions)))
+
+    def _cached(
+        self, handler: Callable, request: Request, *args, **kwargs
+    ) -> Response:
+        """Возвращает ответ из кэша либо формирует и кэширует его.
+
+        Args:
+            handler (Callable): Метод, формирующий ответ.
+            request (Request): Объект запроса.
+
+        Returns:
+            Response: Ответ на запрос.
+        """
+        if not self.can_use_cache():
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key()
+        data = cache.get(key)
+        if data is not None:
+            data = self.from_cache(data)
+        count_request(self.cache_name, hit=data is not None)
+
+        if data is not None:
+            response = Response(self.personalize(data))
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = handler(request, *args, **kwargs)
+        # Ответы, отправляемые частями, не кэшируются.
+        if (
+            isinstance(response, Response)
+            and response.status_code == HTTP_200_OK
+        ):
+            cache.set(key, self.to_cache(response.data))
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class StreamingListMixin:
+    """
+    Отправляет большие списки объектов частями.
+
+    Если ответ `list` содержит не меньше `settings.STREAMING_THRESHOLD`
+    объектов и клиент принимает JSON, ответ формируется
+    `StreamingHttpResponse`: объекты сериализуются и кодируются порциями
+    по `stream_chunk_size`, поэтому весь ответ не собирается в памяти.
+    Queryset без разбиения на страницы и без ограничения количества
+    всегда отправляется частями и перебирается через `iterator()`.
+    """
+
+    stream_chunk_size = 100
+
+    def should_stream(self, size: int | None) -> bool:
+        """Нужно ли отправлять список частями.
+
+        Args:
+            size (int | None):
+                Количество объектов либо None, если оно неизвестно.
+
+        Returns:
+            bool: True, если ответ нужно отправить частями.
+        """
+        if not isinstance(self.request.accepted_renderer, JSONRenderer):
+            return False
+
+        return size is None or size >= settings.STREAMING_THRESHOLD
+
+    def stream_list(
+        self, chunks: Iterable[list[dict]], paginated: bool
+    ) -> StreamingHttpResponse:
+        """Формирует ответ, отправляющий список частями.
+
+        Для постраничного вывода список помещается в поле `results`
+        рядом с остальными полями ответа пагинатора.
+
+        Args:
+            chunks (Iterable[list[dict]]): Порции данных объектов.
+            paginated (bool): Выводится ли страница списка.
+
+        Returns:
+            StreamingHttpResponse: Ответ на запрос.
+        """
+        renderer = self.request.accepted_renderer
+        head, tail = b"[", b"]"
+
+        if paginated:
+            data = self.get_paginated_response([]).data
+            data.pop("results")
+            head = renderer.render(data)[:-1]
+            head += b',"results":[' if data else b'"results":['
+            tail = b"]}"
+
+        def content() -> Iterator[bytes]:
+            yield head
+            separator = b""
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                yield separator + b",".join(map(renderer.render, chunk))
+                separator = b","
+            yield tail
+
+        return StreamingHttpResponse(
+            content(), content_type=renderer.media_type
+        )
+
+    def list(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+
+        if page is not None:
+            objects, size = page, len(page)
+        elif isinstance(queryset, QuerySet) and not queryset.query.is_sliced:
+            objects = queryset.iterator(chunk_size=self.stream_chunk_size)
+            size = None
+        else:
+            objects, size = queryset, len(queryset)
+
+        if self.should_stream(size):
+            chunks = (
+                self.get_serializer(batch, many=True).data
+                for batch in batched(objects, self.stream_chunk_size)
+            )
+            return self.stream_list(chunks, paginated=page is not None)
+
+        if page is None:
+            return Response(self.get_serializer(queryset, many=True).data)
+        data = self.get_serializer(page, many=True).data
+        return self.get_paginated_response(data)
+
+
+class FragmentMixin(StreamingListMixin):
+    """
+    Собирает ответы `list` и `retrieve` из заранее отрисованных фрагментов.
+
+    Выборка, фильтрация и пагинация выполняются только по `id` объектов,
+    без загрузки связанных данных. Данные объектов собирает из фрагментов
+    метод `assemble_fragments`, после чего отметки пользователя
+    проставляет метод `personalize`. Если метод `use_fragments` возвращает
+    False, ответ формируется сериализатором.
+
+    Example:
+        class ExampleViewSet(FragmentMixin, ModelViewSet)
+            ...
+            def assemble_fragments(self, ids: list[int]) -> list:
+                return assemble(ids, self.queryset, self.request)
+    """
+
+    def assemble_fragments(self, ids: list[int]) -> list:
+        raise NotImplementedError("Определите метод `assemble_fragments`.")
+
+    def personalize(self, data: dict | list) -> dict | list:
+        return data
+
+    def use_fragments(self) -> bool:
+        return True
+
+    def get_ids_queryset(self) -> QuerySet:
+        """Queryset текущего запроса, загружающий только `id` объектов.
+
+        Returns:
+            QuerySet: Отфильтрованный queryset без связанных данных.
+        """
+        return (
+            self.filter_queryset(self.get_queryset())
+            .select_related(None)
+            .prefetch_related(None)
+            .only("pk")
+        )
+
+    def list(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        if not self.use_fragments():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.get_ids_queryset()
+        page = self.paginate_queryset(queryset)
+        ids = [obj.pk for obj in (queryset if page is None else page)]
+
+        if self.should_stream(len(ids)):
+            chunks = (
+                self.personalize(self.assemble_fragments(batch))
+                for batch in batched(ids, self.stream_chunk_size)
+            )
+            return self.stream_list(chunks, paginated=page is not None)
+
+        data = self.assemble_fragments(ids)
+        if page is None:
+            return Response(self.personalize(data))
+
+        response = self.get_paginated_response(data)
+        response.data = self.personalize(response.data)
+        return response
+
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        if not self.use_fragments():
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        obj = get_object_or_404(
+            self.get_ids_queryset(),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+        )
+        self.check_object_permissions(request, obj)
+        data = self.assemble_fragments([obj.pk])
+        return Response(self.personalize(data[0]))
+
+
+class ConditionalGetMixin:
+    """
+    Поддерживает условные GET-запросы для `list` и `retrieve`.
+
+    Валидаторы ответа строятся по версиям разделов данных из метода
+    `get_cache_scopes`, а не по содержимому ответа, поэтому ответ
+    `304 Not Modified` отдаётся без выборки и сериализации объектов.
+    Для авторизованного пользователя учитывается и версия его списков
+    связей, так как ответ может содержать его отметки. Если ответ зависит
+    от разделов, не нужных кэшу ответов, их добавляет метод
+    `get_validator_scopes`.
+
+    Заголовки ответа:
+        ETag: Хэш адреса запроса, формата ответа, пользователя и версий.
+        Last-Modified: Время последнего изменения разделов данных.
+
+    Example:
+        class ExampleViewSet(ConditionalGetMixin, ModelViewSet)
+            ...
+            def get_cache_scopes(self) -> list[str]:
+                return [CacheScopes.TAGS.value]
+    """
+
+    def get_cache_scopes(self) -> list[str]:
+        raise NotImplementedError("Определите метод `get_cache_scopes`.")
+
+    def get_validator_scopes(self) -> list[str]:
+        return self.get_cache_scopes()
+
+    def list(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+    def get_validators(self) -> tuple[str, int]:
+        """Вычисляет валидаторы ответа на текущий запрос.
+
+        Returns:
+            tuple[str, int]:
+                ETag и время последнего изменения (Unix-время в секундах).
+        """
+        user = self.request.user
+        scopes = self.get_validator_scopes()
+        if user.is_authenticated:
+            scopes = [*scopes, CacheScopes.USER.value % user.pk]
+
+        versions = get_versions(*scopes)
+        etag = request_digest(
+            self.request,
+            self.request.accepted_media_type,
+            user.pk,
+            versions,
+        )
+        return quote_etag(etag), max(versions) // 10**6
+
+    def _conditional(
+        self, handler: Callable, request: Request, *args, **kwargs
+    ) -> HttpResponseBase:
+        """Отвечает `304 Not Modified`, если данные клиента актуальны.
+
+        Args:
+            handler (Callable): Метод, формирующий ответ.
+            request (Request): Объект запроса.
+
+        Returns:
+            HttpResponseBase: Ответ на запрос.
+        """
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != HTTP_200_OK:
+                return response
+
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        patch_vary_headers(response, ("Authorization",))
+        return response
@@ -0,0 +1,16 @@
+"""Модуль выбора формата ответов API."""
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer
+
+
+class FileFormatNegotiation(DefaultContentNegotiation):
+    """Выбирает рендерер без учёта параметра `format`.
+
+    В выгрузках файлов параметр `format` задаёт формат файла, а не формат
+    ответа API, поэтому рендерер выбирается только по заголовку `Accept`.
+    """
+
+    def filter_renderers(
+        self, renderers: list[BaseRenderer], format: str
+    ) -> list[BaseRenderer]:
+        return renderers
@@ -1,9 +1,93 @@
-from rest_framework.pagination import PageNumberPagination
+from core.enums import Limits, UrlQueries
+from core.paginators import CountCachePaginator
+from django.db.models import QuerySet
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 
 class PageLimitPagination(PageNumberPagination):
     """Стандартный пагинатор с определением атрибута
     `page_size_query_param`, для вывода запрошенного количества страниц.
+
+    Количество объектов считается `CountCachePaginator`. Ключ кэша для
+    него предоставляет метод `get_count_key` представления, если он есть.
+    В ответ добавляется поле `count_exact` - точное ли значение `count`.
     """
 
     page_size_query_param = "limit"
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view: APIView = None
+    ) -> list | None:
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(
+        self, object_list: QuerySet, per_page: int
+    ) -> CountCachePaginator:
+        get_count_key = getattr(self.view, "get_count_key", None)
+        return CountCachePaginator(
+            object_list,
+            per_page,
+            count_key=get_count_key() if get_count_key else None,
+        )
+
+    def get_paginated_response(self, data: list) -> Response:
+        response = super().get_paginated_response(data)
+        response.data["count_exact"] = self.page.paginator.count_exact
+        return response
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Пагинатор рецептов по курсору.
+
+    Вместо `OFFSET` следующая страница выбирается условием по позиции
+    последнего выведенного рецепта, поэтому время ответа не зависит от
+    глубины просмотра. Порядок `(pub_date, id)` по убыванию совпадает
+    с индексом `recipe_pub_date_id_idx` модели Recipe.
+    """
+
+    ordering = ("-pub_date", "-id")
+    cursor_query_param = UrlQueries.CURSOR.value
+    page_size = Limits.PAGE_SIZE.value
+    page_size_query_param = "limit"
+    max_page_size = Limits.MAX_PAGE_SIZE.value
+
+
+class RecipePagination(PageLimitPagination):
+    """Пагинатор рецептов с выбором способа разбиения на страницы.
+
+    По умолчанию работает как `PageLimitPagination` (`page` и `limit`).
+    При передаче `pagination=cursor` или курсора `cursor` вывод
+    передаётся `RecipeCursorPagination`.
+
+    Example:
+        /api/recipes/?pagination=cursor&limit=6
+    """
+
+    cursor_pagination_class = RecipeCursorPagination
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view: APIView = None
+    ) -> list | None:
+        self.cursor_paginator = None
+        params = request.query_params
+
+        if (
+            UrlQueries.CURSOR.value in params
+            or params.get(UrlQueries.PAGINATION.value) == "cursor"
+        ):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data: list) -> Response:
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
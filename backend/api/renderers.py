@@ -0,0 +1,118 @@
+"""Модуль рендереров ответов API.
+
+`ORJSONRenderer` формирует JSON библиотекой `orjson`, которая в разы
+быстрее стандартного модуля `json`. `MessagePackRenderer` отдаёт ответ
+в формате MessagePack для клиентов, запросивших его заголовком
+`Accept: application/msgpack`.
+Без установленных библиотек `ORJSONRenderer` работает как стандартный
+рендерер DRF, а `MessagePackRenderer` не подключается в настройках.
+Готовый JSON в `RawJSON` (например, кэшированные фрагменты рецептов)
+`ORJSONRenderer` вставляет в ответ как есть, остальные рендереры
+разбирают его.
+"""
+import json
+from itertools import chain
+from secrets import token_hex
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class RawJSON:
+    """Готовый JSON, вставляемый в ответ без повторного кодирования.
+
+    Attrs:
+        raw (bytes): JSON-значение.
+    """
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: bytes) -> None:
+        self.raw = raw
+
+
+class RawJSONEncoder(JSONEncoder):
+    """Кодировщик DRF, разбирающий `RawJSON`."""
+
+    def default(self, obj: object) -> object:
+        if isinstance(obj, RawJSON):
+            return json.loads(obj.raw)
+        return super().default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Рендерер JSON на основе `orjson`.
+
+    Значения, которые `orjson` не умеет кодировать (ленивые строки
+    переводов, `Decimal`, даты), передаются кодировщику DRF.
+    Вместо `RawJSON` `orjson` выводит строку-метку, по которой готовый
+    JSON затем вставляется в результат.
+    """
+
+    encoder_class = RawJSONEncoder
+    # Метка уникальна для процесса и не совпадёт с данными ответа.
+    raw_marker = f"raw-json:{token_hex(16)}"
+
+    def render(
+        self,
+        data: object,
+        accepted_media_type: str | None = None,
+        renderer_context: dict | None = None,
+    ) -> bytes:
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b""
+
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+
+        encoder = self.encoder_class()
+        raws = []
+
+        def default(obj: object) -> object:
+            if isinstance(obj, RawJSON):
+                raws.append(obj.raw)
+                return self.raw_marker
+            return encoder.default(obj)
+
+        content = orjson.dumps(data, default=default, option=option)
+        if not raws:
+            return content
+
+        parts = content.split(b'"%s"' % self.raw_marker.encode())
+        return b"".join(chain(*zip(parts, raws), parts[-1:]))
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Рендерер MessagePack."""
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(
+        self,
+        data: object,
+        accepted_media_type: str | None = None,
+        renderer_context: dict | None = None,
+    ) -> bytes:
+        if data is None:
+            return b""
+
+        return msgpack.packb(
+            data, default=RawJSONEncoder().default
+        )
@@ -1,28 +1,91 @@
+import json
 from collections import OrderedDict
 
-from core.services import recipe_ingredients_set
+from core.enums import Limits
+from core.membership import IdSet
+from core.services import (
+    get_tag_registry,
+    get_user_membership,
+    recipe_ingredients_set,
+)
+from core.uploads import TOO_LARGE_MESSAGE
 from core.validators import ingredients_validator, tags_exist_validator
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db.models import F, QuerySet
+from django.core.files.uploadedfile import UploadedFile
 from django.db.transaction import atomic
+from django.http import QueryDict
+from django.urls import reverse
 from drf_extra_fields.fields import Base64ImageField
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeImage,
+    ShoppingListJob,
+    Tag,
+)
+from rest_framework.fields import ImageField
+from rest_framework.request import Request
 from rest_framework.serializers import ModelSerializer, SerializerMethodField
 
 User = get_user_model()
 
 
+def recipe_renditions(
+    recipe: Recipe, request: Request | None
+) -> dict[str, str] | None:
+    """Адреса уменьшенных копий изображения рецепта.
+
+    Args:
+        recipe (Recipe): Рецепт.
+        request (Request | None): Запрос для полных адресов файлов.
+
+    Returns:
+        dict[str, str] | None:
+            Адреса копий по названиям и заглушка `placeholder`
+            либо None, если копии ещё не созданы.
+    """
+    try:
+        renditions = recipe.renditions
+    except RecipeImage.DoesNotExist:
+        return None
+
+    if renditions.status != RecipeImage.Status.DONE:
+        return None
+
+    storage = recipe._meta.get_field("image").storage
+    urls = {name: storage.url(path) for name, path in renditions.files.items()}
+    if request is not None:
+        urls = {
+            name: request.build_absolute_uri(url) for name, url in urls.items()
+        }
+    urls["placeholder"] = renditions.placeholder
+    return urls
+
+
 class ShortRecipeSerializer(ModelSerializer):
     """Сериализатор для модели Recipe.
     Определён укороченный набор полей для некоторых эндпоинтов.
     """
 
+    renditions = SerializerMethodField()
+
     class Meta:
         model = Recipe
-        fields = "id", "name", "image", "cooking_time"
+        fields = (
+            "id",
+            "name",
+            "image",
+            "cooking_time",
+            "favorites_count",
+            "carts_count",
+            "renditions",
+        )
         read_only_fields = ("__all__",)
 
+    def get_renditions(self, recipe: Recipe) -> dict[str, str] | None:
+        return recipe_renditions(recipe, self.context.get("request"))
+
 
 class UserSerializer(ModelSerializer):
     """Сериализатор для использования с моделью User."""
@@ -55,12 +118,41 @@ class UserSerializer(ModelSerializer):
         Returns:
             bool: True, если подписка есть. Во всех остальных случаях False.
         """
-        user = self.context.get("request").user
+        request = self.context.get("request")
+
+        if request is None:
+            return False
+
+        user = request.user
 
         if user.is_anonymous or (user == obj):
             return False
 
-        return user.subscriptions.filter(author=obj).exists()
+        return obj.pk in self.get_subscriptions(request)
+
+    @staticmethod
+    def get_subscriptions(request: Request) -> IdSet:
+        """Получает `id` авторов, на которых подписан пользователь.
+
+        Множество берётся из кэшированных списков связей пользователя
+        и сохраняется в объекте запроса, поэтому его используют все
+        сериализаторы пользователей в ответе, в том числе вложенные поля
+        `author` в рецептах.
+
+        Args:
+            request (Request): Объект запроса авторизованного пользователя.
+
+        Returns:
+            IdSet: Множество `id` авторов.
+        """
+        subscriptions = getattr(request, "_subscriptions", None)
+
+        if subscriptions is None:
+            membership = get_user_membership(request.user.pk)
+            subscriptions = membership["subscriptions"]
+            request._subscriptions = subscriptions
+
+        return subscriptions
 
     def create(self, validated_data: dict) -> User:
         """Создаёт нового пользователя с запрошенными полями.
@@ -85,8 +177,7 @@ class UserSerializer(ModelSerializer):
 class UserSubscribeSerializer(UserSerializer):
     """Сериализатор вывода авторов на которых подписан текущий пользователь."""
 
-    recipes = ShortRecipeSerializer(many=True, read_only=True)
-    recipes_count = SerializerMethodField()
+    recipes = SerializerMethodField()
 
     class Meta:
         model = User
@@ -99,6 +190,7 @@ class UserSubscribeSerializer(UserSerializer):
             "is_subscribed",
             "recipes",
             "recipes_count",
+            "subscribers_count",
         )
         read_only_fields = ("__all__",)
 
@@ -113,16 +205,23 @@ class UserSubscribeSerializer(UserSerializer):
         """
         return True
 
-    def get_recipes_count(self, obj: User) -> int:
-        """Показывает общее количество рецептов у каждого автора.
+    def get_recipes(self, obj: User) -> list[OrderedDict]:
+        """Рецепты автора.
+
+        Берутся из предзагруженного списка `recent_recipes`, если он есть.
 
         Args:
             obj (User): Запрошенный пользователь.
 
         Returns:
-            int: Количество рецептов созданных запрошенным пользователем.
+            list[OrderedDict]: Рецепты в укороченном виде.
         """
-        return obj.recipes.count()
+        recipes = getattr(obj, "recent_recipes", None)
+        if recipes is None:
+            recipes = obj.recipes.all()
+        return ShortRecipeSerializer(
+            recipes, many=True, context=self.context
+        ).data
 
 
 class TagSerializer(ModelSerializer):
@@ -157,15 +256,44 @@ class IngredientSerializer(ModelSerializer):
         read_only_fields = ("__all__",)
 
 
+class RecipeImageField(Base64ImageField):
+    """Изображение рецепта строкой base64 или файлом.
+
+    Файл из `multipart/form-data` уже записан во временный файл
+    и проверен `core.uploads.ImageUploadHandler`. Строка base64 длиннее
+    изображения `Limits.MAX_IMAGE_SIZE` отклоняется до декодирования.
+    """
+
+    ALLOWED_TYPES = (*Base64ImageField.ALLOWED_TYPES, "webp")
+    # Длина base64 изображения наибольшего размера с заголовком `data:`
+    MAX_BASE64_LENGTH = (Limits.MAX_IMAGE_SIZE + 2) // 3 * 4 + 64
+
+    def to_internal_value(self, data: str | UploadedFile) -> UploadedFile:
+        if isinstance(data, UploadedFile):
+            error = getattr(data, "upload_error", None)
+            if error is not None:
+                raise ValidationError(error)
+            return ImageField.to_internal_value(self, data)
+
+        if isinstance(data, str) and len(data) > self.MAX_BASE64_LENGTH:
+            raise ValidationError(TOO_LARGE_MESSAGE)
+
+        return super().to_internal_value(data)
+
+
 class RecipeSerializer(ModelSerializer):
-    """Сериализатор для рецептов."""
+    """Сериализатор для рецептов.
+
+    Может выводить только часть полей, переданных аргументом `fields`.
+    """
 
-    tags = TagSerializer(many=True, read_only=True)
+    tags = SerializerMethodField()
     author = UserSerializer(read_only=True)
     ingredients = SerializerMethodField()
     is_favorited = SerializerMethodField()
     is_in_shopping_cart = SerializerMethodField()
-    image = Base64ImageField()
+    image = RecipeImageField()
+    renditions = SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -178,6 +306,7 @@ class RecipeSerializer(ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "renditions",
             "text",
             "cooking_time",
         )
@@ -186,23 +315,87 @@ class RecipeSerializer(ModelSerializer):
             "is_shopping_cart",
         )
 
-    def get_ingredients(self, recipe: Recipe) -> QuerySet[dict]:
+    def __init__(self, *args, fields: set[str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+    def get_tags(self, recipe: Recipe) -> list[dict]:
+        """Получает список тэгов рецепта.
+
+        Данные тэгов берутся из реестра тэгов, из базы данных нужны
+        только `id` тэгов рецепта. Они подгружаются пакетно через
+        `prefetch_related` в `RecipeViewSet`, для рецепта без предзагрузки
+        выполняется один запрос.
+
+        Args:
+            recipe (Recipe): Запрошенный рецепт.
+
+        Returns:
+            list[dict]: Список тэгов рецепта.
+        """
+        prefetched = getattr(recipe, "_prefetched_objects_cache", {})
+        if "tags" in prefetched:
+            ids = (tag.pk for tag in recipe.tags.all())
+        else:
+            ids = recipe.tags.values_list("pk", flat=True)
+
+        return TagSerializer(get_tag_registry().get_many(ids), many=True).data
+
+    def get_ingredients(self, recipe: Recipe) -> list[dict]:
         """Получает список ингридиентов для рецепта.
 
+        Строки `AmountIngredient` вместе с ингридиентами подгружаются
+        пакетно через `prefetch_related` в `RecipeViewSet`, поэтому
+        формирование списка не обращается к базе данных. Для рецепта
+        без предзагрузки (например, только что созданного) выполняется
+        один запрос.
+
         Args:
             recipe (Recipe): Запрошенный рецепт.
 
         Returns:
-            QuerySet[dict]: Список ингридиентов в рецепте.
+            list[dict]: Список ингридиентов в рецепте.
         """
-        ingredients = recipe.ingredients.values(
-            "id", "name", "measurement_unit", amount=F("recipe__amount")
-        )
-        return ingredients
+        prefetched = getattr(recipe, "_prefetched_objects_cache", {})
+        links = recipe.ingredient.all()
+        if "ingredient" not in prefetched:
+            links = links.select_related("ingredients").order_by(
+                "ingredients__name"
+            )
+
+        return [
+            {
+                "id": link.ingredients.id,
+                "name": link.ingredients.name,
+                "measurement_unit": link.ingredients.measurement_unit,
+                "amount": link.amount,
+            }
+            for link in links
+        ]
+
+    def get_renditions(self, recipe: Recipe) -> dict[str, str] | None:
+        """Получает адреса уменьшенных копий изображения рецепта.
+
+        Копии подгружаются через `select_related` в `RecipeViewSet`.
+
+        Args:
+            recipe (Recipe): Запрошенный рецепт.
+
+        Returns:
+            dict[str, str] | None: Адреса копий либо None.
+        """
+        return recipe_renditions(recipe, self.context.get("request"))
 
     def get_is_favorited(self, recipe: Recipe) -> bool:
         """Проверка - находится ли рецепт в избранном.
 
+        Значение заранее вычисляется для всей выборки аннотацией
+        в `RecipeViewSet.get_queryset`. Только что созданный рецепт
+        не имеет аннотации и ещё не может находиться в избранном.
+
         Args:
             recipe (Recipe): Переданный для проверки рецепт.
 
@@ -210,16 +403,14 @@ class RecipeSerializer(ModelSerializer):
             bool: True - если рецепт в `избранном`
             у запращивающего пользователя, иначе - False.
         """
-        user = self.context.get("view").request.user
-
-        if user.is_anonymous:
-            return False
-
-        return user.favorites.filter(recipe=recipe).exists()
+        return getattr(recipe, "is_favorited", False)
 
     def get_is_in_shopping_cart(self, recipe: Recipe) -> bool:
         """Проверка - находится ли рецепт в списке  покупок.
 
+        Значение заранее вычисляется для всей выборки аннотацией
+        в `RecipeViewSet.get_queryset`.
+
         Args:
             recipe (Recipe): Переданный для проверки рецепт.
 
@@ -227,12 +418,36 @@ class RecipeSerializer(ModelSerializer):
             bool: True - если рецепт в `списке покупок`
             у запращивающего пользователя, иначе - False.
         """
-        user = self.context.get("view").request.user
+        return getattr(recipe, "is_in_shopping_cart", False)
 
-        if user.is_anonymous:
-            return False
+    def get_relations_data(self) -> tuple[list, list]:
+        """Получает из запроса тэги и ингридиенты рецепта.
+
+        В `multipart/form-data` тэги передаются повторяющимся полем `tags`,
+        а ингридиенты - списком в формате JSON в поле `ingredients`.
+
+        Raises:
+            ValidationError: Ингридиенты не в формате JSON.
+
+        Returns:
+            tuple[list, list]: `id` тэгов и ингридиенты.
+        """
+        if not isinstance(self.initial_data, QueryDict):
+            return (
+                self.initial_data.get("tags"),
+                self.initial_data.get("ingredients"),
+            )
+
+        ingredients = self.initial_data.get("ingredients")
+        if ingredients:
+            try:
+                ingredients = json.loads(ingredients)
+            except ValueError:
+                raise ValidationError("Неправильные ингидиенты")
+            if not isinstance(ingredients, list):
+                raise ValidationError("Неправильные ингидиенты")
 
-        return user.carts.filter(recipe=recipe).exists()
+        return self.initial_data.getlist("tags"), ingredients
 
     def validate(self, data: OrderedDict) -> OrderedDict:
         """Проверка вводных данных при создании/редактировании рецепта.
@@ -246,13 +461,12 @@ class RecipeSerializer(ModelSerializer):
         Returns:
             data (dict): Проверенные данные.
         """
-        tags_ids: list[int] = self.initial_data.get("tags")
-        ingredients = self.initial_data.get("ingredients")
+        tags_ids, ingredients = self.get_relations_data()
 
         if not tags_ids or not ingredients:
             raise ValidationError("Недостаточно данных.")
 
-        tags = tags_exist_validator(tags_ids, Tag)
+        tags = tags_exist_validator(tags_ids, get_tag_registry().by_id)
         ingredients = ingredients_validator(ingredients, Ingredient)
 
         data.update(
@@ -309,3 +523,23 @@ class RecipeSerializer(ModelSerializer):
 
         recipe.save()
         return recipe
+
+
+class ShoppingListJobSerializer(ModelSerializer):
+    """Сериализатор заданий на формирование списка покупок.
+
+    Поле `url` - адрес, по которому узнаётся состояние задания
+    и загружается готовый файл.
+    """
+
+    url = SerializerMethodField()
+
+    class Meta:
+        model = ShoppingListJob
+        fields = ("id", "status", "url")
+        read_only_fields = ("__all__",)
+
+    def get_url(self, job: ShoppingListJob) -> str:
+        url = reverse("api:recipes-shopping-list-job", args=(job.pk,))
+        request: Request = self.context.get("request")
+        return url if request is None else request.build_absolute_uri(url)
@@ -0,0 +1,133 @@
+"""Модуль готовых ответов для редко меняющихся данных.
+
+Снимок содержит закодированное тело ответа и его сжатые варианты
+(gzip и, при установленной библиотеке `brotli`, br). Снимок строится
+один раз на версию раздела данных и хранится в памяти процесса,
+поэтому запросы обслуживаются без выборки, сериализации и сжатия.
+"""
+import gzip
+from hashlib import md5
+from typing import Callable
+
+from core.cache import get_versions
+from core.enums import Limits
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Снимки текущего процесса по названиям
+_snapshots: dict[str, "Snapshot"] = {}
+
+
+class Snapshot:
+    """Закодированный и сжатый ответ.
+
+    ETag строгий: он вычисляется по содержимому и различается
+    для вариантов сжатия.
+
+    Attrs:
+        version (int): Версия данных, по которым построен снимок.
+        digest (str): Хэш несжатого тела ответа.
+        bodies (dict[str, bytes]): Тела ответа по способам сжатия.
+        content_type (str): Тип содержимого ответа.
+    """
+
+    __slots__ = ("version", "digest", "bodies", "content_type")
+
+    def __init__(self, body: bytes, version: int, content_type: str) -> None:
+        self.version = version
+        self.digest = md5(body).hexdigest()
+        self.content_type = content_type
+        self.bodies = {
+            "identity": body,
+            "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+        }
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(body)
+
+    def choose_encoding(self, accept_encoding: str) -> str:
+        """Выбирает способ сжатия по заголовку `Accept-Encoding`.
+
+        Args:
+            accept_encoding (str): Значение заголовка.
+
+        Returns:
+            str: Способ сжатия: `br`, `gzip` или `identity`.
+        """
+        accepted = set()
+        for item in accept_encoding.split(","):
+            coding, _, params = item.strip().partition(";")
+            quality = params.strip().removeprefix("q=")
+            if quality and quality.strip("0.") == "":
+                continue
+            accepted.add(coding.strip().lower())
+
+        for coding in ("br", "gzip"):
+            if coding in self.bodies and (
+                coding in accepted or "*" in accepted
+            ):
+                return coding
+        return "identity"
+
+    def response(self, request: HttpRequest) -> HttpResponse:
+        """Формирует ответ на запрос из снимка.
+
+        Если данные клиента актуальны, возвращается `304 Not Modified`.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            HttpResponse: Ответ на запрос.
+        """
+        encoding = self.choose_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        etag = (
+            f'"{self.digest}"'
+            if encoding == "identity"
+            else f'"{self.digest}-{encoding}"'
+        )
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                self.bodies[encoding], content_type=self.content_type
+            )
+            if encoding != "identity":
+                response["Content-Encoding"] = encoding
+
+        response["ETag"] = etag
+        response["Cache-Control"] = (
+            f"public, max-age={Limits.SNAPSHOT_MAX_AGE.value}"
+        )
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+
+def get_snapshot(
+    name: str, scope: str, content_type: str, build: Callable[[], bytes]
+) -> Snapshot:
+    """Получает снимок, построенный по текущей версии данных.
+
+    Args:
+        name (str): Название снимка.
+        scope (str): Раздел данных, по версии которого строится снимок.
+        content_type (str): Тип содержимого ответа.
+        build (Callable[[], bytes]): Функция, формирующая тело ответа.
+
+    Returns:
+        Snapshot: Снимок.
+    """
+    version = get_versions(scope)[0]
+    snapshot = _snapshots.get(name)
+
+    if snapshot is None or snapshot.version != version:
+        snapshot = Snapshot(build(), version, content_type)
+        _snapshots[name] = snapshot
+
+    return snapshot
@@ -0,0 +1,558 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock, skipIf
+
+from api import snapshots
+from api.fragments import fragment_keys
+from api.serializers import RecipeSerializer
+from core.paginators import CountCachePaginator
+from core.recipe_images import (
+    claim_image,
+    get_storage,
+    render_renditions,
+    run_image,
+)
+from core.shopping_lists import claim_job, requeue_jobs, run_job
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from recipes.models import (
+    AmountIngredient,
+    Carts,
+    Favorites,
+    Ingredient,
+    Recipe,
+    RecipeImage,
+    ShoppingListJob,
+    Tag,
+)
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from users.models import MyUser, Subscriptions
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+MEDIA_ROOT = TemporaryDirectory()
+
+
+def make_image() -> ContentFile:
+    buffer = BytesIO()
+    Image.new("RGB", (10, 10)).save(buffer, "JPEG")
+    return ContentFile(buffer.getvalue(), name="recipe.jpg")
+
+
+@override_settings(CACHES=LOCMEM_CACHES, MEDIA_ROOT=MEDIA_ROOT.name)
+class RecipeAPITestCase(TestCase):
+    """Рецепты двух авторов с тэгами и ингредиентами.
+
+    Кэш очищается перед каждым тестом.
+    """
+
+    RECIPES_URL = "/api/recipes/?limit=6"
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.authors = [
+            MyUser.objects.create_user(
+                username=f"author{i}",
+                email=f"author{i}@example.com",
+                password="Pass12345!",
+                first_name="Автор",
+                last_name="Рецептов",
+            )
+            for i in range(2)
+        ]
+        cls.tags = [
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in (
+                ("Завтрак", "#E26C2D", "breakfast"),
+                ("Обед", "#49B64E", "lunch"),
+            )
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit="г")
+            for name in ("Соль", "Сахар", "Мука")
+        ]
+
+        for i in range(4):
+            recipe = Recipe.objects.create(
+                name=f"Рецепт {i}",
+                author=cls.authors[i % 2],
+                image=make_image(),
+                text="Описание",
+                cooking_time=10,
+            )
+            recipe.tags.set(cls.tags)
+            AmountIngredient.objects.bulk_create(
+                AmountIngredient(
+                    recipe=recipe, ingredients=ingredient, amount=5
+                )
+                for ingredient in cls.ingredients
+            )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+
+
+class UserMarksTest(RecipeAPITestCase):
+    def test_marks_and_filters(self) -> None:
+        user = self.authors[0]
+        favorite, in_cart = Recipe.objects.all()[:2]
+        Favorites.objects.create(user=user, recipe=favorite)
+        Carts.objects.create(user=user, recipe=in_cart)
+        self.client.force_authenticate(user)
+
+        cases = (
+            ("is_favorited", favorite),
+            ("is_in_shopping_cart", in_cart),
+        )
+        for mark, recipe in cases:
+            with self.subTest(mark=mark):
+                response = self.client.get(f"{self.RECIPES_URL}&{mark}=1")
+                (marked,) = response.json()["results"]
+                self.assertEqual(marked["id"], recipe.pk)
+                self.assertTrue(marked[mark])
+
+                response = self.client.get(f"{self.RECIPES_URL}&{mark}=0")
+                results = response.json()["results"]
+                self.assertEqual(len(results), 3)
+                self.assertNotIn(recipe.pk, {r["id"] for r in results})
+                self.assertFalse(any(r[mark] for r in results))
+
+
+class MembershipTest(RecipeAPITestCase):
+    def test_cached_page_personalized(self) -> None:
+        user, author = self.authors
+        recipe = Recipe.objects.filter(author=author).first()
+        self.client.get(self.RECIPES_URL)
+        self.client.force_authenticate(user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/recipes/{recipe.pk}/favorite/")
+            self.client.post(f"/api/users/{author.pk}/subscribe/")
+        response = self.client.get(self.RECIPES_URL)
+
+        self.assertEqual(response["X-Cache"], "HIT")
+        for item in response.json()["results"]:
+            self.assertEqual(item["is_favorited"], item["id"] == recipe.pk)
+            self.assertEqual(
+                item["author"]["is_subscribed"],
+                item["author"]["id"] == author.pk,
+            )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/recipes/{recipe.pk}/favorite/")
+        response = self.client.get(self.RECIPES_URL)
+
+        self.assertFalse(
+            any(item["is_favorited"] for item in response.json()["results"])
+        )
+
+    def test_marks_follow_changes_outside_api(self) -> None:
+        user, author = self.authors
+        recipe = Recipe.objects.filter(author=author).first()
+        self.client.force_authenticate(user)
+        self.client.get(self.RECIPES_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorites.objects.create(user=user, recipe=recipe)
+            Subscriptions.objects.create(user=user, author=author)
+        response = self.client.get(f"{self.RECIPES_URL}&is_favorited=1")
+
+        (favorite,) = response.json()["results"]
+        self.assertEqual(favorite["id"], recipe.pk)
+        self.assertTrue(favorite["is_favorited"])
+        self.assertTrue(favorite["author"]["is_subscribed"])
+
+        deleted_author = author.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+            author.delete()
+        response = self.client.get(self.RECIPES_URL)
+
+        for recipe in response.json()["results"]:
+            self.assertFalse(recipe["is_favorited"])
+            if recipe["author"] is None:
+                continue
+            self.assertNotEqual(recipe["author"]["id"], deleted_author)
+            self.assertFalse(recipe["author"]["is_subscribed"])
+
+
+class InexactCountTest(RecipeAPITestCase):
+    # Два тэга в фильтре: количество не кэшируется и считается с пределом.
+    URL = "/api/recipes/?tags=breakfast&tags=lunch&limit=1&page=%s"
+
+    @mock.patch.object(CountCachePaginator, "max_exact_count", 2)
+    def test_pages_past_count_limit(self) -> None:
+        for page, has_next in ((3, True), (4, False)):
+            with self.subTest(page=page):
+                response = self.client.get(self.URL % page)
+
+                self.assertEqual(response.status_code, 200)
+                data = response.json()
+                self.assertEqual(data["count"], 2)
+                self.assertFalse(data["count_exact"])
+                self.assertEqual(len(data["results"]), 1)
+                self.assertEqual(data["next"] is not None, has_next)
+
+        response = self.client.get(self.URL % 5)
+        self.assertEqual(response.status_code, 404)
+
+
+class FragmentTest(RecipeAPITestCase):
+    def test_fragments_match_serializer(self) -> None:
+        user, author = self.authors
+        favorite = Recipe.objects.filter(author=author).first()
+        Favorites.objects.create(user=user, recipe=favorite)
+        Subscriptions.objects.create(user=user, author=author)
+        self.client.force_authenticate(user)
+
+        request = Request(APIRequestFactory().get("/"))
+        request.user = user
+        recipes = list(Recipe.objects.all())
+        for recipe in recipes:
+            recipe.is_favorited = recipe.pk == favorite.pk
+            recipe.is_in_shopping_cart = False
+        serialized = RecipeSerializer(
+            recipes, many=True, context={"request": request}
+        ).data
+
+        response = self.client.get(self.RECIPES_URL)
+        self.assertEqual(response.json()["results"], serialized)
+        response = self.client.get(f"/api/recipes/{favorite.pk}/")
+        self.assertEqual(response.json(), serialized[recipes.index(favorite)])
+
+    def test_author_change_keeps_other_fragments(self) -> None:
+        changed = self.authors[0]
+        recipes = dict(Recipe.objects.values_list("pk", "author_id"))
+        keys = fragment_keys(recipes)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            changed.first_name = "Переименованный"
+            changed.save()
+        response = self.client.get(self.RECIPES_URL)
+
+        for pk, key in fragment_keys(recipes).items():
+            self.assertEqual(key != keys[pk], recipes[pk] == changed.pk)
+        for recipe in response.json()["results"]:
+            if recipe["author"]["id"] == changed.pk:
+                self.assertEqual(
+                    recipe["author"]["first_name"], "Переименованный"
+                )
+
+
+class SparseFieldsTest(RecipeAPITestCase):
+    def test_fields_and_omit(self) -> None:
+        fields = set(RecipeSerializer.Meta.fields)
+        # Количество и рецепты, связи - только для запрошенных полей.
+        cases = (
+            ("fields=name", {"id", "name"}, 2),
+            ("fields=name,tags", {"id", "name", "tags"}, 4),
+            ("omit=text,ingredients", fields - {"text", "ingredients"}, 4),
+        )
+        for query, expected, queries in cases:
+            cache.clear()
+            with self.subTest(query=query), self.assertNumQueries(queries):
+                response = self.client.get(f"{self.RECIPES_URL}&{query}")
+
+                self.assertEqual(response.status_code, 200)
+                for recipe in response.json()["results"]:
+                    self.assertEqual(set(recipe), expected)
+
+    def test_unknown_field(self) -> None:
+        response = self.client.get(f"{self.RECIPES_URL}&fields=name,secret")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_renditions_with_other_fields(self) -> None:
+        RecipeImage.objects.update(
+            status=RecipeImage.Status.DONE,
+            files={"card": "recipe_images/renditions/card.jpg"},
+            placeholder="data:image/jpeg;base64,",
+        )
+        cases = (
+            ("omit=text,ingredients", 4),
+            ("fields=name,renditions", 2),
+            ("fields=author,renditions", 2),
+            ("fields=tags,image,renditions", 4),
+        )
+        for query, queries in cases:
+            cache.clear()
+            with self.subTest(query=query), self.assertNumQueries(queries):
+                response = self.client.get(f"{self.RECIPES_URL}&{query}")
+
+                self.assertEqual(response.status_code, 200)
+                for recipe in response.json()["results"]:
+                    self.assertIn("card", recipe["renditions"])
+
+
+class UserChangeTest(RecipeAPITestCase):
+    def test_new_user_keeps_cached_list(self) -> None:
+        self.client.get(self.RECIPES_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MyUser.objects.create_user(
+                username="reader",
+                email="reader@example.com",
+                password="Pass12345!",
+            )
+        response = self.client.get(self.RECIPES_URL)
+
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_author_change_updates_cached_list(self) -> None:
+        author = self.authors[0]
+        etag = self.client.get(self.RECIPES_URL)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            author.last_name = "Переименованный"
+            author.save(update_fields=("last_name",))
+        response = self.client.get(self.RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertIn(
+            "Переименованный",
+            {r["author"]["last_name"] for r in response.json()["results"]},
+        )
+
+
+@override_settings(SHOPPING_LIST_ASYNC_THRESHOLD=2, ACCEL_REDIRECT_PREFIX="")
+class ShoppingListJobTest(RecipeAPITestCase):
+    URL = "/api/recipes/download_shopping_cart/"
+
+    def test_large_cart_in_background(self) -> None:
+        user = self.authors[0]
+        for recipe in Recipe.objects.all():
+            Carts.objects.create(user=user, recipe=recipe)
+        self.client.force_authenticate(user)
+
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertEqual(job["status"], "pending")
+        self.assertEqual(self.client.get(self.URL).json()["id"], job["id"])
+        self.assertEqual(self.client.get(job["url"]).status_code, 202)
+
+        run_job(claim_job())
+        response = self.client.get(job["url"])
+
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("Соль", content)
+
+    def test_interrupted_job_requeued(self) -> None:
+        job = ShoppingListJob.objects.create(
+            user=self.authors[0], file_format="txt"
+        )
+        self.assertEqual(claim_job(), job)
+        self.assertIsNone(claim_job())
+
+        self.assertEqual(requeue_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ShoppingListJob.Status.PENDING)
+        self.assertEqual(claim_job(), job)
+
+
+class RecipeImageTest(RecipeAPITestCase):
+    def test_renditions_after_processing(self) -> None:
+        url = f"/api/recipes/{Recipe.objects.first().pk}/"
+        self.assertIsNone(self.client.get(url).json()["renditions"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            while (image := claim_image()) is not None:
+                run_image(image)
+        renditions = self.client.get(url).json()["renditions"]
+
+        names = ("image", "card", "card_webp", "detail", "detail_webp")
+        for name in names:
+            self.assertTrue(renditions[name].startswith("http://testserver/"))
+        self.assertTrue(
+            renditions["placeholder"].startswith("data:image/jpeg;base64,")
+        )
+
+
+class RenderRenditionsTest(TestCase):
+    def test_source_kept(self) -> None:
+        exif = Image.Exif()
+        exif[0x010F] = "Camera"
+        buffer = BytesIO()
+        Image.new("RGB", (2000, 1000), "red").save(
+            buffer, "JPEG", exif=exif.tobytes()
+        )
+
+        with TemporaryDirectory() as media, override_settings(
+            MEDIA_ROOT=media
+        ):
+            storage = get_storage()
+            source = storage.save(
+                "recipe_images/photo.jpg", ContentFile(buffer.getvalue())
+            )
+            files, _ = render_renditions(1, source)
+
+            with storage.open(source) as file:
+                self.assertEqual(file.read(), buffer.getvalue())
+            with storage.open(files["image"]) as file, Image.open(
+                file
+            ) as image:
+                self.assertEqual(image.size, (500, 250))
+                self.assertFalse(image.getexif())
+
+
+class BackfillRenditionsTest(RecipeAPITestCase):
+    COMMAND = "recipes.management.commands.backfill_renditions"
+
+    def backfill(self, checkpoint: Path, **options) -> str:
+        stdout = StringIO()
+        with mock.patch(
+            f"{self.COMMAND}.ProcessPoolExecutor",
+            lambda workers, **kwargs: ThreadPoolExecutor(workers),
+        ):
+            call_command(
+                "backfill_renditions",
+                workers=1,
+                batch_size=2,
+                checkpoint=checkpoint,
+                stdout=stdout,
+                **options,
+            )
+        return stdout.getvalue()
+
+    def test_interrupted_run_resumed(self) -> None:
+        first, second, third, _ = Recipe.objects.order_by("pk")
+        calls = []
+
+        def interrupt(pk: int, source: str) -> tuple[dict, str]:
+            calls.append(pk)
+            if pk == third.pk:
+                raise KeyboardInterrupt
+            return render_renditions(pk, source)
+
+        with TemporaryDirectory() as directory:
+            checkpoint = Path(directory) / "backfill.json"
+            with mock.patch(
+                f"{self.COMMAND}.render_renditions", interrupt
+            ), self.assertRaises(KeyboardInterrupt):
+                self.backfill(checkpoint)
+
+            self.assertEqual(
+                json.loads(checkpoint.read_text()), {"last_pk": second.pk}
+            )
+            statuses = dict(
+                RecipeImage.objects.values_list("recipe_id", "status")
+            )
+            self.assertEqual(statuses[first.pk], RecipeImage.Status.DONE)
+            self.assertEqual(statuses[third.pk], RecipeImage.Status.RUNNING)
+
+            # Недавно забранные изображения может ещё обрабатывать
+            # другой запуск, поэтому они пропускаются.
+            output = self.backfill(checkpoint)
+            self.assertIn(f"Продолжение после рецепта {second.pk}", output)
+            self.assertFalse(checkpoint.exists())
+            self.assertEqual(
+                RecipeImage.objects.get(recipe=third).status,
+                RecipeImage.Status.RUNNING,
+            )
+
+            self.backfill(checkpoint, stale_minutes=0)
+
+        self.assertEqual(
+            set(RecipeImage.objects.values_list("status", flat=True)),
+            {RecipeImage.Status.DONE},
+        )
+
+
+class IngredientSnapshotTest(RecipeAPITestCase):
+    URL = "/api/ingredients/"
+
+    @skipIf(snapshots.brotli is None, "brotli не установлен")
+    def test_etag_per_encoding(self) -> None:
+        etags = {}
+        for user in (None, self.authors[0]):
+            self.client.force_authenticate(user)
+            for encoding in ("identity", "gzip", "br"):
+                with self.subTest(user=user, encoding=encoding):
+                    response = self.client.get(
+                        self.URL, HTTP_ACCEPT_ENCODING=encoding
+                    )
+                    etag = response["ETag"]
+                    self.assertEqual(etags.setdefault(encoding, etag), etag)
+                    self.assertNotIn("Authorization", response["Vary"])
+
+                    response = self.client.get(
+                        self.URL,
+                        HTTP_ACCEPT_ENCODING=encoding,
+                        HTTP_IF_NONE_MATCH=etag,
+                    )
+                    self.assertEqual(response.status_code, 304)
+
+        self.assertEqual(len(set(etags.values())), 3)
+
+
+class QueryCountTest(RecipeAPITestCase):
+    """Количество запросов на странице рецептов при пустом кэше."""
+
+    def assert_queries(self, cases: tuple[tuple[str, int], ...]) -> None:
+        for url, queries in cases:
+            cache.clear()
+            with self.subTest(url=url), self.assertNumQueries(queries):
+                response = self.client.get(url)
+
+                self.assertEqual(response.status_code, 200)
+
+    def test_recipes(self) -> None:
+        detail_url = f"/api/recipes/{Recipe.objects.first().pk}/"
+        fields = ",".join(RecipeSerializer.Meta.fields)
+        # Количество, `id` на странице, рецепты с автором,
+        # тэги, ингредиенты всех рецептов и реестр тэгов.
+        cases = (
+            (self.RECIPES_URL, 6),
+            (detail_url, 5),
+            (f"{self.RECIPES_URL}&fields={fields}", 5),
+        )
+        self.assert_queries(cases)
+
+        # Списки избранного, покупок и подписок пользователя.
+        self.client.force_authenticate(self.authors[0])
+        self.assert_queries(
+            tuple((url, queries + 3) for url, queries in cases)
+        )
+
+    def test_subscriptions(self) -> None:
+        user = self.authors[0]
+        authors = [self.authors[1]]
+        for i in range(2, 4):
+            author = MyUser.objects.create_user(
+                username=f"author{i}",
+                email=f"author{i}@example.com",
+                password="Pass12345!",
+            )
+            for j in range(2):
+                Recipe.objects.create(
+                    name=f"Рецепт {i}-{j}",
+                    author=author,
+                    image=make_image(),
+                    text="Описание",
+                    cooking_time=10,
+                )
+            authors.append(author)
+        Subscriptions.objects.bulk_create(
+            Subscriptions(user=user, author=author) for author in authors
+        )
+        self.client.force_authenticate(user)
+
+        # Авторы и рецепты всех авторов, на странице - и их количество.
+        self.assert_queries(
+            (
+                ("/api/users/subscriptions/?recipes_limit=1", 2),
+                ("/api/users/subscriptions/?limit=6&recipes_limit=1", 3),
+                ("/api/users/subscriptions/?limit=6", 3),
+            )
+        )
@@ -1,5 +1,13 @@
-from api.mixins import AddDelViewMixin
-from api.paginators import PageLimitPagination
+from api.fragments import RecipeFragment, assemble, freeze, thaw
+from api.mixins import (
+    AddDelViewMixin,
+    ConditionalGetMixin,
+    FragmentMixin,
+    ResponseCacheMixin,
+    StreamingListMixin,
+)
+from api.negotiation import FileFormatNegotiation
+from api.paginators import PageLimitPagination, RecipePagination
 from api.permissions import (
     AdminOrReadOnly,
     AuthorStaffOrReadOnly,
@@ -9,22 +17,53 @@ from api.permissions import (
 from api.serializers import (
     IngredientSerializer,
     RecipeSerializer,
+    ShoppingListJobSerializer,
     ShortRecipeSerializer,
     TagSerializer,
     UserSubscribeSerializer,
 )
-from core.enums import Tuples, UrlQueries
-from core.services import create_shoping_list, maybe_incorrect_layout
+from api.snapshots import get_snapshot
+from core.cache import get_versions
+from core.enums import CacheScopes, Tuples, UrlQueries
+from core.search import search_recipes
+from core.shopping_export import (
+    FORMATS,
+    available_formats,
+    shopping_list_filename,
+)
+from core.services import (
+    get_tag_registry,
+    get_user_membership,
+    search_ingredients,
+)
+from core.shopping_lists import enqueue_shopping_list
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.handlers.wsgi import WSGIRequest
-from django.db.models import Q, QuerySet
+from django.db.models import Exists, OuterRef, Prefetch, Q, QuerySet, Value
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.http.response import HttpResponse
+from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet as DjoserUserViewSet
-from recipes.models import Carts, Favorites, Ingredient, Recipe, Tag
+from recipes.models import (
+    AmountIngredient,
+    Carts,
+    Favorites,
+    Ingredient,
+    Recipe,
+    ShoppingListJob,
+    Tag,
+)
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.routers import APIRootView
-from rest_framework.status import HTTP_400_BAD_REQUEST
+from rest_framework.status import (
+    HTTP_200_OK,
+    HTTP_202_ACCEPTED,
+    HTTP_400_BAD_REQUEST,
+)
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from users.models import Subscriptions
 
@@ -49,6 +88,55 @@ class UserViewSet(DjoserUserViewSet, AddDelViewMixin):
     add_serializer = UserSubscribeSerializer
     link_model = Subscriptions
 
+    def get_recipes_limit(self) -> int | None:
+        """Количество рецептов каждого автора из параметра `recipes_limit`.
+
+        Raises:
+            ValidationError: Значение не является неотрицательным числом.
+
+        Returns:
+            int | None: Количество либо None, если параметр не передан.
+        """
+        limit = self.request.query_params.get(UrlQueries.RECIPES_LIMIT.value)
+        if limit is None:
+            return None
+        if not limit.isdecimal():
+            raise ValidationError(
+                {UrlQueries.RECIPES_LIMIT.value: "Ожидается целое число."}
+            )
+        return int(limit)
+
+    def with_recipes(self, queryset: QuerySet[User]) -> QuerySet[User]:
+        """Добавляет к авторам список рецептов.
+
+        Рецепты всех авторов загружаются одним запросом
+        в `recent_recipes`: при переданном `recipes_limit` срез
+        в `Prefetch` выполняется оконной функцией `ROW_NUMBER()` по автору,
+        поэтому выбираются только последние рецепты каждого автора.
+
+        Args:
+            queryset (QuerySet[User]): Авторы.
+
+        Returns:
+            QuerySet[User]: Авторы с рецептами.
+        """
+        columns = {field.name for field in Recipe._meta.concrete_fields}
+        recipes = Recipe.objects.select_related("renditions").only(
+            *(set(ShortRecipeSerializer.Meta.fields) & columns),
+            "author",
+            "renditions",
+        )
+        limit = self.get_recipes_limit()
+        if limit is not None:
+            recipes = recipes[:limit]
+
+        return queryset.prefetch_related(
+            Prefetch("recipes", queryset=recipes, to_attr="recent_recipes")
+        )
+
+    def get_link_queryset(self) -> QuerySet[User]:
+        return self.with_recipes(User.objects.all())
+
     @action(detail=True, permission_classes=(IsAuthenticated,))
     def subscribe(self, request: WSGIRequest, id: int | str) -> Response:
         """Создаёт/удалет связь между пользователями.
@@ -93,63 +181,128 @@ class UserViewSet(DjoserUserViewSet, AddDelViewMixin):
                 401 - для неавторизованного пользователя.
                 Список подписок для авторизованного пользователя.
         """
-        pages = self.paginate_queryset(
+        queryset = self.with_recipes(
             User.objects.filter(subscribers__user=self.request.user)
         )
+        pages = self.paginate_queryset(queryset)
+        if pages is None:
+            serializer = UserSubscribeSerializer(queryset, many=True)
+            return Response(serializer.data)
+
         serializer = UserSubscribeSerializer(pages, many=True)
         return self.get_paginated_response(serializer.data)
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(ConditionalGetMixin, ReadOnlyModelViewSet):
     """Работает с тэгами.
 
     Изменение и создание тэгов разрешено только админам.
+    Поддерживает условные GET-запросы.
+    Тэги берутся из реестра тэгов процесса без обращения к базе данных.
     """
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AdminOrReadOnly,)
 
+    def get_cache_scopes(self) -> list[str]:
+        return [CacheScopes.TAGS.value]
+
+    def get_queryset(self) -> list[Tag]:
+        return list(get_tag_registry().tags)
+
+    def get_object(self) -> Tag:
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            tag = get_tag_registry().by_id[int(lookup)]
+        except (KeyError, ValueError):
+            raise Http404
+
+        self.check_object_permissions(self.request, tag)
+        return tag
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+
+class IngredientViewSet(
+    ConditionalGetMixin, StreamingListMixin, ReadOnlyModelViewSet
+):
     """Работет с игридиентами.
 
     Изменение и создание ингридиентов разрешено только админам.
+    Поддерживает условные GET-запросы.
+    Полный каталог отдаётся из заранее закодированного и сжатого снимка.
     """
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (AdminOrReadOnly,)
 
-    def get_queryset(self) -> list[Ingredient]:
+    def get_cache_scopes(self) -> list[str]:
+        return [CacheScopes.INGREDIENTS.value]
+
+    def get_queryset(self) -> QuerySet[Ingredient] | list[Ingredient]:
         """Получает queryset в соответствии с параметрами запроса.
 
         Реализован поиск объектов по совпадению в начале названия,
-        также добавляются результаты по совпадению в середине.
+        после них выводятся результаты по совпадению в середине.
         При наборе названия в неправильной раскладке - латинские символы
-        преобразуются в кириллицу (для стандартной раскладки).
+        преобразуются в кириллицу (для стандартной раскладки), поиск
+        ведётся и по исходной строке, и по преобразованной.
         Также прописные буквы преобразуются в строчные,
         так как все ингридиенты в базе записаны в нижнем регистре.
+        Поиск выполняется по индексу в памяти процесса, без обращения
+        к базе данных.
 
         Returns:
-            list[Ingredient]: Список найденых ингридиентов.
+            QuerySet[Ingredient] | list[Ingredient]:
+                Список найденых ингридиентов.
         """
         name: str = self.request.query_params.get(UrlQueries.SEARCH_ING_NAME)
-        queryset = self.queryset
 
         if not name:
-            return queryset
+            return self.queryset.all()
+
+        return search_ingredients(name)
 
-        name = maybe_incorrect_layout(name)
-        start_queryset = queryset.filter(name__istartswith=name)
-        start_names = (ing.name for ing in start_queryset)
-        contain_queryset = queryset.filter(name__icontains=name).exclude(
-            name__in=start_names
+    def list(self, request: WSGIRequest, *args, **kwargs) -> HttpResponse:
+        """Выводит ингредиенты.
+
+        Полный каталог в формате JSON отдаётся из снимка, который
+        строится один раз на версию ингредиентов. Поиск по названию
+        и другие форматы обрабатываются как обычно.
+        Ответ снимка не проходит через `ConditionalGetMixin`: его ETag
+        вычисляется по содержимому для каждого способа сжатия и не зависит
+        от пользователя, а сам ответ кэшируется общими кэшами.
+
+        Args:
+            request (WSGIRequest): Объект запроса.
+
+        Returns:
+            HttpResponse: Список ингредиентов.
+        """
+        renderer = request.accepted_renderer
+        if request.query_params.get(
+            UrlQueries.SEARCH_ING_NAME
+        ) or not isinstance(renderer, JSONRenderer):
+            return super().list(request, *args, **kwargs)
+
+        snapshot = get_snapshot(
+            "ingredients",
+            CacheScopes.INGREDIENTS.value,
+            renderer.media_type,
+            lambda: renderer.render(
+                self.get_serializer(self.queryset.all(), many=True).data
+            ),
         )
-        return list(start_queryset) + list(contain_queryset)
+        return snapshot.response(request)
 
 
-class RecipeViewSet(ModelViewSet, AddDelViewMixin):
+class RecipeViewSet(
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    FragmentMixin,
+    ModelViewSet,
+    AddDelViewMixin,
+):
     """Работает с рецептами.
 
     Вывод, создание, редактирование, добавление/удаление
@@ -158,48 +311,367 @@ class RecipeViewSet(ModelViewSet, AddDelViewMixin):
     Для авторизованных пользователей — возможность добавить
     рецепт в избранное и в список покупок.
     Изменять рецепт может только автор или админы.
+    Ответы кэшируются общими для всех пользователей, отметки пользователя
+    проставляются по его кэшированным спискам связей.
+    Данные рецептов собираются из заранее отрисованных JSON-фрагментов,
+    большие страницы отправляются клиенту частями.
+    Параметры `fields` и `omit` ограничивают поля рецептов в ответе,
+    данные для остальных полей из базы данных не загружаются.
+    Поддерживает условные GET-запросы.
     """
 
-    queryset = Recipe.objects.select_related("author")
+    ingredients_prefetch = Prefetch(
+        "ingredient",
+        queryset=AmountIngredient.objects.select_related(
+            "ingredients"
+        ).order_by("ingredients__name"),
+    )
+    # Данные тэгов берутся из реестра тэгов, из базы нужны только `id`.
+    tags_prefetch = Prefetch(
+        "tags", queryset=Tag.objects.only("pk").order_by()
+    )
+    queryset = Recipe.objects.select_related(
+        "author", "renditions"
+    ).prefetch_related(tags_prefetch, ingredients_prefetch)
     serializer_class = RecipeSerializer
     permission_classes = (AuthorStaffOrReadOnly,)
-    pagination_class = PageLimitPagination
+    pagination_class = RecipePagination
     add_serializer = ShortRecipeSerializer
 
     def get_queryset(self) -> QuerySet[Recipe]:
         """Получает queryset в соответствии с параметрами запроса.
 
+        При полнотекстовом поиске (`search`) рецепты упорядочиваются
+        по релевантности. При выводе по курсору порядок всегда
+        по дате публикации.
+
         Returns:
             QuerySet[Recipe]: Список запрошенных объектов.
         """
-        queryset = self.queryset
+        fields = self.get_requested_fields()
+        queryset = self.add_user_annotations(
+            self.queryset
+            if fields is None
+            else self.get_sparse_queryset(fields)
+        )
 
         tags: list = self.request.query_params.getlist(UrlQueries.TAGS.value)
         if tags:
-            queryset = queryset.filter(tags__slug__in=tags).distinct()
+            queryset = queryset.filter(
+                tags__in=get_tag_registry().ids_by_slugs(tags)
+            ).distinct()
 
         author: str = self.request.query_params.get(UrlQueries.AUTHOR.value)
         if author:
             queryset = queryset.filter(author=author)
 
+        search: str = self.request.query_params.get(UrlQueries.SEARCH.value)
+        if search and search.strip():
+            queryset = search_recipes(queryset, search.strip())
+
         # Следующие фильтры только для авторизованного пользователя
         if self.request.user.is_anonymous:
             return queryset
 
         is_in_cart: str = self.request.query_params.get(UrlQueries.SHOP_CART)
         if is_in_cart in Tuples.SYMBOL_TRUE_SEARCH.value:
-            queryset = queryset.filter(in_carts__user=self.request.user)
+            queryset = queryset.filter(is_in_shopping_cart=True)
         elif is_in_cart in Tuples.SYMBOL_FALSE_SEARCH.value:
-            queryset = queryset.exclude(in_carts__user=self.request.user)
+            queryset = queryset.filter(is_in_shopping_cart=False)
 
         is_favorite: str = self.request.query_params.get(UrlQueries.FAVORITE)
         if is_favorite in Tuples.SYMBOL_TRUE_SEARCH.value:
-            queryset = queryset.filter(in_favorites__user=self.request.user)
+            queryset = queryset.filter(is_favorited=True)
         if is_favorite in Tuples.SYMBOL_FALSE_SEARCH.value:
-            queryset = queryset.exclude(in_favorites__user=self.request.user)
+            queryset = queryset.filter(is_favorited=False)
 
         return queryset
 
+    def get_requested_fields(self) -> set[str] | None:
+        """Поля рецептов, запрошенные параметрами `fields` и `omit`.
+
+        Параметры учитываются только при выводе рецептов. Поле `id`
+        выводится всегда.
+
+        Raises:
+            ValidationError: Запрошены неизвестные поля.
+
+        Returns:
+            set[str] | None: Поля для вывода либо None, если нужны все поля.
+        """
+        params = self.request.query_params
+        if self.action not in ("list", "retrieve") or not (
+            UrlQueries.FIELDS.value in params
+            or UrlQueries.OMIT.value in params
+        ):
+            return None
+
+        all_fields = set(RecipeSerializer.Meta.fields)
+        fields, omit = (
+            {
+                name.strip()
+                for value in params.getlist(query.value)
+                for name in value.split(",")
+                if name.strip()
+            }
+            for query in (UrlQueries.FIELDS, UrlQueries.OMIT)
+        )
+
+        unknown = (fields | omit) - all_fields
+        if unknown:
+            raise ValidationError(
+                {"fields": f"Неизвестные поля: {', '.join(sorted(unknown))}"}
+            )
+
+        return ((fields or all_fields) - omit) | {"id"}
+
+    def get_sparse_queryset(self, fields: set[str]) -> QuerySet[Recipe]:
+        """Queryset, загружающий только данные запрошенных полей.
+
+        Колонки остальных полей не выбираются, связанные объекты
+        подгружаются только для запрошенных вложенных полей.
+
+        Args:
+            fields (set[str]): Запрошенные поля рецепта.
+
+        Returns:
+            QuerySet[Recipe]: Queryset рецептов.
+        """
+        columns = {field.name for field in Recipe._meta.concrete_fields}
+        # `pub_date` нужна курсорной пагинации для позиции на странице.
+        only = fields & columns | {"pub_date"}
+        related = []
+
+        if "author" in fields:
+            related.append("author")
+        if "renditions" in fields:
+            related.append("renditions")
+            only.add("renditions")
+
+        queryset = Recipe.objects.only(*only)
+        if related:
+            queryset = queryset.select_related(*related)
+        if "tags" in fields:
+            queryset = queryset.prefetch_related(self.tags_prefetch)
+        if "ingredients" in fields:
+            queryset = queryset.prefetch_related(self.ingredients_prefetch)
+
+        return queryset
+
+    def get_serializer(self, *args, **kwargs) -> RecipeSerializer:
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs["fields"] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def use_fragments(self) -> bool:
+        return self.get_requested_fields() is None
+
+    def get_cache_scopes(self) -> list[str]:
+        """Разделы данных, от которых зависит ответ на запрос.
+
+        Returns:
+            list[str]: Разделы для списка либо для отдельного рецепта.
+        """
+        if self.action == "retrieve":
+            return [
+                CacheScopes.RECIPE.value % self.kwargs[self.lookup_field]
+            ]
+        return [CacheScopes.RECIPES.value]
+
+    def get_validator_scopes(self) -> list[str]:
+        """Разделы данных, от которых зависят валидаторы ответа.
+
+        Изменение автора не меняет версию списка рецептов, поэтому
+        для списка учитывается и версия данных авторов.
+
+        Returns:
+            list[str]: Разделы для валидаторов ответа.
+        """
+        scopes = self.get_cache_scopes()
+        if self.action == "list":
+            scopes.append(CacheScopes.AUTHORS.value)
+        return scopes
+
+    def can_use_cache(self) -> bool:
+        """Можно ли использовать общий кэш ответов.
+
+        Выборки по избранному и списку покупок у каждого пользователя свои,
+        поэтому для них кэш не используется. Изменение автора не меняет
+        версию списка рецептов, поэтому не кэшируются и ответы с данными
+        авторов, собранные сериализатором, а не из фрагментов.
+
+        Returns:
+            bool: True, если ответ общий для всех пользователей.
+        """
+        fields = self.get_requested_fields()
+        if (
+            self.action == "list"
+            and fields is not None
+            and "author" in fields
+        ):
+            return False
+
+        if self.request.user.is_anonymous:
+            return True
+
+        params = self.request.query_params
+        return not (
+            params.get(UrlQueries.FAVORITE) or params.get(UrlQueries.SHOP_CART)
+        )
+
+    def assemble_fragments(self, ids: list[int]) -> list[RecipeFragment]:
+        return assemble(ids, self.queryset, self.request)
+
+    def to_cache(self, data: dict | list) -> dict | list:
+        return freeze(data)
+
+    def from_cache(self, data: dict | list) -> dict | list | None:
+        return thaw(data, self.queryset, self.request)
+
+    def personalize(self, data: dict | list) -> dict | list:
+        """Проставляет в ответе отметки текущего пользователя.
+
+        Отметки `is_favorited`, `is_in_shopping_cart` и `is_subscribed`
+        автора берутся из кэшированных списков связей пользователя.
+        Отметки проставляются только для полей, присутствующих в ответе,
+        во фрагментах рецептов - заменой байтов.
+
+        Args:
+            data (dict | list):
+                Данные рецепта, страницы рецептов либо список рецептов.
+
+        Returns:
+            dict | list: Данные с отметками текущего пользователя.
+        """
+        user = self.request.user
+        membership = (
+            None if user.is_anonymous else get_user_membership(user.pk)
+        )
+        if isinstance(data, list):
+            recipes = data
+        elif isinstance(data, dict) and "results" in data:
+            recipes = data["results"]
+        else:
+            recipes = (data,)
+
+        marks = (
+            ("is_favorited", "favorites"),
+            ("is_in_shopping_cart", "carts"),
+        )
+        for recipe in recipes:
+            if isinstance(recipe, RecipeFragment):
+                # Во фрагментах все отметки `false`.
+                if membership is None:
+                    continue
+                fields = [
+                    field
+                    for field, kind in marks
+                    if recipe.pk in membership[kind]
+                ]
+                if (
+                    recipe.author_id != user.pk
+                    and recipe.author_id in membership["subscriptions"]
+                ):
+                    fields.append("is_subscribed")
+                recipe.mark(*fields)
+                continue
+
+            for field, kind in marks:
+                if field in recipe:
+                    recipe[field] = (
+                        membership is not None
+                        and recipe["id"] in membership[kind]
+                    )
+
+            author = recipe.get("author")
+            if author:
+                author["is_subscribed"] = (
+                    membership is not None
+                    and author["id"] != user.pk
+                    and author["id"] in membership["subscriptions"]
+                )
+
+        return data
+
+    def get_count_key(self) -> str | None:
+        """Ключ кэша для количества рецептов в выборке.
+
+        Количество кэшируется только для распространённых выборок:
+        все рецепты, рецепты одного тэга, одного автора, избранное или
+        список покупок пользователя. Ключ включает версии данных, от которых
+        зависит выборка. Для остальных сочетаний фильтров и для поиска
+        возвращает None.
+
+        Returns:
+            str | None: Ключ кэша.
+        """
+        params = self.request.query_params
+        user = self.request.user
+        if params.get(UrlQueries.SEARCH):
+            return None
+
+        filters = [
+            (query, value)
+            for query in (UrlQueries.TAGS.value, UrlQueries.AUTHOR.value)
+            for value in params.getlist(query)
+            if value
+        ]
+        scopes = [CacheScopes.RECIPES.value]
+
+        if user.is_authenticated:
+            for query in (UrlQueries.FAVORITE, UrlQueries.SHOP_CART):
+                value = params.get(query)
+                if value in Tuples.SYMBOL_TRUE_SEARCH.value:
+                    filters.append((query.value, "1"))
+                elif value in Tuples.SYMBOL_FALSE_SEARCH.value:
+                    filters.append((query.value, "0"))
+
+            if filters and filters[0][0] in (
+                UrlQueries.FAVORITE,
+                UrlQueries.SHOP_CART,
+            ):
+                scopes.append(CacheScopes.USER.value % user.pk)
+
+        if len(filters) > 1:
+            return None
+
+        parts = [part for pair in filters for part in pair]
+        versions = get_versions(*scopes)
+        return ":".join(map(str, ("count", *scopes, *parts, *versions)))
+
+    def add_user_annotations(
+        self, queryset: QuerySet[Recipe]
+    ) -> QuerySet[Recipe]:
+        """Добавляет к рецептам отметки `в избранном` и `в списке покупок`.
+
+        Отметки вычисляются подзапросами `EXISTS` внутри основного запроса,
+        поэтому их проверка не требует отдельного запроса на каждый рецепт.
+        Для анонимного пользователя отметки всегда `False`.
+
+        Args:
+            queryset (QuerySet[Recipe]): Исходный queryset рецептов.
+
+        Returns:
+            QuerySet[Recipe]: Queryset с аннотациями `is_favorited`
+            и `is_in_shopping_cart`.
+        """
+        user = self.request.user
+
+        if user.is_anonymous:
+            return queryset.annotate(
+                is_favorited=Value(False), is_in_shopping_cart=Value(False)
+            )
+
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favorites.objects.filter(recipe=OuterRef("pk"), user=user)
+            ),
+            is_in_shopping_cart=Exists(
+                Carts.objects.filter(recipe=OuterRef("pk"), user=user)
+            ),
+        )
+
     @action(detail=True, permission_classes=(IsAuthenticated,))
     def favorite(self, request: WSGIRequest, pk: int | str) -> Response:
         """Добавляет/удалет рецепт в `избранное`.
@@ -256,28 +728,107 @@ class RecipeViewSet(ModelViewSet, AddDelViewMixin):
         self.link_model = Carts
         return self._delete_relation(Q(recipe__id=pk))
 
-    @action(methods=("get",), detail=False)
+    @action(
+        methods=("get",),
+        detail=False,
+        content_negotiation_class=FileFormatNegotiation,
+    )
     def download_shopping_cart(self, request: WSGIRequest) -> Response:
-        """Загружает файл *.txt со списком покупок.
+        """Загружает файл со списком покупок.
 
         Считает сумму ингредиентов в рецептах выбранных для покупки.
-        Возвращает текстовый файл со списком ингредиентов.
+        Возвращает файл со списком ингредиентов в формате из параметра
+        `format`: txt (по умолчанию), csv, json или pdf. Файл отдаётся
+        частями по мере формирования.
+        Для корзин не меньше `SHOPPING_LIST_ASYNC_THRESHOLD` рецептов
+        список формируется в фоне: возвращается задание (`202 Accepted`),
+        файл загружается по адресу из поля `url` задания.
         Вызов метода через url:  */recipes/download_shopping_cart/.
 
         Args:
             request (WSGIRequest): Объект запроса..
 
         Returns:
-            Responce: Ответ с текстовым файлом.
+            Responce: Ответ с файлом либо с заданием.
         """
         user = self.request.user
-        if not user.carts.exists():
+        file_format = request.query_params.get(UrlQueries.FORMAT.value, "txt")
+        formats = available_formats()
+        if file_format not in formats:
+            return Response(
+                {"format": f"Доступные форматы: {', '.join(formats)}"},
+                status=HTTP_400_BAD_REQUEST,
+            )
+
+        recipes_count = user.carts.count()
+        if not recipes_count:
             return Response(status=HTTP_400_BAD_REQUEST)
 
-        filename = f"{user.username}_shopping_list.txt"
-        shopping_list = create_shoping_list(user)
-        response = HttpResponse(
-            shopping_list, content_type="text.txt; charset=utf-8"
+        if recipes_count >= settings.SHOPPING_LIST_ASYNC_THRESHOLD:
+            job = enqueue_shopping_list(user.pk, file_format)
+            return Response(
+                ShoppingListJobSerializer(
+                    job, context=self.get_serializer_context()
+                ).data,
+                status=HTTP_202_ACCEPTED,
+            )
+
+        response = StreamingHttpResponse(
+            FORMATS[file_format].export(user),
+            content_type=FORMATS[file_format].content_type,
         )
+        filename = shopping_list_filename(user, file_format)
+        response["Content-Disposition"] = f"attachment; filename={filename}"
+        return response
+
+    @action(
+        methods=("get",),
+        detail=False,
+        url_path=r"download_shopping_cart/(?P<job_id>[0-9a-f-]{36})",
+        url_name="shopping-list-job",
+        permission_classes=(IsAuthenticated,),
+    )
+    def shopping_list_job(
+        self, request: WSGIRequest, job_id: str
+    ) -> HttpResponse:
+        """Загружает список покупок, сформированный в фоне.
+
+        Пока файл не готов, возвращает состояние задания: `202 Accepted`
+        для заданий в очереди и в работе, `200 OK` для ошибки.
+        Готовый файл отдаёт nginx по заголовку `X-Accel-Redirect`,
+        без настройки `ACCEL_REDIRECT_PREFIX` - само приложение.
+        Вызов метода через url:  */recipes/download_shopping_cart/<id>/.
+
+        Args:
+            request (WSGIRequest): Объект запроса.
+            job_id (str): `id` задания.
+
+        Returns:
+            HttpResponse: Ответ с текстовым файлом либо с заданием.
+        """
+        job = get_object_or_404(ShoppingListJob, pk=job_id, user=request.user)
+        if job.status != ShoppingListJob.Status.DONE:
+            return Response(
+                ShoppingListJobSerializer(
+                    job, context=self.get_serializer_context()
+                ).data,
+                status=(
+                    HTTP_200_OK
+                    if job.status == ShoppingListJob.Status.FAILED
+                    else HTTP_202_ACCEPTED
+                ),
+            )
+
+        content_type = FORMATS[job.file_format].content_type
+        if settings.ACCEL_REDIRECT_PREFIX:
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = (
+                settings.ACCEL_REDIRECT_PREFIX + job.file.name
+            )
+        else:
+            response = FileResponse(
+                job.file.open("rb"), content_type=content_type
+            )
+        filename = shopping_list_filename(request.user, job.file_format)
         response["Content-Disposition"] = f"attachment; filename={filename}"
         return response
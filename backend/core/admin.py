@@ -0,0 +1,71 @@
+"""Модуль общих настроек админки для больших таблиц.
+
+Страница списка объектов в админке считает объекты дважды: с фильтрами
+и без них. На таблицах с миллионами строк `COUNT(*)` занимает секунды,
+поэтому количество без фильтров берётся из статистики PostgreSQL,
+а с фильтрами - ограничивается `Limits.MAX_EXACT_COUNT`.
+"""
+from core.enums import Limits
+from core.paginators import CountCachePaginator
+from django.db import connections
+from django.db.models import Model, QuerySet
+from django.utils.functional import cached_property
+
+
+def estimate_count(model: type[Model], using: str) -> int | None:
+    """Оценка количества строк таблицы модели по статистике PostgreSQL.
+
+    Args:
+        model (type[Model]): Модель.
+        using (str): Псевдоним базы данных.
+
+    Returns:
+        int | None:
+            Оценка либо None, если база данных не PostgreSQL
+            или статистика ещё не собрана.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            (model._meta.db_table,),
+        )
+        row = cursor.fetchone()
+
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(CountCachePaginator):
+    """Пагинатор админки с оценкой количества объектов.
+
+    Для списка без фильтров и поиска количество берётся из статистики
+    таблицы, если оно больше `Limits.MAX_EXACT_COUNT`. Иначе подсчёт
+    ограничен `Limits.MAX_EXACT_COUNT` объектами.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > Limits.MAX_EXACT_COUNT:
+                self.count_exact = False
+                return estimate
+
+        return super().count
+
+
+class LargeTableAdminMixin:
+    """Настройки страницы списка объектов для больших таблиц.
+
+    Количество объектов оценивается `EstimatedCountPaginator`,
+    общее количество без фильтров не считается.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
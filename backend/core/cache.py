@@ -0,0 +1,96 @@
+"""Модуль версий кэшированных данных.
+
+Каждому разделу данных (например, всем рецептам или избранному
+конкретного пользователя) соответствует счётчик версии в общем кэше.
+Ключи кэшированных значений включают версии разделов, от которых
+зависят, поэтому при изменении данных достаточно увеличить версию —
+устаревшие записи перестают использоваться и удаляются кэшем по таймауту.
+
+Значение версии — время изменения в микросекундах, поэтому версию
+можно использовать и как дату последнего изменения раздела.
+"""
+from time import time_ns
+
+from django.core.cache import cache
+from django.db.transaction import on_commit
+
+VERSION_KEY = "version:%s"
+STATS_KEY = "stats:%s:%s"
+
+
+def _now() -> int:
+    return time_ns() // 1000
+
+
+def get_versions(*scopes: str) -> list[int]:
+    """Получает текущие версии разделов.
+
+    Отсутствующая в кэше версия создаётся со значением текущего времени,
+    чтобы после очистки кэша не совпасть с ранее выданными версиями.
+
+    Args:
+        scopes (str): Названия разделов.
+
+    Returns:
+        list[int]: Версии в порядке перечисления разделов.
+    """
+    keys = [VERSION_KEY % scope for scope in scopes]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _now(), timeout=None)
+            versions[key] = cache.get(key)
+
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes: str) -> None:
+    """Увеличивает версии разделов после фиксации текущей транзакции.
+
+    Пока транзакция не зафиксирована, другие процессы видят старые данные,
+    и ранняя смена версии позволила бы им закэшировать их под новой.
+
+    Args:
+        scopes (str): Названия изменившихся разделов.
+    """
+
+    def bump() -> None:
+        keys = [VERSION_KEY % scope for scope in scopes]
+        versions = cache.get_many(keys)
+        now = _now()
+        cache.set_many(
+            {key: max(now, versions.get(key, 0) + 1) for key in keys},
+            timeout=None,
+        )
+
+    on_commit(bump)
+
+
+def count_request(name: str, hit: bool) -> None:
+    """Учитывает попадание или промах кэша.
+
+    Args:
+        name (str): Название кэша.
+        hit (bool): True - значение найдено в кэше.
+    """
+    key = STATS_KEY % (name, "hit" if hit else "miss")
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_stats(name: str) -> dict[str, int]:
+    """Получает счётчики попаданий и промахов кэша.
+
+    Args:
+        name (str): Название кэша.
+
+    Returns:
+        dict[str, int]: Количество попаданий `hit` и промахов `miss`.
+    """
+    keys = {result: STATS_KEY % (name, result) for result in ("hit", "miss")}
+    stats = cache.get_many(keys.values())
+    return {result: stats.get(key, 0) for result, key in keys.items()}
@@ -0,0 +1,184 @@
+"""Модуль суммарных количеств ингредиентов в корзинах покупок.
+
+Для каждого пользователя в модели `CartIngredient` хранится сумма
+каждого ингредиента по всем рецептам его корзины. Суммы изменяются
+сигналами при добавлении рецепта в корзину и удалении из неё,
+а также при изменении ингредиентов рецептов, находящихся в корзинах.
+Поэтому список покупок читается одним запросом по индексу без агрегации.
+
+Функции `compute_cart_totals` и `rebuild_cart_totals` считают суммы
+заново по рецептам в корзинах и используются для сверки.
+"""
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import F, Sum
+from recipes.models import AmountIngredient, CartIngredient, Carts
+
+# Суммы ингредиентов: (`id` пользователя, `id` ингредиента) -> количество
+Totals = dict[tuple[int, int], int]
+
+
+def change_cart_totals(
+    user_ids: Iterable[int], amounts: dict[int, int]
+) -> None:
+    """Изменяет суммы ингредиентов в корзинах пользователей.
+
+    Суммы изменяются выражением `F("amount") + delta`, поэтому
+    одновременные изменения корзины не теряются. Записи создаются только
+    для увеличиваемых сумм, записи с нулевой суммой удаляются.
+
+    Args:
+        user_ids (Iterable[int]): `id` пользователей.
+        amounts (dict[int, int]):
+            Изменения количества по `id` ингредиентов.
+    """
+    user_ids = list(user_ids)
+    amounts = {pk: delta for pk, delta in amounts.items() if delta}
+    if not user_ids or not amounts:
+        return
+
+    by_delta = defaultdict(list)
+    for pk, delta in amounts.items():
+        by_delta[delta].append(pk)
+
+    with transaction.atomic():
+        CartIngredient.objects.bulk_create(
+            (
+                CartIngredient(user_id=user_id, ingredient_id=pk)
+                for user_id in user_ids
+                for pk, delta in amounts.items()
+                if delta > 0
+            ),
+            ignore_conflicts=True,
+        )
+        totals = CartIngredient.objects.filter(user__in=user_ids)
+        for delta, ids in by_delta.items():
+            totals.filter(ingredient__in=ids).update(
+                amount=F("amount") + delta
+            )
+        totals.filter(amount__lte=0).delete()
+
+
+def recipe_cart_changed(
+    user_ids: Iterable[int], recipe_id: int, added: bool
+) -> None:
+    """Учитывает добавление рецепта в корзины или удаление из них.
+
+    Args:
+        user_ids (Iterable[int]): `id` владельцев корзин.
+        recipe_id (int): `id` рецепта.
+        added (bool): True - рецепт добавлен, False - удалён.
+    """
+    sign = 1 if added else -1
+    amounts = defaultdict(int)
+    for pk, amount in AmountIngredient.objects.filter(
+        recipe=recipe_id
+    ).values_list("ingredients", "amount"):
+        amounts[pk] += sign * amount
+
+    change_cart_totals(user_ids, amounts)
+
+
+def compute_cart_totals(user_ids: Iterable[int] | None = None) -> Totals:
+    """Считает суммы ингредиентов по рецептам в корзинах.
+
+    Args:
+        user_ids (Iterable[int] | None):
+            `id` пользователей. По умолчанию - все пользователи.
+
+    Returns:
+        Totals: Суммы ингредиентов.
+    """
+    if user_ids is None:
+        rows = AmountIngredient.objects.filter(recipe__in_carts__isnull=False)
+    else:
+        rows = AmountIngredient.objects.filter(
+            recipe__in_carts__user__in=list(user_ids)
+        )
+
+    rows = (
+        rows.values_list("recipe__in_carts__user", "ingredients")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    return {(user_id, pk): total for user_id, pk, total in rows if total}
+
+
+def get_cart_totals(user_ids: Iterable[int] | None = None) -> Totals:
+    """Получает хранимые суммы ингредиентов.
+
+    Args:
+        user_ids (Iterable[int] | None):
+            `id` пользователей. По умолчанию - все пользователи.
+
+    Returns:
+        Totals: Суммы ингредиентов.
+    """
+    rows = CartIngredient.objects.all()
+    if user_ids is not None:
+        rows = rows.filter(user__in=list(user_ids))
+
+    return {
+        (user_id, pk): amount
+        for user_id, pk, amount in rows.values_list(
+            "user", "ingredient", "amount"
+        )
+    }
+
+
+@transaction.atomic
+def rebuild_cart_totals(
+    user_ids: Iterable[int] | None = None, batch_size: int = 1000
+) -> int:
+    """Заново записывает суммы ингредиентов по рецептам в корзинах.
+
+    Args:
+        user_ids (Iterable[int] | None):
+            `id` пользователей. По умолчанию - все пользователи.
+        batch_size (int): Количество записей в одном запросе вставки.
+
+    Returns:
+        int: Количество записанных сумм.
+    """
+    if user_ids is not None:
+        user_ids = list(user_ids)
+
+    totals = compute_cart_totals(user_ids)
+    stored = CartIngredient.objects.all()
+    if user_ids is not None:
+        stored = stored.filter(user__in=user_ids)
+
+    stored.delete()
+    CartIngredient.objects.bulk_create(
+        (
+            CartIngredient(user_id=user_id, ingredient_id=pk, amount=amount)
+            for (user_id, pk), amount in totals.items()
+        ),
+        batch_size=batch_size,
+    )
+    return len(totals)
+
+
+def recipe_ingredients_changed(
+    recipe_id: int, amounts: dict[int, int] | None = None
+) -> None:
+    """Учитывает изменение ингредиентов рецепта в корзинах с этим рецептом.
+
+    Args:
+        recipe_id (int): `id` рецепта.
+        amounts (dict[int, int] | None):
+            Изменения количества по `id` ингредиентов. Если изменения
+            неизвестны, суммы в корзинах пересчитываются заново.
+    """
+    user_ids = list(
+        Carts.objects.filter(recipe=recipe_id).values_list("user", flat=True)
+    )
+    if not user_ids:
+        return
+
+    if amounts is None:
+        rebuild_cart_totals(user_ids)
+    else:
+        change_cart_totals(user_ids, amounts)
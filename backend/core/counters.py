@@ -0,0 +1,204 @@
+"""Модуль счётчиков связанных объектов.
+
+Количество рецептов и подписчиков пользователя, добавлений рецепта
+в избранное и в корзины хранится в полях моделей. Поля меняются
+сигналами при создании и удалении связей запросом `UPDATE` с `F()`,
+поэтому одновременные запросы не теряют изменений друг друга.
+Расхождения исправляет команда `recount_counters`.
+"""
+from functools import lru_cache, reduce
+from operator import or_
+from typing import Iterator
+
+from django.apps import apps
+from django.db.models import (
+    Count,
+    F,
+    ForeignObjectRel,
+    IntegerField,
+    Model,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
+
+# Счётчик: (модель со счётчиком, поле счётчика, поле связи с ней)
+Counter = tuple[type[Model], str, str]
+
+
+class CounterFieldsMixin:
+    """Модель с полями-счётчиками.
+
+    Сохранение существующего объекта не записывает счётчики, чтобы
+    не затереть их значениями, прочитанными до изменения другим
+    запросом.
+
+    Attrs:
+        COUNTERS (dict[str, str]):
+            Поле счётчика -> обратная связь с подсчитываемыми объектами.
+    """
+
+    COUNTERS: dict[str, str] = {}
+
+    def save(self, *args, **kwargs) -> None:
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTERS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+def counted_models() -> Iterator[type[Model]]:
+    """Модели с полями-счётчиками.
+
+    Yields:
+        type[Model]: Модели.
+    """
+    for model in apps.get_models():
+        if issubclass(model, CounterFieldsMixin) and model.COUNTERS:
+            yield model
+
+
+def get_relation(model: type[Model], field: str) -> ForeignObjectRel:
+    """Обратная связь, по которой считается счётчик.
+
+    Args:
+        model (type[Model]): Модель со счётчиком.
+        field (str): Поле счётчика.
+
+    Returns:
+        ForeignObjectRel: Связь с подсчитываемыми объектами.
+    """
+    return model._meta.get_field(model.COUNTERS[field])
+
+
+@lru_cache
+def get_counters() -> dict[type[Model], list[Counter]]:
+    """Счётчики, которые меняются при создании и удалении объектов.
+
+    Returns:
+        dict[type[Model], list[Counter]]:
+            Счётчики по моделям подсчитываемых объектов.
+    """
+    counters = {}
+    for model in counted_models():
+        for field in model.COUNTERS:
+            relation = get_relation(model, field)
+            counters.setdefault(relation.related_model, []).append(
+                (model, field, relation.field.attname)
+            )
+    return counters
+
+
+def change_counter(
+    model: type[Model], field: str, pk: int | None, delta: int
+) -> None:
+    """Изменяет счётчик объекта.
+
+    Уменьшение не выполняется, если счётчик станет отрицательным.
+
+    Args:
+        model (type[Model]): Модель со счётчиком.
+        field (str): Поле счётчика.
+        pk (int | None): `id` объекта.
+        delta (int): Изменение счётчика.
+    """
+    if pk is None:
+        return
+
+    queryset = model._base_manager.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def object_counted(instance: Model, delta: int) -> None:
+    """Изменяет счётчики объектов, связанных с созданным/удалённым.
+
+    Args:
+        instance (Model): Созданный или удалённый объект.
+        delta (int): 1 - объект создан, -1 - удалён.
+    """
+    for model, field, attname in get_counters().get(type(instance), ()):
+        change_counter(model, field, getattr(instance, attname), delta)
+
+
+def expected_count(model: type[Model], field: str) -> Coalesce:
+    """Выражение для подсчёта значения счётчика по связанным объектам.
+
+    Args:
+        model (type[Model]): Модель со счётчиком.
+        field (str): Поле счётчика.
+
+    Returns:
+        Coalesce: Коррелированный подзапрос с количеством объектов.
+    """
+    relation = get_relation(model, field)
+    name = relation.field.name
+    counted = (
+        relation.related_model._base_manager.filter(**{name: OuterRef("pk")})
+        .order_by()
+        .values(name)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counted), 0, output_field=IntegerField())
+
+
+def wrong_counters(model: type[Model]) -> QuerySet:
+    """Объекты модели, у которых счётчики не совпадают с подсчётом.
+
+    Args:
+        model (type[Model]): Модель со счётчиками.
+
+    Returns:
+        QuerySet: Объекты с аннотациями `expected_<поле счётчика>`.
+    """
+    return (
+        model._base_manager.annotate(
+            **{
+                f"expected_{field}": expected_count(model, field)
+                for field in model.COUNTERS
+            }
+        )
+        .filter(
+            reduce(
+                or_,
+                (
+                    ~Q(**{field: F(f"expected_{field}")})
+                    for field in model.COUNTERS
+                ),
+            )
+        )
+        .order_by("pk")
+    )
+
+
+def recount_counters(model: type[Model], batch_size: int = 1000) -> int:
+    """Записывает подсчитанные значения в неверные счётчики.
+
+    Значения считаются в самом запросе `UPDATE`, поэтому изменения,
+    сделанные другими запросами во время пересчёта, не теряются.
+
+    Args:
+        model (type[Model]): Модель со счётчиками.
+        batch_size (int): Количество объектов в одном запросе.
+
+    Returns:
+        int: Количество исправленных объектов.
+    """
+    pks = list(wrong_counters(model).values_list("pk", flat=True))
+    fixed = 0
+    for start in range(0, len(pks), batch_size):
+        batch = pks[start : start + batch_size]
+        fixed += model._base_manager.filter(pk__in=batch).update(
+            **{field: expected_count(model, field) for field in model.COUNTERS}
+        )
+    return fixed
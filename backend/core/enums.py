@@ -35,6 +35,18 @@ class Limits(IntEnum):
     MIN_AMOUNT_INGREDIENTS = 1
     # Максимальное количество ингридиентов для рецепта
     MAX_AMOUNT_INGREDIENTS = 32
+    # Количество объектов на странице по умолчанию
+    PAGE_SIZE = 6
+    # Максимальное количество объектов на странице при выводе по курсору
+    MAX_PAGE_SIZE = 100
+    # Предел точного подсчёта объектов для произвольных фильтров
+    MAX_EXACT_COUNT = 10000
+    # Максимальное количество ингредиентов в результатах поиска по названию
+    INGREDIENT_SEARCH_LIMIT = 50
+    # Время хранения снимков редко меняющихся данных клиентом, в секундах
+    SNAPSHOT_MAX_AGE = 24 * 60 * 60
+    # Максимальный размер загружаемого изображения рецепта в байтах
+    MAX_IMAGE_SIZE = 10 * 1024 * 1024
 
 
 class UrlQueries(str, Enum):
@@ -48,3 +60,33 @@ class UrlQueries(str, Enum):
     AUTHOR = "author"
     # Параметр для поиска объектов по тэгам
     TAGS = "tags"
+    # Параметр с курсором следующей/предыдущей страницы
+    CURSOR = "cursor"
+    # Параметр для выбора способа разбиения на страницы: `pagination=cursor`
+    PAGINATION = "pagination"
+    # Параметр полнотекстового поиска рецептов
+    SEARCH = "search"
+    # Поля рецепта в ответе через запятую: `fields=id,name,image`
+    FIELDS = "fields"
+    # Поля рецепта, исключаемые из ответа: `omit=text,ingredients`
+    OMIT = "omit"
+    # Формат файла списка покупок: `format=csv`
+    FORMAT = "format"
+    # Количество рецептов каждого автора в списке подписок
+    RECIPES_LIMIT = "recipes_limit"
+
+
+class CacheScopes(str, Enum):
+    # Рецепты: создание, изменение, удаление, тэги и ингредиенты рецептов
+    RECIPES = "recipes"
+    # Отдельный рецепт вместе с его автором, тэгами и ингредиентами.
+    # Формат: `recipe:<id>`
+    RECIPE = "recipe:%s"
+    # Тэги
+    TAGS = "tags"
+    # Ингредиенты
+    INGREDIENTS = "ingredients"
+    # Данные авторов в списках рецептов
+    AUTHORS = "authors"
+    # Избранное, покупки и подписки пользователя. Формат: `user:<id>`
+    USER = "user:%s"
@@ -0,0 +1,174 @@
+"""Модуль обработки изображений рецептов.
+
+Из загруженного изображения создаются уменьшенные копии (карточка
+рецепта, страница рецепта) в форматах JPEG и WebP, а если установленный
+Pillow умеет их записывать - и AVIF, копия `image` в формате загруженного
+файла, плюс крошечная заглушка для показа до загрузки копии.
+Загруженный файл не изменяется. Поворот из EXIF применяется к пикселям,
+сами метаданные (в том числе координаты съёмки) в копии не попадают.
+"""
+from base64 import b64encode
+from io import BytesIO
+from typing import BinaryIO, NamedTuple
+
+from PIL import Image, ImageOps
+
+
+class Rendition(NamedTuple):
+    size: tuple[int, int]
+    format: str
+    quality: int
+
+
+CARD_SIZE = 400, 400
+DETAIL_SIZE = 1200, 1200
+
+# Копии изображения по названиям
+RENDITIONS = {
+    "card": Rendition(CARD_SIZE, "JPEG", 85),
+    "card_webp": Rendition(CARD_SIZE, "WEBP", 80),
+    "detail": Rendition(DETAIL_SIZE, "JPEG", 85),
+    "detail_webp": Rendition(DETAIL_SIZE, "WEBP", 80),
+}
+OPTIONAL_RENDITIONS = {
+    "card_avif": Rendition(CARD_SIZE, "AVIF", 60),
+    "detail_avif": Rendition(DETAIL_SIZE, "AVIF", 60),
+}
+PLACEHOLDER = Rendition((16, 16), "JPEG", 40)
+# Копия в формате загруженного файла размером изображения рецепта
+IMAGE_RENDITION = "image"
+
+EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "AVIF": "avif"}
+
+# Сигнатуры форматов изображений: все части (смещение, байты)
+# должны совпасть с началом файла.
+IMAGE_SIGNATURES = (
+    ("jpeg", ((0, b"\xff\xd8\xff"),)),
+    ("png", ((0, b"\x89PNG\r\n\x1a\n"),)),
+    ("gif", ((0, b"GIF87a"),)),
+    ("gif", ((0, b"GIF89a"),)),
+    ("webp", ((0, b"RIFF"), (8, b"WEBP"))),
+)
+HEADER_SIZE = 12
+
+
+class ProcessedImage(NamedTuple):
+    """Результат обработки изображения.
+
+    Attrs:
+        renditions (dict[str, tuple[bytes, str]]):
+            Копии с расширениями файлов по названиям.
+        placeholder (str): Заглушка в виде `data:` URL.
+    """
+
+    renditions: dict[str, tuple[bytes, str]]
+    placeholder: str
+
+
+def get_renditions() -> dict[str, Rendition]:
+    """Копии, которые можно создать установленным Pillow.
+
+    Returns:
+        dict[str, Rendition]: Копии по названиям.
+    """
+    Image.init()
+    return RENDITIONS | {
+        name: rendition
+        for name, rendition in OPTIONAL_RENDITIONS.items()
+        if rendition.format in Image.SAVE
+    }
+
+
+def rendition_names() -> set[str]:
+    """Названия всех копий, создаваемых `process_image`.
+
+    Returns:
+        set[str]: Названия копий.
+    """
+    return {IMAGE_RENDITION, *get_renditions()}
+
+
+def image_format(header: bytes) -> str | None:
+    """Определяет формат изображения по первым байтам файла.
+
+    Args:
+        header (bytes): Не меньше `HEADER_SIZE` первых байт файла.
+
+    Returns:
+        str | None: Формат либо None, если формат не поддерживается.
+    """
+    for name, parts in IMAGE_SIGNATURES:
+        if all(header.startswith(data, offset) for offset, data in parts):
+            return name
+
+    return None
+
+
+def encode(image: Image.Image, rendition: Rendition) -> bytes:
+    """Уменьшает изображение и записывает его в заданном формате.
+
+    Изображение не увеличивается. Метаданные не записываются.
+
+    Args:
+        image (Image.Image): Исходное изображение.
+        rendition (Rendition): Размер, формат и качество копии.
+
+    Returns:
+        bytes: Файл копии.
+    """
+    copy = image.copy()
+    copy.thumbnail(rendition.size, Image.Resampling.LANCZOS)
+
+    if rendition.format == "JPEG" and copy.mode != "RGB":
+        copy = copy.convert("RGBA")
+        background = Image.new("RGB", copy.size, "white")
+        background.paste(copy, mask=copy.getchannel("A"))
+        copy = background
+
+    buffer = BytesIO()
+    copy.save(buffer, rendition.format, quality=rendition.quality)
+    return buffer.getvalue()
+
+
+def process_image(
+    file: BinaryIO, image_size: tuple[int, int]
+) -> ProcessedImage:
+    """Создаёт копии изображения.
+
+    Копия `image` записывается в формате исходного файла, а если Pillow
+    не умеет его записывать - в PNG.
+
+    Args:
+        file (BinaryIO): Файл изображения.
+        image_size (tuple[int, int]):
+            Наибольший размер копии `image`.
+
+    Returns:
+        ProcessedImage: Копии без метаданных и заглушка.
+    """
+    with Image.open(file) as source:
+        source_format = source.format
+        # JPEG декодируется сразу в уменьшенном масштабе.
+        source.draft(None, DETAIL_SIZE)
+        image = ImageOps.exif_transpose(source)
+
+    if image.mode not in ("RGB", "RGBA"):
+        alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if alpha else "RGB")
+
+    renditions = get_renditions()
+    renditions[IMAGE_RENDITION] = Rendition(
+        image_size,
+        source_format if source_format in EXTENSIONS else "PNG",
+        90,
+    )
+    placeholder = encode(image, PLACEHOLDER)
+    return ProcessedImage(
+        renditions={
+            name: (encode(image, rendition), EXTENSIONS[rendition.format])
+            for name, rendition in renditions.items()
+        },
+        placeholder=(
+            f"data:image/jpeg;base64,{b64encode(placeholder).decode()}"
+        ),
+    )
@@ -0,0 +1,72 @@
+"""Модуль индекса ингредиентов для поиска по названию в памяти процесса.
+
+Каталог ингредиентов невелик и почти не меняется, поэтому поиск
+при наборе названия выполняется без обращения к базе данных.
+"""
+from bisect import bisect_left
+from typing import Iterable
+
+# Ингредиент: (`id`, название, единица измерения)
+Row = tuple[int, str, str]
+
+
+class IngredientIndex:
+    """Неизменяемый индекс ингредиентов.
+
+    Ингредиенты хранятся отсортированными по названию, поэтому совпадения
+    в начале названия находятся двоичным поиском. Совпадения в середине
+    названия ищутся перебором.
+    Результаты поиска: сначала совпадения в начале названия, затем
+    в середине, внутри групп - по названию.
+
+    Attrs:
+        rows (tuple[Row]): Ингредиенты, отсортированные по названию.
+        keys (tuple[str]): Названия в нижнем регистре для сравнения.
+        version (int): Версия данных, по которым построен индекс.
+
+    Example:
+        >>> index = IngredientIndex(((1, "соль", "г"), (2, "фасоль", "г")))
+        >>> [row[1] for row in index.search(("соль",), limit=10)]
+        ['соль', 'фасоль']
+    """
+
+    __slots__ = ("rows", "keys", "version")
+
+    def __init__(self, rows: Iterable[Row], version: int = 0) -> None:
+        self.rows = tuple(sorted(rows, key=lambda row: (row[1].lower(), row)))
+        self.keys = tuple(row[1].lower() for row in self.rows)
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def search(self, terms: Iterable[str], limit: int) -> list[Row]:
+        """Ищет ингредиенты, в названии которых есть любая из строк.
+
+        Args:
+            terms (Iterable[str]): Искомые строки в нижнем регистре.
+            limit (int): Максимальное количество результатов.
+
+        Returns:
+            list[Row]: Найденные ингредиенты.
+        """
+        terms = {term for term in terms if term}
+        starts = set()
+
+        for term in terms:
+            idx = bisect_left(self.keys, term)
+            end = min(idx + limit, len(self.keys))
+            while idx < end and self.keys[idx].startswith(term):
+                starts.add(idx)
+                idx += 1
+
+        found = sorted(starts)[:limit]
+
+        if len(found) < limit:
+            for idx, key in enumerate(self.keys):
+                if idx not in starts and any(term in key for term in terms):
+                    found.append(idx)
+                    if len(found) == limit:
+                        break
+
+        return [self.rows[idx] for idx in found]
@@ -0,0 +1,97 @@
+"""Модуль компактных списков связей пользователя.
+
+Для каждого пользователя в кэше хранятся `id` рецептов из избранного
+и списка покупок, а также `id` авторов, на которых он подписан.
+Списки хранятся отсортированными массивами целых чисел, что позволяет
+быстро проверять вхождение и занимает минимум памяти. По спискам общая
+для всех пользователей страница рецептов дополняется отметками
+конкретного пользователя без обращения к базе данных.
+
+Ключ списков включает версию раздела `CacheScopes.USER` пользователя,
+которую сигналы увеличивают при любом изменении его связей, поэтому
+устаревшие списки не используются.
+"""
+from array import array
+from bisect import bisect_left
+from typing import Iterable
+
+from django.apps import apps
+from django.core.cache import cache
+
+MEMBERSHIP_KEY = "membership:%s:%s"
+
+# Вид списка: (приложение, модель связи, поле с `id` объекта)
+KINDS = {
+    "favorites": ("recipes", "Favorites", "recipe"),
+    "carts": ("recipes", "Carts", "recipe"),
+    "subscriptions": ("users", "Subscriptions", "author"),
+}
+
+
+class IdSet:
+    """Множество `id` в виде отсортированного массива.
+
+    Attrs:
+        ids (array): Отсортированный массив уникальных `id`.
+
+    Example:
+        >>> ids = IdSet((5, 1, 3))
+        >>> 3 in ids
+        True
+        >>> list(ids)
+        [1, 3, 5]
+    """
+
+    __slots__ = ("ids",)
+
+    def __init__(self, ids: Iterable[int] = ()) -> None:
+        self.ids = array("q", sorted(set(ids)))
+
+    def __contains__(self, pk: int) -> bool:
+        idx = bisect_left(self.ids, pk)
+        return idx < len(self.ids) and self.ids[idx] == pk
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def to_bytes(self) -> bytes:
+        return self.ids.tobytes()
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "IdSet":
+        id_set = cls()
+        id_set.ids.frombytes(raw)
+        return id_set
+
+
+def get_membership(user_id: int, version: int) -> dict[str, IdSet]:
+    """Получает списки связей пользователя.
+
+    При отсутствии в кэше списки загружаются из базы данных
+    (по одному запросу на вид списка) и сохраняются в кэш.
+
+    Args:
+        user_id (int): `id` пользователя.
+        version (int): Версия раздела `CacheScopes.USER` пользователя.
+
+    Returns:
+        dict[str, IdSet]: Списки по видам из `KINDS`.
+    """
+    key = MEMBERSHIP_KEY % (user_id, version)
+    raw = cache.get(key)
+
+    if raw is not None:
+        return {kind: IdSet.from_bytes(ids) for kind, ids in raw.items()}
+
+    membership = {}
+    for kind, (app_label, model_name, field) in KINDS.items():
+        model = apps.get_model(app_label, model_name)
+        membership[kind] = IdSet(
+            model.objects.filter(user=user_id).values_list(field, flat=True)
+        )
+
+    cache.set(key, {kind: ids.to_bytes() for kind, ids in membership.items()})
+    return membership
@@ -0,0 +1,34 @@
+"""Модуль дополнительных операций миграций."""
+from django.db.migrations import AddIndex, RemoveIndex
+
+
+class PostgresAddIndex(AddIndex):
+    """Добавляет индекс только в PostgreSQL.
+
+    Для индексов, которые не поддерживаются другими СУБД (GIN и т.п.).
+    В остальных СУБД меняется только состояние моделей.
+    """
+
+    def database_forwards(self, app_label, schema_editor, *args) -> None:
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, *args)
+
+    def database_backwards(self, app_label, schema_editor, *args) -> None:
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, *args)
+
+
+class PostgresRemoveIndex(RemoveIndex):
+    """Удаляет индекс, добавленный `PostgresAddIndex`.
+
+    В остальных СУБД меняется только состояние моделей.
+    """
+
+    def database_forwards(self, app_label, schema_editor, *args) -> None:
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, *args)
+
+    def database_backwards(self, app_label, schema_editor, *args) -> None:
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, *args)
+
@@ -0,0 +1,95 @@
+"""Модуль пагинатора с экономным подсчётом объектов.
+
+Пагинатор используется страницами API и списками объектов в админке.
+"""
+from core.enums import Limits
+from django.core.cache import cache
+from django.core.paginator import (
+    EmptyPage,
+    Page,
+    PageNotAnInteger,
+    Paginator,
+)
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+class CountCachePaginator(Paginator):
+    """Django-пагинатор с экономным подсчётом объектов.
+
+    Если передан ключ `count_key`, количество берётся из кэша и
+    считается только при его отсутствии. Иначе подсчёт ограничен
+    `max_exact_count` объектами: при превышении возвращается
+    предельное значение, а `count_exact` принимает значение False.
+    Страницы за пределом подсчёта при этом остаются доступны: их наличие
+    определяется выборкой страницы с одним лишним объектом.
+
+    Attrs:
+        count_key (str | None):
+            Ключ кэша для количества объектов.
+        count_exact (bool):
+            Точное ли значение `count`.
+        max_exact_count (int):
+            Предел подсчёта объектов без ключа кэша.
+    """
+
+    max_exact_count = Limits.MAX_EXACT_COUNT.value
+
+    def __init__(self, *args, count_key: str | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.count_key = count_key
+        self.count_exact = True
+        # Номер последней страницы, наличие которой подтвердила выборка.
+        self.seen_pages = 0
+
+    @cached_property
+    def count(self) -> int:
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+
+        if self.count_key is not None:
+            count = cache.get(self.count_key)
+            if count is None:
+                count = self.object_list.count()
+                cache.set(self.count_key, count)
+            return count
+
+        bound = self.max_exact_count
+        count = self.object_list[: bound + 1].count()
+        self.count_exact = count <= bound
+        return min(count, bound)
+
+    @property
+    def num_pages(self) -> int:
+        pages = super().num_pages
+        if self.count_exact:
+            return pages
+        return max(pages, self.seen_pages)
+
+    def validate_number(self, number: int | str) -> int:
+        # `count` вычисляется до проверки `count_exact`.
+        if not self.count or self.count_exact:
+            return super().validate_number(number)
+
+        # Верхняя граница номера неизвестна, её проверяет `page`.
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number: int | str) -> Page:
+        number = self.validate_number(number)
+        if self.count_exact:
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not objects and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+
+        has_next = len(objects) > self.per_page
+        self.seen_pages = max(self.seen_pages, number + has_next)
+        return self._get_page(objects[: self.per_page], number, self)
@@ -0,0 +1,545 @@
+"""Модуль потоковой записи PDF-документов из строк текста.
+
+Документ отдаётся частями по мере формирования страниц: в памяти
+хранится только текущая страница, номера и смещения объектов
+и использованные глифы. После страниц в документ встраивается
+подмножество шрифта только с использованными глифами. Все потоки
+сжимаются (`FlateDecode`).
+
+Стандартные шрифты PDF не содержат кириллицы, поэтому используется
+шрифт TrueType (`CIDFontType2`, кодировка `Identity-H`). Для поиска
+и копирования текста в документ добавляется таблица `ToUnicode`.
+"""
+import re
+import struct
+import zlib
+from bisect import bisect_left
+from hashlib import md5
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+# Размер страницы A4 в пунктах
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 50
+FONT_SIZE = 11
+LEADING = 14
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+# Ширина текста на странице в пунктах
+TEXT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+# Таблицы шрифта, нужные для вывода глифов по номерам
+SUBSET_TABLES = (
+    b"OS/2",
+    b"cmap",
+    b"cvt ",
+    b"fpgm",
+    b"glyf",
+    b"head",
+    b"hhea",
+    b"hmtx",
+    b"loca",
+    b"maxp",
+    b"prep",
+)
+
+# Номера объектов документа. Страницы и их содержимое нумеруются
+# парами начиная с `FIRST_PAGE`.
+CATALOG, PAGES, FONT, CID_FONT, DESCRIPTOR, FONT_FILE, TO_UNICODE = range(
+    1, 8
+)
+FIRST_PAGE = 8
+
+
+def checksum(data: bytes) -> int:
+    """Контрольная сумма таблицы TrueType.
+
+    Args:
+        data (bytes): Данные таблицы.
+
+    Returns:
+        int: Сумма 32-битных слов данных.
+    """
+    data += b"\0" * (-len(data) % 4)
+    return sum(struct.unpack(f">{len(data) // 4}I", data)) & 0xFFFFFFFF
+
+
+def pack_font(tables: dict[bytes, bytes]) -> bytes:
+    """Собирает файл шрифта TrueType из таблиц.
+
+    Args:
+        tables (dict[bytes, bytes]): Данные таблиц по тэгам.
+
+    Returns:
+        bytes: Файл шрифта.
+    """
+    count = len(tables)
+    power = 1 << (count.bit_length() - 1)
+    directory = [
+        struct.pack(
+            ">IHHHH",
+            0x00010000,
+            count,
+            power * 16,
+            power.bit_length() - 1,
+            (count - power) * 16,
+        )
+    ]
+    body = []
+    offset = 12 + 16 * count
+    for tag in sorted(tables):
+        data = tables[tag]
+        if tag == b"head":
+            head_offset = offset
+        directory.append(
+            struct.pack(">4sIII", tag, checksum(data), offset, len(data))
+        )
+        body.append(data + b"\0" * (-len(data) % 4))
+        offset += len(body[-1])
+
+    font = bytearray(b"".join(directory + body))
+    # Поле `checkSumAdjustment` таблицы `head` дополняет сумму файла
+    # до константы из спецификации.
+    adjustment = (0xB1B0AFBA - checksum(bytes(font))) & 0xFFFFFFFF
+    font[head_offset + 8 : head_offset + 12] = struct.pack(">I", adjustment)
+    return bytes(font)
+
+
+class TrueTypeFont:
+    """Шрифт TrueType.
+
+    Из файла читаются только таблицы, нужные для вывода текста:
+    соответствие символов глифам (`cmap`, формат 4), ширины глифов
+    и метрики шрифта.
+
+    Attrs:
+        path (Path): Путь к файлу шрифта.
+        name (str): Название шрифта для документа.
+        size (int): Размер файла шрифта в байтах.
+        units (int): Количество единиц шрифта на кегль.
+        bbox (tuple[int]): Габариты глифов шрифта.
+        ascent (int): Высота над базовой линией.
+        descent (int): Глубина под базовой линией.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.name = re.sub(r"[^A-Za-z0-9-]", "", self.path.stem) or "Font"
+        self.size = self.path.stat().st_size
+
+        with open(self.path, "rb") as file:
+            self._tables = self._read_directory(file)
+            head = self._read_table(file, self._tables, b"head")
+            hhea = self._read_table(file, self._tables, b"hhea")
+            maxp = self._read_table(file, self._tables, b"maxp")
+            self._hmtx = self._read_table(file, self._tables, b"hmtx")
+            cmap = self._read_table(file, self._tables, b"cmap")
+
+        self.units = struct.unpack(">H", head[18:20])[0]
+        self.bbox = struct.unpack(">4h", head[36:44])
+        self.ascent, self.descent = struct.unpack(">2h", hhea[4:8])
+        self._metrics_count = struct.unpack(">H", hhea[34:36])[0]
+        self._long_loca = struct.unpack(">h", head[50:52])[0] == 1
+        self._glyph_count = struct.unpack(">H", maxp[4:6])[0]
+        self._read_cmap(cmap)
+        self._glyphs: dict[str, int] = {}
+
+    def glyph(self, char: str) -> int:
+        """Номер глифа символа, 0 - если символа нет в шрифте.
+
+        Args:
+            char (str): Символ.
+
+        Returns:
+            int: Номер глифа.
+        """
+        if char not in self._glyphs:
+            self._glyphs[char] = self._lookup(ord(char))
+        return self._glyphs[char]
+
+    def width(self, glyph: int) -> int:
+        """Ширина глифа в тысячных долях кегля.
+
+        Args:
+            glyph (int): Номер глифа.
+
+        Returns:
+            int: Ширина глифа.
+        """
+        idx = min(glyph, self._metrics_count - 1) * 4
+        advance = struct.unpack(">H", self._hmtx[idx : idx + 2])[0]
+        return advance * 1000 // self.units
+
+    def scale(self, value: int) -> int:
+        return value * 1000 // self.units
+
+    def subset(self, glyphs: Iterable[int]) -> bytes:
+        """Файл шрифта, содержащий только указанные глифы.
+
+        Номера глифов не меняются: контуры остальных глифов удаляются,
+        а к составным глифам добавляются их части. Контуры читаются
+        из файла шрифта по одному.
+
+        Args:
+            glyphs (Iterable[int]): Номера глифов.
+
+        Returns:
+            bytes: Файл шрифта.
+        """
+        with open(self.path, "rb") as file:
+            if b"glyf" not in self._tables:
+                raise ValueError(f"В шрифте {self.path} нет контуров glyf")
+
+            loca = self._read_table(file, self._tables, b"loca")
+            fmt = f">{self._glyph_count + 1}{'I' if self._long_loca else 'H'}"
+            offsets = struct.unpack(fmt, loca[: struct.calcsize(fmt)])
+            if not self._long_loca:
+                offsets = tuple(offset * 2 for offset in offsets)
+
+            outlines = {}
+            pending = {0, *glyphs}
+            while pending:
+                glyph = pending.pop()
+                if glyph in outlines or glyph >= self._glyph_count:
+                    continue
+                file.seek(self._tables[b"glyf"][0] + offsets[glyph])
+                outlines[glyph] = file.read(
+                    offsets[glyph + 1] - offsets[glyph]
+                )
+                pending.update(self._components(outlines[glyph]))
+
+            tables = {
+                tag: self._read_table(file, self._tables, tag)
+                for tag in SUBSET_TABLES
+                if tag in self._tables
+            }
+
+        glyf, loca = [], [0]
+        for glyph in range(self._glyph_count):
+            outline = outlines.get(glyph, b"")
+            glyf.append(outline + b"\0" * (-len(outline) % 4))
+            loca.append(loca[-1] + len(glyf[-1]))
+
+        # Смещения в `loca` записываются 32-битными (`indexToLocFormat`)
+        head = tables[b"head"]
+        tables[b"head"] = head[:50] + struct.pack(">h", 1) + head[52:]
+        tables[b"loca"] = struct.pack(f">{len(loca)}I", *loca)
+        tables[b"glyf"] = b"".join(glyf)
+        return pack_font(tables)
+
+    @staticmethod
+    def _components(outline: bytes) -> list[int]:
+        # У составного глифа отрицательное количество контуров
+        if len(outline) < 10 or struct.unpack(">h", outline[:2])[0] >= 0:
+            return []
+
+        components = []
+        pos = 10
+        while True:
+            flags, glyph = struct.unpack(">HH", outline[pos : pos + 4])
+            components.append(glyph)
+            # ARG_1_AND_2_ARE_WORDS
+            pos += 8 if flags & 0x1 else 6
+            # WE_HAVE_A_SCALE, WE_HAVE_AN_X_AND_Y_SCALE, WE_HAVE_A_TWO_BY_TWO
+            if flags & 0x8:
+                pos += 2
+            elif flags & 0x40:
+                pos += 4
+            elif flags & 0x80:
+                pos += 8
+            # MORE_COMPONENTS
+            if not flags & 0x20:
+                return components
+
+    def _read_directory(self, file: BinaryIO) -> dict[bytes, tuple[int, int]]:
+        count = struct.unpack(">H", file.read(6)[4:6])[0]
+        file.seek(12)
+        tables = {}
+        for _ in range(count):
+            tag, _, offset, length = struct.unpack(">4sIII", file.read(16))
+            tables[tag] = (offset, length)
+        return tables
+
+    def _read_table(
+        self, file: BinaryIO, tables: dict[bytes, tuple[int, int]], tag: bytes
+    ) -> bytes:
+        if tag not in tables:
+            raise ValueError(f"В шрифте {self.path} нет таблицы {tag!r}")
+        offset, length = tables[tag]
+        file.seek(offset)
+        return file.read(length)
+
+    def _read_cmap(self, cmap: bytes) -> None:
+        count = struct.unpack(">H", cmap[2:4])[0]
+        subtables = {}
+        for idx in range(count):
+            platform, encoding, offset = struct.unpack(
+                ">HHI", cmap[4 + idx * 8 : 12 + idx * 8]
+            )
+            if struct.unpack(">H", cmap[offset : offset + 2])[0] == 4:
+                subtables[(platform, encoding)] = offset
+
+        offset = subtables.get((3, 1), next(iter(subtables.values()), None))
+        if offset is None:
+            raise ValueError(f"В шрифте {self.path} нет таблицы cmap 4")
+
+        segments = struct.unpack(">H", cmap[offset + 6 : offset + 8])[0] // 2
+        start = offset + 14
+
+        def array(idx: int, fmt: str = "H") -> tuple[int, ...]:
+            # Массивы идут подряд, после `endCode` - 2 байта `reservedPad`
+            pos = start + idx * segments * 2 + (2 if idx else 0)
+            return struct.unpack(
+                f">{segments}{fmt}", cmap[pos : pos + segments * 2]
+            )
+
+        self._ends = array(0)
+        self._starts = array(1)
+        self._deltas = array(2, "h")
+        self._range_offsets = array(3)
+        self._glyph_array_start = start + 4 * segments * 2 + 2
+        self._cmap = cmap
+        self._segments = segments
+
+    def _lookup(self, code: int) -> int:
+        idx = bisect_left(self._ends, code)
+        if idx == self._segments or self._starts[idx] > code:
+            return 0
+
+        range_offset = self._range_offsets[idx]
+        if range_offset == 0:
+            return (code + self._deltas[idx]) & 0xFFFF
+
+        pos = (
+            self._glyph_array_start
+            + range_offset
+            + (code - self._starts[idx]) * 2
+            - (self._segments - idx) * 2
+        )
+        glyph = struct.unpack(">H", self._cmap[pos : pos + 2])[0]
+        return (glyph + self._deltas[idx]) & 0xFFFF if glyph else 0
+
+
+class PDFWriter:
+    """Потоковая запись PDF-документа.
+
+    Example:
+        >>> writer = PDFWriter(TrueTypeFont("DejaVuSans.ttf"))
+        >>> pdf = b"".join(writer.render(("Список покупок", "соль: 5 г")))
+    """
+
+    def __init__(self, font: TrueTypeFont) -> None:
+        self.font = font
+        self.position = 0
+        self.offsets: dict[int, int] = {}
+        # Использованные глифы и их символы
+        self.used: dict[int, str] = {}
+
+    def render(self, lines: Iterable[str]) -> Iterator[bytes]:
+        """Формирует документ из строк текста.
+
+        Строки шире страницы переносятся по ширине глифов шрифта,
+        страницы добавляются по мере заполнения.
+
+        Args:
+            lines (Iterable[str]): Строки текста.
+
+        Yields:
+            bytes: Части документа.
+        """
+        yield self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+        pages = []
+        page_lines = []
+        for line in lines:
+            for part in self._wrap(line):
+                page_lines.append(part)
+                if len(page_lines) == LINES_PER_PAGE:
+                    pages.append(FIRST_PAGE + len(pages) * 2)
+                    yield self._page(pages[-1], page_lines)
+                    page_lines = []
+
+        if page_lines or not pages:
+            pages.append(FIRST_PAGE + len(pages) * 2)
+            yield self._page(pages[-1], page_lines)
+
+        yield self._object(CATALOG, b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = b" ".join(b"%d 0 R" % number for number in pages)
+        yield self._object(
+            PAGES,
+            b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(pages)),
+        )
+        yield self._font_file()
+        yield self._fonts()
+        yield self._xref(pages[-1] + 2)
+
+    def _width(self, text: str) -> int:
+        return sum(self.font.width(self.font.glyph(char)) for char in text)
+
+    def _wrap(self, line: str) -> list[str]:
+        """Разбивает строку на части не шире текста на странице.
+
+        Строка переносится по пробелам, слово шире страницы
+        разбивается по символам.
+
+        Args:
+            line (str): Строка текста.
+
+        Returns:
+            list[str]: Части строки.
+        """
+        # Ширина текста в тысячных долях кегля, как и ширины глифов
+        limit = TEXT_WIDTH * 1000 // FONT_SIZE
+        space = self._width(" ")
+        parts, words, width = [], [], 0
+
+        for word in line.split():
+            size = self._width(word)
+            if words and (size > limit or width + space + size > limit):
+                parts.append(" ".join(words))
+                words, width = [], 0
+
+            if size > limit:
+                chunk, size = "", 0
+                for char in word:
+                    char_size = self._width(char)
+                    if chunk and size + char_size > limit:
+                        parts.append(chunk)
+                        chunk, size = "", 0
+                    chunk += char
+                    size += char_size
+                word = chunk
+
+            width += size + space if words else size
+            words.append(word)
+
+        if words or not parts:
+            parts.append(" ".join(words))
+        return parts
+
+    def _emit(self, data: bytes) -> bytes:
+        self.position += len(data)
+        return data
+
+    def _object(self, number: int, body: bytes) -> bytes:
+        self.offsets[number] = self.position
+        return self._emit(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+
+    def _stream(self, number: int, data: bytes, extra: bytes = b"") -> bytes:
+        data = zlib.compress(data, 9)
+        return self._object(
+            number,
+            b"<< /Length %d /Filter /FlateDecode%s >>\nstream\n%s\nendstream"
+            % (len(data), extra, data),
+        )
+
+    def _font_file(self) -> bytes:
+        font = self.font.subset(self.used)
+        return self._stream(FONT_FILE, font, b" /Length1 %d" % len(font))
+
+    def _encode(self, line: str) -> bytes:
+        codes = []
+        for char in line:
+            glyph = self.font.glyph(char)
+            self.used.setdefault(glyph, char)
+            codes.append(b"%04X" % glyph)
+        return b"".join(codes)
+
+    def _page(self, number: int, lines: list[str]) -> bytes:
+        text = b"".join(b"<%s> Tj T*\n" % self._encode(line) for line in lines)
+        content = b"BT\n/F1 %d Tf\n%d TL\n%d %d Td\n%sET" % (
+            FONT_SIZE,
+            LEADING,
+            MARGIN,
+            PAGE_HEIGHT - MARGIN - FONT_SIZE,
+            text,
+        )
+        page = (
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (PAGES, PAGE_WIDTH, PAGE_HEIGHT, FONT, number + 1)
+        )
+        return self._object(number, page) + self._stream(number + 1, content)
+
+    def _fonts(self) -> bytes:
+        font = self.font
+        # Название подмножества шрифта начинается с шести заглавных букв.
+        digest = md5(repr(sorted(self.used)).encode()).digest()
+        tag = bytes(65 + byte % 26 for byte in digest[:6])
+        name = b"%s+%s" % (tag, font.name.encode())
+        widths = b" ".join(
+            b"%d [%d]" % (glyph, font.width(glyph))
+            for glyph in sorted(self.used)
+        )
+        ascent, descent = font.scale(font.ascent), font.scale(font.descent)
+        bbox = b" ".join(b"%d" % font.scale(value) for value in font.bbox)
+
+        return b"".join(
+            (
+                self._object(
+                    FONT,
+                    b"<< /Type /Font /Subtype /Type0 /BaseFont /%s "
+                    b"/Encoding /Identity-H /DescendantFonts [%d 0 R] "
+                    b"/ToUnicode %d 0 R >>" % (name, CID_FONT, TO_UNICODE),
+                ),
+                self._object(
+                    CID_FONT,
+                    b"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /%s "
+                    b"/CIDSystemInfo << /Registry (Adobe) /Ordering "
+                    b"(Identity) /Supplement 0 >> /FontDescriptor %d 0 R "
+                    b"/CIDToGIDMap /Identity /W [%s] >>"
+                    % (name, DESCRIPTOR, widths),
+                ),
+                self._object(
+                    DESCRIPTOR,
+                    b"<< /Type /FontDescriptor /FontName /%s /Flags 32 "
+                    b"/FontBBox [%s] /ItalicAngle 0 /Ascent %d /Descent %d "
+                    b"/CapHeight %d /StemV 80 /FontFile2 %d 0 R >>"
+                    % (name, bbox, ascent, descent, ascent, FONT_FILE),
+                ),
+                self._stream(TO_UNICODE, self._to_unicode()),
+            )
+        )
+
+    def _to_unicode(self) -> bytes:
+        glyphs = sorted(self.used.items())
+        blocks = []
+        # В одном блоке `bfchar` не больше 100 записей
+        for start in range(0, len(glyphs), 100):
+            block = glyphs[start : start + 100]
+            entries = b"\n".join(
+                b"<%04X> <%s>"
+                % (glyph, char.encode("utf-16-be").hex().encode())
+                for glyph, char in block
+            )
+            blocks.append(
+                b"%d beginbfchar\n%s\nendbfchar" % (len(block), entries)
+            )
+
+        return b"\n".join(
+            (
+                b"/CIDInit /ProcSet findresource begin",
+                b"12 dict begin",
+                b"begincmap",
+                b"/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) "
+                b"/Supplement 0 >> def",
+                b"/CMapName /Adobe-Identity-UCS def",
+                b"/CMapType 2 def",
+                b"1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange",
+                *blocks,
+                b"endcmap",
+                b"CMapName currentdict /CMap defineresource pop",
+                b"end",
+                b"end",
+            )
+        )
+
+    def _xref(self, size: int) -> bytes:
+        position = self.position
+        entries = b"".join(
+            b"%010d 00000 n \n" % self.offsets[number]
+            for number in range(1, size)
+        )
+        return self._emit(
+            b"xref\n0 %d\n0000000000 65535 f \n%strailer\n"
+            b"<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (size, entries, size, CATALOG, position)
+        )
@@ -0,0 +1,199 @@
+"""Модуль фоновой обработки изображений рецептов.
+
+Сохранение рецепта с новым изображением только ставит его в очередь
+(`RecipeImage` в состоянии `pending`). Копии изображения создаёт
+команда `process_images`, запущенная отдельным процессом, поэтому
+ни создание, ни редактирование рецепта не тратят время воркеров
+gunicorn на обработку изображений.
+"""
+import logging
+from pathlib import PurePosixPath
+from typing import Iterable
+
+from core.cache import bump_versions
+from core.enums import CacheScopes, Tuples
+from core.images import process_image
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils import timezone
+from recipes.models import Recipe, RecipeImage
+
+logger = logging.getLogger(__name__)
+
+Status = RecipeImage.Status
+
+RENDITIONS_DIR = "recipe_images/renditions"
+
+
+def schedule_image(recipe: Recipe, created: bool) -> None:
+    """Ставит изображение рецепта в очередь, если оно изменилось.
+
+    Args:
+        recipe (Recipe): Сохранённый рецепт.
+        created (bool): Рецепт только что создан.
+    """
+    if created:
+        RecipeImage.objects.create(recipe=recipe, source=recipe.image.name)
+        return
+
+    updated = (
+        RecipeImage.objects.filter(recipe=recipe)
+        .exclude(source=recipe.image.name)
+        .update(source=recipe.image.name, status=Status.PENDING)
+    )
+    if updated:
+        # Загруженные вместе с рецептом копии относятся к прежнему
+        # изображению.
+        recipe._state.fields_cache.pop("renditions", None)
+
+
+def claim_image() -> RecipeImage | None:
+    """Забирает из очереди изображение для обработки.
+
+    Изображение переводится в состояние `running` условным `UPDATE`,
+    поэтому одно изображение не обрабатывается несколькими
+    обработчиками. Время изменения отмечает начало обработки.
+
+    Returns:
+        RecipeImage | None: Изображение либо None, если очередь пуста.
+    """
+    pending = RecipeImage.objects.filter(status=Status.PENDING)
+
+    for pk in pending.order_by("updated").values_list("pk", flat=True)[:10]:
+        if pending.filter(pk=pk).update(
+            status=Status.RUNNING, updated=timezone.now()
+        ):
+            return RecipeImage.objects.select_related("recipe").get(pk=pk)
+
+    return None
+
+
+def delete_files(storage: Storage, names: Iterable[str]) -> None:
+    """Удаляет файлы копий из хранилища.
+
+    Args:
+        storage (Storage): Хранилище медиа-файлов.
+        names (Iterable[str]): Пути к файлам.
+    """
+    for name in names:
+        storage.delete(name)
+
+
+def get_storage() -> Storage:
+    """Хранилище файлов изображений рецептов.
+
+    Returns:
+        Storage: Хранилище поля `Recipe.image`.
+    """
+    return Recipe._meta.get_field("image").storage
+
+
+def render_renditions(pk: int, source: str) -> tuple[dict[str, str], str]:
+    """Создаёт файлы копий изображения рецепта.
+
+    Изображение рецепта не изменяется, его уменьшенная копия без
+    метаданных сохраняется копией `image`. Функция не обращается к базе
+    данных, поэтому выполняется и в дочерних процессах команды
+    `backfill_renditions`.
+
+    Args:
+        pk (int): `id` рецепта.
+        source (str): Путь к изображению рецепта.
+
+    Raises:
+        Exception: Ошибка обработки. Созданные файлы удаляются.
+
+    Returns:
+        tuple[dict[str, str], str]: Пути к файлам копий и заглушка.
+    """
+    storage = get_storage()
+    files = {}
+
+    try:
+        with storage.open(source, "rb") as file:
+            processed = process_image(file, Tuples.RECIPE_IMAGE_SIZE.value)
+
+        stem = PurePosixPath(source).stem
+        for name, (data, extension) in processed.renditions.items():
+            files[name] = storage.save(
+                f"{RENDITIONS_DIR}/{pk}/{stem}_{name}.{extension}",
+                ContentFile(data),
+            )
+    except Exception:
+        delete_files(storage, files.values())
+        raise
+
+    return files, processed.placeholder
+
+
+def save_renditions(
+    image: RecipeImage, files: dict[str, str], placeholder: str
+) -> bool:
+    """Записывает созданные копии изображения.
+
+    Копии записываются, только если за время обработки изображение
+    рецепта не заменили, иначе их файлы удаляются, а новое изображение
+    остаётся в очереди. Файлы прежних копий удаляются.
+
+    Args:
+        image (RecipeImage): Изображение в состоянии `running`.
+        files (dict[str, str]): Пути к файлам копий.
+        placeholder (str): Заглушка.
+
+    Returns:
+        bool: True, если копии записаны.
+    """
+    storage = get_storage()
+    updated = RecipeImage.objects.filter(
+        pk=image.pk, source=image.source, status=Status.RUNNING
+    ).update(status=Status.DONE, files=files, placeholder=placeholder)
+    if not updated:
+        delete_files(storage, files.values())
+        return False
+
+    delete_files(storage, set(image.files.values()) - set(files.values()))
+    bump_versions(
+        CacheScopes.RECIPES.value, CacheScopes.RECIPE.value % image.pk
+    )
+    return True
+
+
+def fail_image(image: RecipeImage) -> None:
+    """Отмечает ошибку обработки изображения.
+
+    Args:
+        image (RecipeImage): Изображение в состоянии `running`.
+    """
+    RecipeImage.objects.filter(
+        pk=image.pk, source=image.source, status=Status.RUNNING
+    ).update(status=Status.FAILED)
+
+
+def run_image(image: RecipeImage) -> None:
+    """Создаёт копии изображения рецепта.
+
+    Args:
+        image (RecipeImage): Изображение в состоянии `running`.
+    """
+    try:
+        files, placeholder = render_renditions(image.pk, image.source)
+    except Exception:
+        logger.exception("Изображение рецепта %s не обработано", image.pk)
+        fail_image(image)
+        return
+
+    save_renditions(image, files, placeholder)
+
+
+def requeue_images() -> int:
+    """Возвращает в очередь незавершённые и необработанные изображения.
+
+    Нужно после аварийной остановки обработчика, когда изображения
+    остались в состоянии `running`.
+
+    Returns:
+        int: Количество изображений, возвращённых в очередь.
+    """
+    return RecipeImage.objects.filter(
+        status__in=(Status.RUNNING, Status.FAILED)
+    ).update(status=Status.PENDING)
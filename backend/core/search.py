@@ -0,0 +1,162 @@
+"""Модуль полнотекстового поиска рецептов.
+
+Поиск ведётся по названию рецепта, названиям его ингредиентов
+и описанию, результаты упорядочиваются по релевантности.
+
+В PostgreSQL поисковые векторы (`tsvector` со стеммингом русского языка)
+хранятся в модели `RecipeSearch` с GIN-индексом. В SQLite, используемой
+для локальной разработки, вместо них ведётся таблица FTS5
+`recipes_recipe_fts`. Для остальных СУБД используется поиск
+по вхождению подстроки в название.
+
+Индекс обновляется сигналами после фиксации транзакции, в которой
+изменены рецепт, его ингредиенты или названия ингредиентов.
+"""
+import re
+from typing import Iterable
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, QuerySet, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from recipes.models import AmountIngredient, Recipe, RecipeSearch
+
+SEARCH_CONFIG = "russian"
+FTS_TABLE = "recipes_recipe_fts"
+# Веса столбцов FTS5 для `bm25`: название, ингредиенты, описание.
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+
+
+def update_search_index(ids: Iterable[int]) -> None:
+    """Пересчитывает поисковый индекс рецептов.
+
+    Записи удалённых рецептов удаляются из индекса.
+
+    Args:
+        ids (Iterable[int]): `id` рецептов.
+    """
+    ids = list(set(ids))
+    if not ids:
+        return
+
+    if connection.vendor == "postgresql":
+        _update_postgresql(ids)
+    elif connection.vendor == "sqlite":
+        _update_sqlite(ids)
+
+
+def schedule_search_update(ids: Iterable[int]) -> None:
+    """Обновляет поисковый индекс после фиксации текущей транзакции.
+
+    Args:
+        ids (Iterable[int]): `id` рецептов.
+    """
+    ids = list(ids)
+    transaction.on_commit(lambda: update_search_index(ids))
+
+
+def search_recipes(queryset: QuerySet[Recipe], text: str) -> QuerySet[Recipe]:
+    """Ищет рецепты по тексту запроса.
+
+    Результаты упорядочиваются по релевантности (аннотация `search_rank`),
+    при равной релевантности - от новых к старым.
+
+    Args:
+        queryset (QuerySet[Recipe]): Рецепты, среди которых ведётся поиск.
+        text (str): Текст поискового запроса.
+
+    Returns:
+        QuerySet[Recipe]: Найденные рецепты.
+    """
+    if connection.vendor == "postgresql":
+        query = SearchQuery(
+            text, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        queryset = queryset.filter(search__vector=query).annotate(
+            search_rank=SearchRank(F("search__vector"), query)
+        )
+    elif connection.vendor == "sqlite":
+        words = re.findall(r"\w+", text.lower())
+        if not words:
+            return queryset.none()
+
+        match = " ".join(f'"{word}"*' for word in words)
+        weights = ", ".join(map(str, FTS_WEIGHTS))
+        table = Recipe._meta.db_table
+        queryset = queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                (match,),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                (match,),
+            )
+        )
+    else:
+        return queryset.filter(name__icontains=text)
+
+    return queryset.order_by("-search_rank", *Recipe._meta.ordering)
+
+
+def _update_postgresql(ids: list[int]) -> None:
+    existing = Recipe.objects.filter(pk__in=ids).values_list("pk", flat=True)
+    RecipeSearch.objects.bulk_create(
+        (RecipeSearch(recipe_id=pk) for pk in existing),
+        ignore_conflicts=True,
+    )
+
+    recipe = Recipe.objects.filter(pk=OuterRef("recipe_id"))
+    ingredients = (
+        AmountIngredient.objects.filter(recipe=OuterRef("recipe_id"))
+        .values("recipe")
+        .annotate(names=StringAgg("ingredients__name", " "))
+        .values("names")
+    )
+    RecipeSearch.objects.filter(recipe__in=ids).update(
+        vector=(
+            SearchVector(
+                Subquery(recipe.values("name")),
+                weight="A",
+                config=SEARCH_CONFIG,
+            )
+            + SearchVector(
+                Coalesce(Subquery(ingredients), Value("")),
+                weight="B",
+                config=SEARCH_CONFIG,
+            )
+            + SearchVector(
+                Subquery(recipe.values("text")),
+                weight="C",
+                config=SEARCH_CONFIG,
+            )
+        )
+    )
+
+
+def _update_sqlite(ids: list[int]) -> None:
+    placeholders = ", ".join("%s" for _ in ids)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", ids
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text) "
+            "SELECT r.id, r.name, COALESCE(("
+            "    SELECT group_concat(i.name, ' ')"
+            "    FROM recipes_amountingredient a"
+            "    JOIN recipes_ingredient i ON i.id = a.ingredients_id"
+            "    WHERE a.recipe_id = r.id"
+            "), ''), r.text "
+            f"FROM recipes_recipe r WHERE r.id IN ({placeholders})",
+            ids,
+        )
@@ -1,17 +1,20 @@
 """Модуль вспомогательных функций.
 """
-from datetime import datetime as dt
-from typing import TYPE_CHECKING
 from urllib.parse import unquote
 
-from django.apps import apps
-from django.db.models import F, Sum
-from foodgram.settings import DATE_TIME_FORMAT
-from recipes.models import AmountIngredient, Recipe
+from core.cache import get_versions
+from core.cart_totals import recipe_ingredients_changed
+from core.enums import CacheScopes, Limits
+from core.ingredient_index import IngredientIndex
+from core.membership import IdSet, get_membership
+from core.tag_registry import TagRegistry
+from django.db import DatabaseError, connections
+from recipes.models import AmountIngredient, Ingredient, Recipe, Tag
 
-if TYPE_CHECKING:
-    from recipes.models import Ingredient
-    from users.models import MyUser
+# Индекс ингредиентов текущего процесса
+_ingredient_index: IngredientIndex | None = None
+# Реестр тэгов текущего процесса
+_tag_registry: TagRegistry | None = None
 
 
 def recipe_ingredients_set(
@@ -38,58 +41,10 @@ def recipe_ingredients_set(
         )
 
     AmountIngredient.objects.bulk_create(objs)
-
-
-def create_shoping_list(user: "MyUser") -> str:
-    """Сфомировать список ингридкетов для покупки.
-
-    Args:
-        user (MyUser):
-            Пользователь, для которго будет создаваться список.
-
-    Returns:
-        str:
-            Список продуктов с указанием необходимого количества.
-    """
-    shopping_list = [
-        f"Список покупок для:\n\n{user.first_name}\n"
-        f"{dt.now().strftime(DATE_TIME_FORMAT)}\n"
-    ]
-    Ingredient = apps.get_model("recipes", "Ingredient")
-    ingredients = (
-        Ingredient.objects.filter(recipe__recipe__in_carts__user=user)
-        .values("name", measurement=F("measurement_unit"))
-        .annotate(amount=Sum("recipe__amount"))
-    )
-    ing_list = (
-        f'{ing["name"]}: {ing["amount"]} {ing["measurement"]}'
-        for ing in ingredients
+    # `bulk_create` не отправляет сигналы, суммы корзин обновляются здесь.
+    recipe_ingredients_changed(
+        recipe.pk, {obj.ingredients.pk: obj.amount for obj in objs}
     )
-    shopping_list.extend(ing_list)
-
-    # ###########   Пример с использованием сырого SQL   ############ #
-    # ingredients = Ingredient.objects.raw('''                        #
-    # SELECT                                                          #
-    #     ing.id,                                                     #
-    #     ing.name AS name,                                           #
-    #     ing.measurement_unit AS measurement,                        #
-    #     SUM(ai.amount) AS amount                                    #
-    # FROM recipes_ingredient AS ing                                  #
-    # JOIN recipes_amountingredient AS ai ON ai.ingredients_id=ing.id #
-    # JOIN recipes_recipe AS rcp ON ai.recipe_id=rcp.id               #
-    # JOIN recipes_carts AS crt ON crt.recipe_id=rcp.id               #
-    # WHERE crt.user_id=%s                                            #
-    # GROUP BY ing.id, ing.name;                                      #
-    # ''', (user.id,))                                                #
-    #                                                                 #
-    # for ing in ingredients:                                         #
-    #     shopping_list.append(                                       #
-    #         f'{ing.name}: {ing.amount} {ing.measurement}'           #
-    #     )                                                           #
-    ###################################################################
-
-    shopping_list.append("\nПосчитано в Foodgram")
-    return "\n".join(shopping_list)
 
 
 def maybe_incorrect_layout(url_string: str) -> str:
@@ -109,3 +64,99 @@ def maybe_incorrect_layout(url_string: str) -> str:
         return unquote(url_string).lower()
 
     return url_string.translate(equals).lower()
+
+
+def get_ingredient_index() -> IngredientIndex:
+    """Получает индекс ингредиентов текущего процесса.
+
+    Индекс строится при первом обращении и заново после изменения
+    ингредиентов, которое определяется по версии раздела
+    `CacheScopes.INGREDIENTS`.
+
+    Returns:
+        IngredientIndex: Индекс ингредиентов.
+    """
+    global _ingredient_index
+
+    version = get_versions(CacheScopes.INGREDIENTS.value)[0]
+    if _ingredient_index is None or _ingredient_index.version != version:
+        _ingredient_index = IngredientIndex(
+            Ingredient.objects.values_list("id", "name", "measurement_unit"),
+            version,
+        )
+
+    return _ingredient_index
+
+
+def search_ingredients(name: str) -> list[Ingredient]:
+    """Ищет ингредиенты по названию в индексе текущего процесса.
+
+    Поиск ведётся по исходной строке и по строке, набранной
+    в неправильной раскладке (см. `maybe_incorrect_layout`).
+    Сначала выводятся совпадения в начале названия, затем в середине.
+    Количество результатов ограничено `Limits.INGREDIENT_SEARCH_LIMIT`.
+
+    Args:
+        name (str): Искомая строка.
+
+    Returns:
+        list[Ingredient]: Найденные ингредиенты (без обращения к БД).
+    """
+    rows = get_ingredient_index().search(
+        (name.lower(), maybe_incorrect_layout(name)),
+        Limits.INGREDIENT_SEARCH_LIMIT.value,
+    )
+    return [
+        Ingredient(id=pk, name=ingredient, measurement_unit=unit)
+        for pk, ingredient, unit in rows
+    ]
+
+
+def preload_ingredient_index() -> None:
+    """Строит индекс ингредиентов при запуске приложения.
+
+    При запуске gunicorn с `--preload` индекс строится в главном процессе
+    и достаётся воркерам при форке без копирования (copy-on-write).
+    Соединения с БД закрываются, чтобы воркеры не получили общее
+    соединение главного процесса.
+    """
+    try:
+        get_ingredient_index()
+    except DatabaseError:
+        # База данных ещё не готова, индекс построится при первом запросе.
+        pass
+    finally:
+        connections.close_all()
+
+
+def get_tag_registry() -> TagRegistry:
+    """Получает реестр тэгов текущего процесса.
+
+    Реестр строится при первом обращении и заново после изменения
+    тэгов в любом из процессов, которое определяется по версии раздела
+    `CacheScopes.TAGS`.
+
+    Returns:
+        TagRegistry: Реестр тэгов.
+    """
+    global _tag_registry
+
+    version = get_versions(CacheScopes.TAGS.value)[0]
+    if _tag_registry is None or _tag_registry.version != version:
+        _tag_registry = TagRegistry(Tag.objects.all(), version)
+
+    return _tag_registry
+
+
+def get_user_membership(user_id: int) -> dict[str, IdSet]:
+    """Получает актуальные списки связей пользователя.
+
+    Args:
+        user_id (int): `id` пользователя.
+
+    Returns:
+        dict[str, IdSet]:
+            Избранное, список покупок и подписки пользователя.
+    """
+    version = get_versions(CacheScopes.USER.value % user_id)[0]
+    return get_membership(user_id, version)
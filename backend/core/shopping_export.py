@@ -0,0 +1,226 @@
+"""Модуль выгрузки списка покупок в файлы.
+
+Список формируется в форматах txt, csv, json и pdf. Файл отдаётся
+частями: ингредиенты читаются из `CartIngredient` курсором
+(`QuerySet.iterator`, в PostgreSQL - курсор на стороне сервера)
+и сразу записываются в выходной поток, поэтому расход памяти
+не зависит от размера корзины.
+"""
+import csv
+import json
+from datetime import datetime as dt
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, NamedTuple
+
+from core.pdf import PDFWriter, TrueTypeFont
+from django.conf import settings
+from foodgram.settings import DATE_TIME_FORMAT
+from recipes.models import CartIngredient
+
+if TYPE_CHECKING:
+    from users.models import MyUser
+
+# Количество ингредиентов, читаемых из курсора за один раз
+CURSOR_CHUNK_SIZE = 500
+# Размер частей, на которые делится выходной поток, в байтах
+BUFFER_SIZE = 16 * 1024
+
+# Ингредиент: (название, количество, единица измерения)
+Item = tuple[str, int, str]
+
+
+class ExportFormat(NamedTuple):
+    content_type: str
+    export: Callable[["MyUser"], Iterator[bytes]]
+
+
+def shopping_list_items(user: "MyUser") -> Iterator[Item]:
+    """Ингредиенты из корзины пользователя в порядке названий.
+
+    Args:
+        user (MyUser): Владелец корзины.
+
+    Returns:
+        Iterator[Item]: Ингредиенты.
+    """
+    return (
+        CartIngredient.objects.filter(user=user)
+        .order_by("ingredient__name")
+        .values_list(
+            "ingredient__name", "amount", "ingredient__measurement_unit"
+        )
+        .iterator(chunk_size=CURSOR_CHUNK_SIZE)
+    )
+
+
+def shopping_list_lines(user: "MyUser") -> Iterator[str]:
+    """Строки текстового списка покупок.
+
+    Args:
+        user (MyUser): Владелец корзины.
+
+    Yields:
+        str: Строки списка.
+    """
+    yield "Список покупок для:"
+    yield ""
+    yield user.first_name
+    yield dt.now().strftime(DATE_TIME_FORMAT)
+    yield ""
+    for name, amount, measurement in shopping_list_items(user):
+        yield f"{name}: {amount} {measurement}"
+    yield ""
+    yield "Посчитано в Foodgram"
+
+
+def buffered(parts: Iterable[str | bytes]) -> Iterator[bytes]:
+    """Объединяет мелкие части выходного потока.
+
+    Args:
+        parts (Iterable[str | bytes]): Части потока.
+
+    Yields:
+        bytes: Части размером не меньше `BUFFER_SIZE`, кроме последней.
+    """
+    buffer = bytearray()
+    for part in parts:
+        buffer += part.encode() if isinstance(part, str) else part
+        if len(buffer) >= BUFFER_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def export_txt(user: "MyUser") -> Iterator[bytes]:
+    """Список покупок в текстовом файле.
+
+    Args:
+        user (MyUser): Владелец корзины.
+
+    Yields:
+        bytes: Части файла.
+    """
+    yield from buffered(
+        line if idx == 0 else f"\n{line}"
+        for idx, line in enumerate(shopping_list_lines(user))
+    )
+
+
+class _Echo:
+    """Файл для `csv.writer`, возвращающий записываемую строку."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def export_csv(user: "MyUser") -> Iterator[bytes]:
+    """Список покупок в файле CSV.
+
+    Файл начинается с BOM, чтобы Excel распознал кодировку UTF-8.
+
+    Args:
+        user (MyUser): Владелец корзины.
+
+    Yields:
+        bytes: Части файла.
+    """
+    writer = csv.writer(_Echo())
+
+    def rows() -> Iterator[str]:
+        yield "\ufeff"
+        yield writer.writerow(("Ингредиент", "Количество", "Единица"))
+        for item in shopping_list_items(user):
+            yield writer.writerow(item)
+
+    yield from buffered(rows())
+
+
+def export_json(user: "MyUser") -> Iterator[bytes]:
+    """Список покупок в файле JSON.
+
+    Args:
+        user (MyUser): Владелец корзины.
+
+    Yields:
+        bytes: Части файла.
+    """
+    head = json.dumps(
+        {"user": user.first_name, "date": dt.now().isoformat()},
+        ensure_ascii=False,
+    )
+
+    def parts() -> Iterator[str]:
+        yield f'{head[:-1]}, "ingredients": ['
+        for idx, (name, amount, measurement) in enumerate(
+            shopping_list_items(user)
+        ):
+            item = json.dumps(
+                {
+                    "name": name,
+                    "amount": amount,
+                    "measurement_unit": measurement,
+                },
+                ensure_ascii=False,
+            )
+            yield item if idx == 0 else f", {item}"
+        yield "]}"
+
+    yield from buffered(parts())
+
+
+@lru_cache
+def get_pdf_font(path: str) -> TrueTypeFont | None:
+    """Загружает шрифт для PDF.
+
+    Args:
+        path (str): Путь к файлу шрифта TrueType.
+
+    Returns:
+        TrueTypeFont | None: Шрифт либо None, если файла нет.
+    """
+    if not Path(path).is_file():
+        return None
+    return TrueTypeFont(path)
+
+
+def export_pdf(user: "MyUser") -> Iterator[bytes]:
+    """Список покупок в файле PDF.
+
+    Args:
+        user (MyUser): Владелец корзины.
+
+    Yields:
+        bytes: Части файла.
+    """
+    writer = PDFWriter(get_pdf_font(settings.PDF_FONT_PATH))
+    yield from buffered(writer.render(shopping_list_lines(user)))
+
+
+FORMATS = {
+    "txt": ExportFormat("text/plain; charset=utf-8", export_txt),
+    "csv": ExportFormat("text/csv; charset=utf-8", export_csv),
+    "json": ExportFormat("application/json", export_json),
+    "pdf": ExportFormat("application/pdf", export_pdf),
+}
+
+
+def available_formats() -> list[str]:
+    """Форматы, в которых можно выгрузить список покупок.
+
+    Формат pdf доступен только при наличии файла шрифта
+    `PDF_FONT_PATH`.
+
+    Returns:
+        list[str]: Названия форматов.
+    """
+    return [
+        name
+        for name in FORMATS
+        if name != "pdf" or get_pdf_font(settings.PDF_FONT_PATH)
+    ]
+
+
+def shopping_list_filename(user: "MyUser", file_format: str) -> str:
+    return f"{user.username}_shopping_list.{file_format}"
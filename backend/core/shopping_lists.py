@@ -0,0 +1,115 @@
+"""Модуль фонового формирования списков покупок.
+
+Запрос на список покупок для большой корзины создаёт задание
+`ShoppingListJob` и сразу возвращает его `id`. Задания выполняет
+команда `process_shopping_lists`, запущенная отдельным процессом,
+поэтому формирование файла не занимает воркеры gunicorn. Готовый файл
+сохраняется в медиа-файлы и отдаётся nginx (`X-Accel-Redirect`).
+"""
+import logging
+from datetime import timedelta
+from tempfile import TemporaryFile
+
+from core.shopping_export import FORMATS
+from django.core.files import File
+from django.utils import timezone
+from recipes.models import ShoppingListJob
+
+logger = logging.getLogger(__name__)
+
+Status = ShoppingListJob.Status
+
+
+def enqueue_shopping_list(user_id: int, file_format: str) -> ShoppingListJob:
+    """Создаёт задание на формирование списка покупок.
+
+    Если у пользователя уже есть задание в очереди на файл того же
+    формата, возвращается оно.
+
+    Args:
+        user_id (int): `id` владельца корзины.
+        file_format (str): Формат файла.
+
+    Returns:
+        ShoppingListJob: Задание.
+    """
+    job = ShoppingListJob.objects.filter(
+        user=user_id, status=Status.PENDING, file_format=file_format
+    ).first()
+    if job is None:
+        job = ShoppingListJob.objects.create(
+            user_id=user_id, file_format=file_format
+        )
+    return job
+
+
+def claim_job() -> ShoppingListJob | None:
+    """Забирает из очереди самое старое задание.
+
+    Задание переводится в состояние `running` условным `UPDATE`,
+    поэтому одно задание не выполняется несколькими обработчиками.
+
+    Returns:
+        ShoppingListJob | None: Задание либо None, если очередь пуста.
+    """
+    pending = ShoppingListJob.objects.filter(status=Status.PENDING)
+
+    for pk in pending.values_list("pk", flat=True)[:10]:
+        if pending.filter(pk=pk).update(status=Status.RUNNING):
+            return ShoppingListJob.objects.select_related("user").get(pk=pk)
+
+    return None
+
+
+def requeue_jobs() -> int:
+    """Возвращает в очередь незавершённые задания.
+
+    Нужно после аварийной остановки обработчика, когда задания
+    остались в состоянии `running`.
+
+    Returns:
+        int: Количество заданий, возвращённых в очередь.
+    """
+    return ShoppingListJob.objects.filter(status=Status.RUNNING).update(
+        status=Status.PENDING
+    )
+
+
+def run_job(job: ShoppingListJob) -> None:
+    """Формирует и сохраняет файл списка покупок.
+
+    Файл записывается частями во временный файл и затем переносится
+    в хранилище медиа-файлов.
+
+    Args:
+        job (ShoppingListJob): Задание в состоянии `running`.
+    """
+    try:
+        with TemporaryFile() as tmp:
+            for chunk in FORMATS[job.file_format].export(job.user):
+                tmp.write(chunk)
+            tmp.seek(0)
+            job.file.save(
+                f"{job.pk}.{job.file_format}", File(tmp), save=False
+            )
+        job.status = Status.DONE
+    except Exception:
+        logger.exception("Список покупок %s не сформирован", job.pk)
+        job.status = Status.FAILED
+
+    job.finished = timezone.now()
+    job.save(update_fields=("file", "status", "finished"))
+
+
+def purge_jobs(keep_hours: int) -> int:
+    """Удаляет задания старше времени хранения вместе с файлами.
+
+    Args:
+        keep_hours (int): Время хранения заданий, в часах.
+
+    Returns:
+        int: Количество удалённых заданий.
+    """
+    expired = timezone.now() - timedelta(hours=keep_hours)
+    count, _ = ShoppingListJob.objects.filter(created__lt=expired).delete()
+    return count
@@ -1,8 +1,37 @@
 from pathlib import Path
+from typing import Iterable
 
-from django.db.models.signals import post_delete
+from core.cache import bump_versions
+from core.cart_totals import recipe_cart_changed, recipe_ingredients_changed
+from core.counters import change_counter, object_counted
+from core.enums import CacheScopes
+from core.recipe_images import delete_files, schedule_image
+from core.search import schedule_search_update
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
-from recipes.models import Recipe
+from recipes.models import (
+    AmountIngredient,
+    Carts,
+    Favorites,
+    Ingredient,
+    Recipe,
+    RecipeImage,
+    ShoppingListJob,
+    Tag,
+)
+from users.models import Subscriptions
+
+User = get_user_model()
+
+# Поля пользователя, выводимые в данных автора рецепта.
+AUTHOR_FIELDS = frozenset(("email", "username", "first_name", "last_name"))
 
 
 @receiver(post_delete, sender=Recipe)
@@ -16,3 +45,455 @@ def delete_image(sender: Recipe, instance: Recipe, *a, **kw) -> None:
     image = Path(instance.image.path)
     if image.exists():
         image.unlink()
+
+
+@receiver(post_delete, sender=ShoppingListJob)
+def delete_shopping_list(
+    sender: ShoppingListJob, instance: ShoppingListJob, *a, **kw
+) -> None:
+    """Удаляет файл списка покупок при удалении задания.
+
+    Args:
+        sender (ShoppingListJob): Модель отправляющая сигнал.
+        instance (ShoppingListJob): Удалённое задание.
+    """
+    if instance.file:
+        instance.file.delete(save=False)
+
+
+@receiver(post_delete, sender=RecipeImage)
+def delete_renditions(
+    sender: RecipeImage, instance: RecipeImage, *a, **kw
+) -> None:
+    """Удаляет файлы копий изображения при удалении рецепта.
+
+    Args:
+        sender (RecipeImage): Модель отправляющая сигнал.
+        instance (RecipeImage): Удалённые копии.
+    """
+    delete_files(
+        Recipe._meta.get_field("image").storage, instance.files.values()
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_changed(
+    sender: Recipe,
+    instance: Recipe,
+    created: bool,
+    update_fields: frozenset | None,
+    *a,
+    **kw,
+) -> None:
+    """Ставит изображение рецепта в очередь на обработку.
+
+    Args:
+        sender (Recipe): Модель отправляющая сигнал.
+        instance (Recipe): Сохранённый рецепт.
+        created (bool): Рецепт только что создан.
+        update_fields (frozenset | None): Сохранённые поля.
+    """
+    if update_fields is None or "image" in update_fields:
+        schedule_image(instance, created)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender: Recipe, instance: Recipe, *a, **kw) -> None:
+    """Сбрасывает кэшированные данные об изменённом рецепте.
+
+    Args:
+        sender (Recipe): Модель отправляющая сигнал.
+        instance (Recipe): Изменённый рецепт.
+    """
+    bump_versions(
+        CacheScopes.RECIPES.value, CacheScopes.RECIPE.value % instance.pk
+    )
+
+
+@receiver(post_save, sender=AmountIngredient)
+@receiver(post_delete, sender=AmountIngredient)
+def recipe_ingredient_changed(
+    sender: AmountIngredient, instance: AmountIngredient, *a, **kw
+) -> None:
+    """Сбрасывает кэшированные данные о рецепте при изменении ингредиентов.
+
+    Args:
+        sender (AmountIngredient): Модель отправляющая сигнал.
+        instance (AmountIngredient): Изменённая связь.
+    """
+    bump_versions(
+        CacheScopes.RECIPES.value,
+        CacheScopes.RECIPE.value % instance.recipe_id,
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=AmountIngredient)
+def recipe_relations_changed(
+    sender: type,
+    instance: Recipe | Tag | Ingredient,
+    action: str,
+    reverse: bool,
+    pk_set: set[int] | None,
+    *a,
+    **kw,
+) -> None:
+    """Сбрасывает кэшированные данные о рецептах при изменении связей M2M.
+
+    Args:
+        sender (type): Промежуточная модель связи.
+        instance (Recipe | Tag | Ingredient): Объект, чьи связи изменены.
+        action (str): Тип изменения.
+        reverse (bool): Изменение выполнено со стороны тэга/ингредиента.
+        pk_set (set[int] | None): `id` объектов другой стороны связи.
+    """
+    if not action.startswith("post_"):
+        return
+
+    recipes = (pk_set or ()) if reverse else (instance.pk,)
+    bump_versions(
+        CacheScopes.RECIPES.value,
+        *(CacheScopes.RECIPE.value % pk for pk in recipes),
+    )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_search_changed(sender: Recipe, instance: Recipe, *a, **kw) -> None:
+    """Обновляет поисковый индекс изменённого рецепта.
+
+    Args:
+        sender (Recipe): Модель отправляющая сигнал.
+        instance (Recipe): Изменённый рецепт.
+    """
+    schedule_search_update((instance.pk,))
+
+
+@receiver(post_save, sender=AmountIngredient)
+@receiver(post_delete, sender=AmountIngredient)
+def recipe_ingredient_search_changed(
+    sender: AmountIngredient, instance: AmountIngredient, *a, **kw
+) -> None:
+    """Обновляет поисковый индекс рецепта при изменении ингредиентов.
+
+    Args:
+        sender (AmountIngredient): Модель отправляющая сигнал.
+        instance (AmountIngredient): Изменённая связь.
+    """
+    schedule_search_update((instance.recipe_id,))
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_search_changed(
+    sender: Ingredient, instance: Ingredient, created: bool, *a, **kw
+) -> None:
+    """Обновляет поисковый индекс рецептов с переименованным ингредиентом.
+
+    Args:
+        sender (Ingredient): Модель отправляющая сигнал.
+        instance (Ingredient): Изменённый ингредиент.
+        created (bool): Ингредиент только что создан.
+    """
+    if created:
+        return
+
+    schedule_search_update(
+        AmountIngredient.objects.filter(ingredients=instance).values_list(
+            "recipe_id", flat=True
+        )
+    )
+
+
+def bump_recipes(recipes: Iterable[int], *scopes: str) -> None:
+    """Сбрасывает кэшированные данные о рецептах и разделах.
+
+    Args:
+        recipes (Iterable[int]): `id` изменившихся рецептов.
+        scopes (str): Названия других изменившихся разделов.
+    """
+    bump_versions(
+        *scopes, *(CacheScopes.RECIPE.value % pk for pk in recipes)
+    )
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender: Tag, instance: Tag, created: bool, *a, **kw) -> None:
+    """Сбрасывает кэшированные данные о тэгах и рецептах с тэгом.
+
+    Args:
+        sender (Tag): Модель отправляющая сигнал.
+        instance (Tag): Сохранённый тэг.
+        created (bool): Тэг только что создан.
+    """
+    if created:
+        bump_versions(CacheScopes.TAGS.value)
+        return
+
+    bump_recipes(
+        Recipe.tags.through.objects.filter(tag=instance).values_list(
+            "recipe_id", flat=True
+        ),
+        CacheScopes.TAGS.value,
+        CacheScopes.RECIPES.value,
+    )
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleted(sender: Tag, instance: Tag, *a, **kw) -> None:
+    """Сбрасывает кэшированные данные о тэгах и рецептах с тэгом.
+
+    Связи с рецептами удаляются без сигналов, поэтому рецепты
+    выбираются до удаления тэга.
+
+    Args:
+        sender (Tag): Модель отправляющая сигнал.
+        instance (Tag): Удаляемый тэг.
+    """
+    bump_recipes(
+        Recipe.tags.through.objects.filter(tag=instance).values_list(
+            "recipe_id", flat=True
+        ),
+        CacheScopes.TAGS.value,
+        CacheScopes.RECIPES.value,
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredients_changed(
+    sender: Ingredient, instance: Ingredient, *a, created: bool = False, **kw
+) -> None:
+    """Сбрасывает кэшированные данные об ингредиентах и рецептах.
+
+    Новый ингредиент ещё не входит в рецепты. Рецепты удалённого
+    ингредиента сбрасываются сигналами удаления `AmountIngredient`.
+
+    Args:
+        sender (Ingredient): Модель отправляющая сигнал.
+        instance (Ingredient): Изменённый ингредиент.
+        created (bool): Ингредиент только что создан.
+    """
+    if created:
+        bump_versions(CacheScopes.INGREDIENTS.value)
+        return
+
+    bump_recipes(
+        AmountIngredient.objects.filter(ingredients=instance).values_list(
+            "recipe_id", flat=True
+        ),
+        CacheScopes.INGREDIENTS.value,
+        CacheScopes.RECIPES.value,
+    )
+
+
+@receiver(post_save, sender=User)
+def user_changed(
+    sender: User,
+    instance: User,
+    created: bool,
+    update_fields: frozenset | None,
+    *a,
+    **kw,
+) -> None:
+    """Сбрасывает кэшированные данные о рецептах изменённого автора.
+
+    Новый пользователь ещё не автор рецептов. Обновление полей,
+    не выводимых в данных автора (например, даты последнего входа),
+    не учитывается.
+
+    Args:
+        sender (User): Модель отправляющая сигнал.
+        instance (User): Сохранённый пользователь.
+        created (bool): Пользователь только что создан.
+        update_fields (frozenset | None): Сохранённые поля.
+    """
+    if created or (
+        update_fields is not None and not update_fields & AUTHOR_FIELDS
+    ):
+        return
+
+    recipes = list(
+        Recipe.objects.filter(author=instance).values_list("pk", flat=True)
+    )
+    if recipes:
+        bump_recipes(recipes, CacheScopes.AUTHORS.value)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleted(sender: User, instance: User, *a, **kw) -> None:
+    """Сбрасывает кэшированные данные о рецептах удаляемого автора.
+
+    Автор рецептов заменяется на NULL без сигналов, поэтому рецепты
+    выбираются до удаления пользователя.
+
+    Args:
+        sender (User): Модель отправляющая сигнал.
+        instance (User): Удаляемый пользователь.
+    """
+    recipes = list(
+        Recipe.objects.filter(author=instance).values_list("pk", flat=True)
+    )
+    if recipes:
+        bump_recipes(recipes, CacheScopes.AUTHORS.value)
+
+
+@receiver(post_save, sender=Favorites)
+@receiver(post_delete, sender=Favorites)
+@receiver(post_save, sender=Carts)
+@receiver(post_delete, sender=Carts)
+@receiver(post_save, sender=Subscriptions)
+@receiver(post_delete, sender=Subscriptions)
+def user_lists_changed(
+    sender: Favorites | Carts | Subscriptions,
+    instance: Favorites | Carts | Subscriptions,
+    *a,
+    **kw,
+) -> None:
+    """Сбрасывает кэшированные данные о списках пользователя.
+
+    Args:
+        sender (Favorites | Carts | Subscriptions):
+            Модель отправляющая сигнал.
+        instance (Favorites | Carts | Subscriptions): Изменённая связь.
+    """
+    bump_versions(CacheScopes.USER.value % instance.user_id)
+
+
+@receiver(post_save, sender=Carts)
+def cart_recipe_added(
+    sender: Carts, instance: Carts, created: bool, *a, **kw
+) -> None:
+    """Добавляет ингредиенты рецепта к суммам корзины пользователя.
+
+    Args:
+        sender (Carts): Модель отправляющая сигнал.
+        instance (Carts): Созданная связь.
+        created (bool): Связь только что создана.
+    """
+    if created:
+        recipe_cart_changed((instance.user_id,), instance.recipe_id, True)
+
+
+@receiver(post_delete, sender=Carts)
+def cart_recipe_removed(sender: Carts, instance: Carts, *a, **kw) -> None:
+    """Вычитает ингредиенты рецепта из сумм корзины пользователя.
+
+    При удалении рецепта ингредиенты могут быть удалены раньше связи
+    с корзиной. Тогда они уже вычтены сигналом `cart_ingredient_removed`.
+
+    Args:
+        sender (Carts): Модель отправляющая сигнал.
+        instance (Carts): Удалённая связь.
+    """
+    recipe_cart_changed((instance.user_id,), instance.recipe_id, False)
+
+
+@receiver(post_save, sender=AmountIngredient)
+def cart_ingredient_saved(
+    sender: AmountIngredient,
+    instance: AmountIngredient,
+    created: bool,
+    *a,
+    **kw,
+) -> None:
+    """Обновляет суммы корзин, содержащих рецепт с изменённым ингредиентом.
+
+    Прежнее количество изменённой связи неизвестно, поэтому суммы
+    таких корзин пересчитываются заново.
+
+    Args:
+        sender (AmountIngredient): Модель отправляющая сигнал.
+        instance (AmountIngredient): Изменённая связь.
+        created (bool): Связь только что создана.
+    """
+    recipe_ingredients_changed(
+        instance.recipe_id,
+        {instance.ingredients_id: instance.amount} if created else None,
+    )
+
+
+@receiver(post_delete, sender=AmountIngredient)
+def cart_ingredient_removed(
+    sender: AmountIngredient, instance: AmountIngredient, *a, **kw
+) -> None:
+    """Вычитает удалённый ингредиент рецепта из сумм корзин.
+
+    Args:
+        sender (AmountIngredient): Модель отправляющая сигнал.
+        instance (AmountIngredient): Удалённая связь.
+    """
+    recipe_ingredients_changed(
+        instance.recipe_id, {instance.ingredients_id: -instance.amount}
+    )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Favorites)
+@receiver(post_save, sender=Carts)
+@receiver(post_save, sender=Subscriptions)
+def counted_object_created(
+    sender: Recipe | Favorites | Carts | Subscriptions,
+    instance: Recipe | Favorites | Carts | Subscriptions,
+    created: bool,
+    *a,
+    **kw,
+) -> None:
+    """Увеличивает счётчики объектов, связанных с созданным.
+
+    Args:
+        sender (Recipe | Favorites | Carts | Subscriptions):
+            Модель отправляющая сигнал.
+        instance (Recipe | Favorites | Carts | Subscriptions):
+            Сохранённый объект.
+        created (bool): Объект только что создан.
+    """
+    if created:
+        object_counted(instance, 1)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Favorites)
+@receiver(post_delete, sender=Carts)
+@receiver(post_delete, sender=Subscriptions)
+def counted_object_deleted(
+    sender: Recipe | Favorites | Carts | Subscriptions,
+    instance: Recipe | Favorites | Carts | Subscriptions,
+    *a,
+    **kw,
+) -> None:
+    """Уменьшает счётчики объектов, связанных с удалённым.
+
+    Args:
+        sender (Recipe | Favorites | Carts | Subscriptions):
+            Модель отправляющая сигнал.
+        instance (Recipe | Favorites | Carts | Subscriptions):
+            Удалённый объект.
+    """
+    object_counted(instance, -1)
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_author_changed(
+    sender: Recipe, instance: Recipe, update_fields: frozenset | None, *a, **kw
+) -> None:
+    """Переносит рецепт в счётчике рецептов при смене автора.
+
+    Args:
+        sender (Recipe): Модель отправляющая сигнал.
+        instance (Recipe): Сохраняемый рецепт.
+        update_fields (frozenset | None): Сохраняемые поля.
+    """
+    if instance._state.adding or (
+        update_fields is not None and "author" not in update_fields
+    ):
+        return
+
+    author_id = (
+        Recipe.objects.filter(pk=instance.pk)
+        .values_list("author_id", flat=True)
+        .first()
+    )
+    if author_id != instance.author_id:
+        change_counter(User, "recipes_count", author_id, -1)
+        change_counter(User, "recipes_count", instance.author_id, 1)
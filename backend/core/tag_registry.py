@@ -0,0 +1,70 @@
+"""Модуль реестра тэгов в памяти процесса.
+
+Тэгов немного, и меняются они редко, а нужны почти каждому запросу
+к рецептам: для вывода, фильтрации по `slug` и проверки вводных данных.
+Поэтому тэги хранятся в памяти процесса и берутся без обращения
+к базе данных.
+"""
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from recipes.models import Tag
+
+
+class TagRegistry:
+    """Неизменяемый реестр тэгов.
+
+    Тэги хранятся в порядке их вывода и доступны по `id` и по `slug`.
+    Объекты тэгов общие для всех запросов процесса, изменять их нельзя.
+
+    Attrs:
+        tags (tuple[Tag]): Тэги в порядке вывода.
+        by_id (dict[int, Tag]): Тэги по `id`.
+        by_slug (dict[str, Tag]): Тэги по `slug`.
+        version (int): Версия данных, по которым построен реестр.
+    """
+
+    __slots__ = ("tags", "by_id", "by_slug", "version", "_positions")
+
+    def __init__(self, tags: Iterable["Tag"], version: int = 0) -> None:
+        self.tags = tuple(tags)
+        self.by_id = {tag.pk: tag for tag in self.tags}
+        self.by_slug = {tag.slug: tag for tag in self.tags}
+        self.version = version
+        self._positions = {tag.pk: idx for idx, tag in enumerate(self.tags)}
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def get_many(self, ids: Iterable[int]) -> list["Tag"]:
+        """Получает тэги по `id` в порядке вывода.
+
+        Несуществующие `id` пропускаются.
+
+        Args:
+            ids (Iterable[int]): `id` тэгов.
+
+        Returns:
+            list[Tag]: Найденные тэги.
+        """
+        found = sorted(
+            {pk for pk in ids if pk in self.by_id}, key=self._positions.get
+        )
+        return [self.by_id[pk] for pk in found]
+
+    def ids_by_slugs(self, slugs: Iterable[str]) -> list[int]:
+        """Получает `id` тэгов по их `slug`.
+
+        Несуществующие `slug` пропускаются.
+
+        Args:
+            slugs (Iterable[str]): `slug` тэгов.
+
+        Returns:
+            list[int]: `id` найденных тэгов.
+        """
+        return [
+            self.by_slug[slug].pk
+            for slug in set(slugs)
+            if slug in self.by_slug
+        ]
@@ -0,0 +1,63 @@
+"""Модуль загрузки изображений в `multipart/form-data`.
+
+Файл из запроса записывается во временный файл частями, поэтому память
+на запрос не зависит от размера изображения. Неподдерживаемый формат
+определяется по первым байтам файла, а превышение размера - по мере
+чтения, до того как изображение откроет Pillow.
+"""
+from core.enums import Limits
+from core.images import HEADER_SIZE, image_format
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+INVALID_FORMAT_MESSAGE = (
+    "Загрузите изображение в формате JPEG, PNG, GIF или WebP."
+)
+TOO_LARGE_MESSAGE = (
+    f"Размер изображения больше {Limits.MAX_IMAGE_SIZE // 1024 // 1024} МБ."
+)
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Записывает загружаемые изображения во временный файл.
+
+    Файл неподдерживаемого формата или больше `Limits.MAX_IMAGE_SIZE`
+    дальше не записывается: остаток файла пропускается, а сериализатору
+    передаётся пустой файл с причиной отказа в `upload_error`.
+    """
+
+    def new_file(self, *args, **kwargs) -> None:
+        super().new_file(*args, **kwargs)
+        self.header = b""
+        self.upload_error = None
+        if self.content_length and self.content_length > Limits.MAX_IMAGE_SIZE:
+            self.upload_error = TOO_LARGE_MESSAGE
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> None:
+        if self.upload_error is not None:
+            return None
+
+        if start + len(raw_data) > Limits.MAX_IMAGE_SIZE:
+            self.upload_error = TOO_LARGE_MESSAGE
+            return None
+
+        if len(self.header) < HEADER_SIZE:
+            self.header += raw_data[: HEADER_SIZE - len(self.header)]
+            if len(self.header) == HEADER_SIZE and not image_format(
+                self.header
+            ):
+                self.upload_error = INVALID_FORMAT_MESSAGE
+                return None
+
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size: int) -> UploadedFile:
+        if self.upload_error is None and not image_format(self.header):
+            self.upload_error = INVALID_FORMAT_MESSAGE
+
+        file = super().file_complete(file_size)
+        if self.upload_error is not None:
+            file.truncate()
+            file.size = 0
+        file.upload_error = self.upload_error
+        return file
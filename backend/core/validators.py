@@ -132,12 +132,16 @@ def hex_color_validator(color: str) -> str:
     return "#" + color.upper()
 
 
-def tags_exist_validator(tags_ids: list[int | str], Tag: "Tag") -> list["Tag"]:
+def tags_exist_validator(
+    tags_ids: list[int | str], tags: dict[int, "Tag"]
+) -> list["Tag"]:
     """Проверяет наличие тэгов с указанными id.
 
     Args:
         tags_ids (list[int | str]): Список id.
-        Tag (Tag): Модель тэгов во избежании цикличного импорта.
+        tags (dict[int, Tag]):
+            Существующие тэги по `id`, во избежании цикличного импорта
+            передаются из реестра тэгов.
 
     Raises:
         ValidationError: Тэга с одним из указанных id не существует.
@@ -145,12 +149,15 @@ def tags_exist_validator(tags_ids: list[int | str], Tag: "Tag") -> list["Tag"]:
     if not tags_ids:
         raise ValidationError("Не указаны тэги")
 
-    tags = Tag.objects.filter(id__in=tags_ids)
+    try:
+        found = [tags[int(pk)] for pk in tags_ids if int(pk) in tags]
+    except (TypeError, ValueError):
+        raise ValidationError("Указан несуществующий тэг")
 
-    if len(tags) != len(tags_ids):
+    if len(found) != len(tags_ids):
         raise ValidationError("Указан несуществующий тэг")
 
-    return tags
+    return found
 
 
 def ingredients_validator(
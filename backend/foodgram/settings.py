@@ -1,3 +1,4 @@
+from importlib.util import find_spec
 from pathlib import Path
 
 from decouple import Csv, config
@@ -76,6 +77,27 @@ DATABASES = {
     }
 }
 
+# Кэш общий для приложения и фоновых обработчиков: версии данных,
+# которые увеличивают обработчики, должны видеть и воркеры gunicorn.
+# В docker-compose.yml это Redis, файловый кэш - для разработки.
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="/tmp/foodgram_cache"),
+        "TIMEOUT": config("CACHE_TIMEOUT", default=60 * 60, cast=int),
+    }
+}
+
+# Файловый кэш и кэш в памяти по умолчанию хранят лишь 300 записей,
+# а в кэше по записи на каждый рецепт и пользователя.
+if not CACHES["default"]["BACKEND"].endswith("RedisCache"):
+    CACHES["default"]["OPTIONS"] = {
+        "MAX_ENTRIES": config("CACHE_MAX_ENTRIES", default=100_000, cast=int)
+    }
+
 AUTH_USER_MODEL = "users.MyUser"
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -100,8 +122,41 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 
+# MessagePack отдаётся только по запросу `Accept: application/msgpack`.
+if find_spec("msgpack"):
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].append(
+        "api.renderers.MessagePackRenderer"
+    )
+
+# Списки не меньше этого размера отправляются клиенту частями.
+STREAMING_THRESHOLD = config("STREAMING_THRESHOLD", default=200, cast=int)
+
+# Для корзин не меньше этого количества рецептов список покупок
+# формируется в фоне командой `process_shopping_lists`.
+SHOPPING_LIST_ASYNC_THRESHOLD = config(
+    "SHOPPING_LIST_ASYNC_THRESHOLD", default=100, cast=int
+)
+# Время хранения сформированных в фоне списков покупок, в часах.
+SHOPPING_LIST_KEEP_HOURS = config(
+    "SHOPPING_LIST_KEEP_HOURS", default=24, cast=int
+)
+# Шрифт TrueType с кириллицей для списков покупок в формате PDF.
+PDF_FONT_PATH = config(
+    "PDF_FONT_PATH",
+    default="/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+# Внутренний адрес nginx для отдачи медиа-файлов (`X-Accel-Redirect`).
+# Если не задан, файлы отдаёт приложение.
+ACCEL_REDIRECT_PREFIX = config(
+    "ACCEL_REDIRECT_PREFIX", default="" if DEBUG else "/protected/"
+)
+
 DJOSER = {
     "LOGIN_FIELD": "email",
     "HIDE_USERS": False,
@@ -130,6 +185,10 @@ STATIC_ROOT = BASE_DIR / "static"
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / MEDIA_URL
 
+# Загружаемые файлы записываются во временный файл частями
+# и проверяются до открытия изображения.
+FILE_UPLOAD_HANDLERS = ["core.uploads.ImageUploadHandler"]
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 PASSWORD_RESET_TIMEOUT = 60 * 60  # 1 hour
@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/4.0/howto/deployment/wsgi/
 """
 
+import gc
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -14,3 +15,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "foodgram.settings")
 
 application = get_wsgi_application()
+
+# Данные, загруженные до форка воркеров gunicorn (`--preload`),
+# используются ими совместно. `gc.freeze` исключает эти объекты
+# из сборки мусора, чтобы она не копировала их страницы памяти.
+from core.services import preload_ingredient_index  # noqa: E402
+
+preload_ingredient_index()
+gc.freeze()
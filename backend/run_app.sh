@@ -8,4 +8,4 @@ done;
 
 python manage.py migrate;
 python manage.py collectstatic --noinput;
-gunicorn -w 2 -b 0:8000 foodgram.wsgi;
+gunicorn -w 2 --preload -b 0:8000 foodgram.wsgi;
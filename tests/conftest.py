@@ -0,0 +1,9 @@
+def pytest_configure(config):
+    for marker in (
+        "validators: валидаторы полей моделей",
+        "membership: компактные списки связей пользователя",
+        "ingredient_index: индекс ингредиентов в памяти",
+        "pdf: формирование PDF-файлов",
+        "images: обработка изображений рецептов",
+    ):
+        config.addinivalue_line("markers", marker)
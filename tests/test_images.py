@@ -0,0 +1,71 @@
+from base64 import b64decode
+from io import BytesIO
+
+import pytest
+from backend.core.images import image_format, process_image
+from PIL import Image
+
+
+def image_file(image: Image.Image, fmt: str, **params) -> BytesIO:
+    file = BytesIO()
+    image.save(file, fmt, **params)
+    file.seek(0)
+    return file
+
+
+@pytest.mark.images
+def test_exif_applied_and_stripped():
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = 'Camera'
+    file = image_file(
+        Image.new('RGB', (2000, 1000), 'red'), 'JPEG', exif=exif.tobytes()
+    )
+
+    processed = process_image(file, (500, 500))
+
+    image, extension = processed.renditions['image']
+    assert extension == 'jpg'
+    image = Image.open(BytesIO(image))
+    assert image.size == (250, 500)
+    for data, _ in processed.renditions.values():
+        rendition = Image.open(BytesIO(data))
+        assert rendition.width < rendition.height
+        assert not rendition.getexif()
+
+
+@pytest.mark.images
+def test_small_transparent_png():
+    file = image_file(Image.new('RGBA', (100, 50), (0, 0, 0, 0)), 'PNG')
+
+    processed = process_image(file, (500, 500))
+
+    image, extension = processed.renditions['image']
+    assert extension == 'png'
+    image = Image.open(BytesIO(image))
+    assert image.size == (100, 50)
+    assert image.getpixel((0, 0)) == (0, 0, 0, 0)
+
+    card, extension = processed.renditions['card']
+    assert extension == 'jpg'
+    card = Image.open(BytesIO(card))
+    assert card.size == (100, 50)
+    assert card.getpixel((0, 0)) == (255, 255, 255)
+
+    header, data = processed.placeholder.split(',')
+    assert header == 'data:image/jpeg;base64'
+    assert Image.open(BytesIO(b64decode(data))).width == 16
+
+
+@pytest.mark.images
+@pytest.mark.parametrize(
+    'header, expected',
+    (
+        (b'\xff\xd8\xff\xe0\0\x10JFIF\0\x01', 'jpeg'),
+        (b'RIFF\0\0\0\0WEBP', 'webp'),
+        (b'RIFF\0\0\0\0WAVE', None),
+        (b'<svg xmlns="', None),
+    ),
+)
+def test_image_format(header, expected):
+    assert image_format(header) == expected
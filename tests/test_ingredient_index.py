@@ -0,0 +1,42 @@
+import pytest
+from backend.core.ingredient_index import IngredientIndex
+
+rows = (
+    (1, 'фасоль', 'г'),
+    (2, 'соль', 'г'),
+    (3, 'соль морская', 'г'),
+    (4, 'солод', 'г'),
+    (5, 'масло', 'мл'),
+)
+
+
+def names(found):
+    return [row[1] for row in found]
+
+
+@pytest.mark.ingredient_index
+def test_prefix_before_substring():
+    index = IngredientIndex(rows)
+    assert names(index.search(('соль',), 10)) == [
+        'соль', 'соль морская', 'фасоль'
+    ]
+
+
+@pytest.mark.ingredient_index
+def test_several_terms():
+    index = IngredientIndex(rows)
+    assert names(index.search(('масл', 'сол'), 10)) == [
+        'масло', 'солод', 'соль', 'соль морская', 'фасоль'
+    ]
+
+
+@pytest.mark.ingredient_index
+def test_limit():
+    index = IngredientIndex(rows)
+    assert names(index.search(('о',), 2)) == ['масло', 'солод']
+
+
+@pytest.mark.ingredient_index
+@pytest.mark.parametrize('terms', ((), ('',), ('перец',)))
+def test_nothing_found(terms):
+    assert IngredientIndex(rows).search(terms, 10) == []
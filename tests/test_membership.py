@@ -0,0 +1,21 @@
+import pytest
+from backend.core.membership import IdSet
+
+
+@pytest.mark.membership
+def test_id_set_sorted_unique():
+    ids = IdSet((5, 1, 3, 5))
+    assert list(ids) == [1, 3, 5]
+    assert len(ids) == 3
+
+
+@pytest.mark.membership
+@pytest.mark.parametrize('pk, expected', ((1, True), (4, False), (9, False)))
+def test_id_set_contains(pk, expected):
+    assert (pk in IdSet((1, 3, 5))) is expected
+
+
+@pytest.mark.membership
+def test_id_set_bytes_roundtrip():
+    ids = IdSet((2, 10 ** 12, 7))
+    assert list(IdSet.from_bytes(ids.to_bytes())) == [2, 7, 10 ** 12]
@@ -0,0 +1,123 @@
+import re
+import zlib
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from backend.core.pdf import (
+    FONT_SIZE,
+    LINES_PER_PAGE,
+    TEXT_WIDTH,
+    PDFWriter,
+    TrueTypeFont,
+)
+from PIL import Image, ImageDraw, ImageFont
+
+font_path = Path('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
+
+pytestmark = pytest.mark.skipif(
+    not font_path.is_file(), reason='Нет шрифта DejaVuSans'
+)
+
+
+def streams(pdf: bytes) -> dict[int, bytes]:
+    found = {}
+    for match in re.finditer(
+        rb'(\d+) 0 obj\n<< /Length (\d+) /Filter /FlateDecode[^>]*>>\n'
+        rb'stream\n',
+        pdf,
+    ):
+        start = match.end()
+        data = pdf[start:start + int(match.group(2))]
+        found[int(match.group(1))] = zlib.decompress(data)
+    return found
+
+
+def draw(font: ImageFont.FreeTypeFont, text: str) -> bytes:
+    image = Image.new('L', (600, 40))
+    ImageDraw.Draw(image).text((0, 0), text, font=font, fill=255)
+    return image.tobytes()
+
+
+@pytest.mark.pdf
+def test_cyrillic_glyphs():
+    font = TrueTypeFont(font_path)
+    assert all(font.glyph(char) for char in 'Списокпокупокёй')
+    assert font.glyph('\U0001F600') == 0
+
+
+@pytest.mark.pdf
+def test_xref_offsets():
+    lines = ['Список покупок'] + [f'соль: {i} г' for i in range(200)]
+    pdf = b''.join(PDFWriter(TrueTypeFont(font_path)).render(lines))
+
+    startxref = int(re.search(rb'startxref\n(\d+)', pdf).group(1))
+    assert pdf[startxref:].startswith(b'xref')
+
+    offsets = re.findall(rb'(\d{10}) 00000 n', pdf[startxref:])
+    for number, offset in enumerate(offsets, 1):
+        assert pdf[int(offset):].startswith(b'%d 0 obj' % number)
+
+    assert pdf.count(b'/Type /Page ') == 4
+
+
+@pytest.mark.pdf
+def test_long_lines_wrapped_across_pages():
+    font = TrueTypeFont(font_path)
+    words = ['покупка'] * (LINES_PER_PAGE * 12)
+    pdf = b''.join(PDFWriter(font).render([' '.join(words), 'ж' * 500]))
+
+    pages = [
+        content.count(b'Tj')
+        for content in streams(pdf).values()
+        if content.startswith(b'BT')
+    ]
+    assert len(pages) == 2
+    assert pages[0] == LINES_PER_PAGE
+    # Глиф записан четырьмя шестнадцатеричными цифрами
+    for line in re.findall(rb'<([0-9A-F]*)> Tj', pdf):
+        glyphs = [int(line[i:i + 4], 16) for i in range(0, len(line), 4)]
+        width = sum(font.width(glyph) for glyph in glyphs) * FONT_SIZE
+        assert width <= TEXT_WIDTH * 1000
+
+
+@pytest.mark.pdf
+def test_read_by_independent_parser():
+    pypdf = pytest.importorskip('pypdf')
+    long_line = ' '.join(['Молоко (л) — 2'] * 12)
+    lines = ['Список покупок', long_line] + [
+        f'соль (г) — {i}' for i in range(LINES_PER_PAGE)
+    ]
+    pdf = b''.join(PDFWriter(TrueTypeFont(font_path)).render(lines))
+
+    reader = pypdf.PdfReader(BytesIO(pdf))
+    text = ''.join(page.extract_text() for page in reader.pages)
+
+    assert len(reader.pages) == 2
+    parsed = text.splitlines()
+    assert parsed[0] == lines[0]
+    wrapped = parsed[1:len(parsed) - LINES_PER_PAGE]
+    assert len(wrapped) > 1
+    assert ' '.join(wrapped) == long_line
+    assert parsed[-LINES_PER_PAGE:] == lines[2:]
+
+
+@pytest.mark.pdf
+def test_non_cyrillic_text_subset():
+    text = 'Crème brûlée — ½ kg, αβγ, Ǆ ©'
+    font = TrueTypeFont(font_path)
+    pdf = b''.join(PDFWriter(font).render([text]))
+
+    assert len(pdf) < font.size // 10
+    to_unicode = b''.join(streams(pdf).values())
+    for char in set(text) - {' '}:
+        assert font.glyph(char)
+        assert b'<%04X> <%s>' % (
+            font.glyph(char), char.encode('utf-16-be').hex().encode()
+        ) in to_unicode
+
+    # Подмножество шрифта рисует текст так же, как исходный шрифт.
+    subset = font.subset(font.glyph(char) for char in text)
+    assert draw(ImageFont.truetype(BytesIO(subset), 20), text) == draw(
+        ImageFont.truetype(str(font_path), 20), text
+    )